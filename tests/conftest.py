@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Module defines common test fixtures."""
 from logging import getLogger
+from pathlib import Path
 
 from cement import fs
 
@@ -25,3 +26,168 @@ def tmp(request):
     t = fs.Tmp()
     yield t
     t.remove()
+
+
+HOST_ASSET_XML = """
+    <HostAsset>
+      <id>{host_id}</id>
+      <name>host-{host_id}</name>
+      <fqdn>host-{host_id}.example.org</fqdn>
+      <os>Linux</os>
+      <created>2020-01-01T00:00:00Z</created>
+      <modified>2020-06-01T00:00:00Z</modified>
+      <lastVulnScan>2020-06-01T00:00:00Z</lastVulnScan>
+      <sourceInfo>
+        <list>
+          <AzureAssetSourceSimple>
+            <vmId>vm-{host_id}</vmId>
+            <resourceGroupName>rg-{host_id}</resourceGroupName>
+            <privateIpAddress>10.0.0.{host_id}</privateIpAddress>
+            <subscriptionId>sub-{sub_id}</subscriptionId>
+          </AzureAssetSourceSimple>
+        </list>
+      </sourceInfo>
+      <vuln>
+        <list>{vulns}
+        </list>
+      </vuln>
+    </HostAsset>"""
+
+HOST_ASSET_VULN_XML = """
+          <HostAssetVuln>
+            <qid>{qid}</qid>
+            <hostInstanceVulnId>{vuln_id}</hostInstanceVulnId>
+            <firstFound>2020-02-01T00:00:00Z</firstFound>
+            <lastFound>2020-06-01T00:00:00Z</lastFound>
+          </HostAssetVuln>"""
+
+
+def make_qualys_xml(hosts: int, vulns_per_host: int, first_host_id: int = 1) -> str:
+    """Generate Qualys host asset export with vulnerabilities."""
+    host_assets = []
+
+    for host_id in range(first_host_id, first_host_id + hosts):
+        vulns = "".join(
+            HOST_ASSET_VULN_XML.format(qid=100 + n, vuln_id=host_id * 1000 + n)
+            for n in range(vulns_per_host)
+        )
+        host_assets.append(
+            HOST_ASSET_XML.format(host_id=host_id, sub_id=host_id % 2, vulns=vulns)
+        )
+
+    return (
+        "<?xml version='1.0' encoding='UTF-8' ?>\n"
+        "<ServiceResponse>\n  <responseCode>SUCCESS</responseCode>\n"
+        "  <data>{}\n  </data>\n</ServiceResponse>\n".format("".join(host_assets))
+    )
+
+
+@pytest.fixture(scope="function")
+def xml_file(tmp):
+    """Provide path to XML file with Qualys host assets."""
+    path = Path(tmp.dir) / "host_assets.xml"
+    path.write_text(make_qualys_xml(hosts=3, vulns_per_host=2))
+
+    return str(path)
+
+
+@pytest.fixture(scope="function")
+def csv_file(tmp):
+    """Provide path to CSV file with Azure subscriptions."""
+    path = Path(tmp.dir) / "subscriptions.csv"
+    path.write_text(
+        "id,name,contactName,contactEmail\n"
+        "sub-0,Subscription Zero,John Doe,john@example.org\n"
+        "sub-1,Subscription O'One,Jane Doe,jane@example.org\n"
+    )
+
+    return str(path)
+
+
+REPORT_TEMPLATE = """# {{ subscription_name }}
+{% for host in hosts %}
+* {{ host.name }}: {{ host.vulns }}
+{%- endfor %}
+"""
+
+
+@pytest.fixture(scope="function")
+def template_dir(tmp):
+    """Provide path to directory with report templates."""
+    path = Path(tmp.dir) / "templates"
+    path.mkdir()
+    (path / "hosts_md.j2").write_text(REPORT_TEMPLATE)
+
+    return str(path)
+
+
+@pytest.fixture(scope="function")
+def app_config(tmp, csv_file, template_dir):
+    """Provide app configuration with example data layout and report."""
+    return {
+        "yager": {
+            "data": {
+                "db_uri": str(Path(tmp.dir) / "sqlite.db"),
+                "exclude_from_refresh": [],
+                "layout": [
+                    {
+                        "name": "AzureSubscriptions",
+                        "columns": "id TEXT PRIMARY KEY, name TEXT, "
+                        "contactName TEXT, contactEmail TEXT",
+                        "data_source": "csv:{}".format(csv_file),
+                    },
+                    {
+                        "name": "HostAssets",
+                        "columns": "id INTEGER PRIMARY KEY, name TEXT, fqdn TEXT, "
+                        "azureVmId TEXT, azureSubscriptionId TEXT",
+                        "data_source": "xml:.//HostAsset",
+                        "input_map": {
+                            "id": "id",
+                            "name": "name",
+                            "fqdn": "fqdn",
+                            "azureVmId": "./sourceInfo/list/AzureAssetSourceSimple/vmId",  # noqa: E501
+                            "azureSubscriptionId": "./sourceInfo/list/AzureAssetSourceSimple/subscriptionId",  # noqa: E501
+                        },
+                    },
+                    {
+                        "name": "Vulns",
+                        "columns": "id INTEGER PRIMARY KEY, qid INTEGER, "
+                        "firstFound DATETIME, lastFound DATETIME, hostAssetsId INTEGER",
+                        "data_source": "xml:.//HostAssetVuln",
+                        "input_map": {
+                            "id": "hostInstanceVulnId",
+                            "qid": "qid",
+                            "firstFound": "firstFound",
+                            "lastFound": "lastFound",
+                        },
+                        "input_map_parametrized": {
+                            "hostAssetsId": ".//HostAssetVuln/[hostInstanceVulnId='{id}']/.../.../.../id",  # noqa: E501
+                        },
+                    },
+                ],
+                "template_dir": template_dir,
+            },
+            "reports": [
+                {
+                    "name": "hosts_md",
+                    "template_file": "hosts_md.j2",
+                    "output_extension": "md",
+                    "template_params": [
+                        {
+                            "query": "SELECT name FROM AzureSubscriptions "
+                            "WHERE id == '{sub_id}'",
+                            "var_mapping": {"subscription_name": "name"},
+                        },
+                        {
+                            "query": "SELECT HostAssets.name, count(Vulns.id) AS vulns "
+                            "FROM HostAssets "
+                            "JOIN Vulns ON Vulns.hostAssetsId = HostAssets.id "
+                            "WHERE azureSubscriptionId == '{sub_id}' "
+                            "GROUP BY HostAssets.id ORDER BY HostAssets.id",
+                            "var_mapping": {"hosts": "*"},
+                        },
+                    ],
+                },
+            ],
+        },
+    }
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Module defines synthetic data sets and fixtures for benchmarks."""
+import os
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from random import Random
+from typing import Callable, Dict, List, NamedTuple
+
+import pytest
+
+from tests.conftest import HOST_ASSET_VULN_XML, HOST_ASSET_XML
+
+from yager.main import YagerTest
+
+# Data set sizes benchmarks run with, selected with YAGER_BENCHMARK_SIZES
+# environment variable (e.g. `YAGER_BENCHMARK_SIZES=small,medium,large`)
+DATA_SETS: Dict[str, Dict[str, int]] = {
+    "small": {"hosts": 100, "vulns_per_host": 10, "subscriptions": 5, "kb": 200},
+    "medium": {"hosts": 1000, "vulns_per_host": 20, "subscriptions": 20, "kb": 2000},
+    "large": {"hosts": 10000, "vulns_per_host": 20, "subscriptions": 100, "kb": 20000},
+}
+
+VULN_TYPES = ["Vulnerability", "Potential Vulnerability", "Information Gathered"]
+
+REPORT_TEMPLATE = """# {{ subscription_name }}
+{% for host_vm_id, vulns in vulns_by_host.items() %}
+## {{ vulns[0].host_name }}
+{% for vuln in vulns %}
+* {{ vuln.vuln_qid }}: {{ kb_by_qid[vuln.vuln_qid].title }} ({{ vuln.vuln_level }})
+{%- endfor %}
+{% endfor %}
+"""
+
+
+class DataSet(NamedTuple):
+    """Paths to and sizes of synthetic data sources."""
+
+    name: str
+    xml_path: Path
+    subscriptions_path: Path
+    kb_path: Path
+    sizes: Dict[str, int]
+
+    @property
+    def rows(self) -> int:
+        """Return number of rows loaded from all data sources."""
+        return (
+            self.sizes["hosts"] * (1 + self.sizes["vulns_per_host"])
+            + self.sizes["subscriptions"]
+            + self.sizes["kb"]
+        )
+
+
+def make_data_set(
+    data_dir: Path,
+    name: str,
+    hosts: int,
+    vulns_per_host: int,
+    subscriptions: int,
+    kb: int,
+    seed: int = 0,
+) -> DataSet:
+    """Generate Qualys host assets, Azure subscriptions and Qualys KB.
+
+    Data is generated deterministically and written host by host, so large
+    data sets are not built in memory.
+    """
+    random = Random(seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    subscriptions_path = data_dir / "subscriptions.csv"
+    with open(str(subscriptions_path), "w") as csv_file:
+        csv_file.write("id,name,contactName,contactEmail\n")
+        for sub_id in range(subscriptions):
+            csv_file.write(
+                "sub-{0},Subscription {0},Contact {0},contact-{0}@example.org\n".format(
+                    sub_id
+                )
+            )
+
+    kb_path = data_dir / "qualys_kb.csv"
+    with open(str(kb_path), "w") as csv_file:
+        csv_file.write("qid,title,severity_level,vuln_type\n")
+        for qid in range(100, 100 + kb):
+            csv_file.write(
+                "{0},Vulnerability {0},{1},{2}\n".format(
+                    qid, random.randint(1, 5), random.choice(VULN_TYPES)
+                )
+            )
+
+    xml_path = data_dir / "host_assets.xml"
+    with open(str(xml_path), "w") as xml_file:
+        xml_file.write(
+            "<?xml version='1.0' encoding='UTF-8' ?>\n"
+            "<ServiceResponse>\n  <responseCode>SUCCESS</responseCode>\n  <data>"
+        )
+        for host_id in range(1, hosts + 1):
+            vulns = "".join(
+                HOST_ASSET_VULN_XML.format(qid=qid, vuln_id=host_id * 1000 + n)
+                for n, qid in enumerate(
+                    random.sample(range(100, 100 + kb), min(kb, vulns_per_host))
+                )
+            )
+            xml_file.write(
+                HOST_ASSET_XML.format(
+                    host_id=host_id,
+                    sub_id=random.randrange(subscriptions),
+                    vulns=vulns,
+                )
+            )
+        xml_file.write("\n  </data>\n</ServiceResponse>\n")
+
+    return DataSet(
+        name,
+        xml_path,
+        subscriptions_path,
+        kb_path,
+        {
+            "hosts": hosts,
+            "vulns_per_host": min(kb, vulns_per_host),
+            "subscriptions": subscriptions,
+            "kb": kb,
+        },
+    )
+
+
+def make_config(data_set: DataSet, data_dir: Path) -> Dict:
+    """Return app configuration with the example layout and report."""
+    template_dir = data_dir / "templates"
+    template_dir.mkdir(exist_ok=True)
+    (template_dir / "vulns_md.j2").write_text(REPORT_TEMPLATE)
+
+    return {
+        "yager": {
+            "data": {
+                "db_uri": str(data_dir / "sqlite.db"),
+                "exclude_from_refresh": [],
+                "parametrized_lookup": "index",
+                "backup": {"enabled": False},
+                "template_dir": str(template_dir),
+                "template_cache": {"dir": str(data_dir / "template_cache")},
+                "layout": [
+                    {
+                        "name": "AzureSubscriptions",
+                        "columns": "id TEXT PRIMARY KEY, name TEXT, "
+                        "contactName TEXT, contactEmail TEXT",
+                        "data_source": "csv:{}".format(data_set.subscriptions_path),
+                    },
+                    {
+                        "name": "QualysKB",
+                        "columns": "qid INTEGER PRIMARY KEY, title TEXT, "
+                        "severity_level INTEGER, vuln_type TEXT",
+                        "data_source": "csv:{}".format(data_set.kb_path),
+                    },
+                    {
+                        "name": "HostAssets",
+                        "columns": "id INTEGER PRIMARY KEY, name TEXT, fqdn TEXT, "
+                        "os TEXT, firstSeen DATETIME, lastUpdated DATETIME, "
+                        "lastVulnScan DATETIME, azureVmId TEXT, azureRgName TEXT, "
+                        "azurePrivateIp TEXT, azureSubscriptionId TEXT",
+                        "indexes": ["azureSubscriptionId"],
+                        "data_source": "xml:.//HostAsset",
+                        "input_map": {
+                            "id": "id",
+                            "name": "name",
+                            "fqdn": "fqdn",
+                            "os": "os",
+                            "firstSeen": "created",
+                            "lastUpdated": "modified",
+                            "lastVulnScan": "lastVulnScan",
+                            "azureVmId": "./sourceInfo/list/AzureAssetSourceSimple/vmId",  # noqa: E501
+                            "azureRgName": "./sourceInfo/list/AzureAssetSourceSimple/resourceGroupName",  # noqa: E501
+                            "azurePrivateIp": "./sourceInfo/list/AzureAssetSourceSimple/privateIpAddress",  # noqa: E501
+                            "azureSubscriptionId": "./sourceInfo/list/AzureAssetSourceSimple/subscriptionId",  # noqa: E501
+                        },
+                    },
+                    {
+                        "name": "Vulns",
+                        "columns": "id INTEGER PRIMARY KEY, qid INTEGER, "
+                        "firstFound DATETIME, lastFound DATETIME, hostAssetsId INTEGER",
+                        "indexes": ["hostAssetsId", "qid"],
+                        "data_source": "xml:.//HostAssetVuln",
+                        "input_map": {
+                            "id": "hostInstanceVulnId",
+                            "qid": "qid",
+                            "firstFound": "firstFound",
+                            "lastFound": "lastFound",
+                        },
+                        "input_map_parametrized": {
+                            "hostAssetsId": ".//HostAssetVuln/[hostInstanceVulnId='{id}']/.../.../.../id",  # noqa: E501
+                        },
+                    },
+                ],
+            },
+            "reports": [
+                {
+                    "name": "vulns_md",
+                    "template_file": "vulns_md.j2",
+                    "template_params": [
+                        {
+                            "query": "SELECT name FROM AzureSubscriptions "
+                            "WHERE id == '{sub_id}'",
+                            "var_mapping": {"subscription_name": "name"},
+                        },
+                        {
+                            "query": "SELECT HostAssets.name AS host_name, "
+                            "HostAssets.azureVmId AS host_vm_id, "
+                            "Vulns.qid AS vuln_qid, "
+                            "QualysKB.severity_level AS vuln_level "
+                            "FROM HostAssets "
+                            "JOIN Vulns ON Vulns.hostAssetsId = HostAssets.id "
+                            "JOIN QualysKB ON QualysKB.qid = Vulns.qid "
+                            "WHERE HostAssets.azureSubscriptionId == '{sub_id}' "
+                            "AND QualysKB.vuln_type != 'Information Gathered'",
+                            "var_mapping": {
+                                "vulns_by_host": {"group_by": "host_vm_id"}
+                            },
+                        },
+                        {
+                            "query": "SELECT qid, title FROM QualysKB",
+                            "var_mapping": {"kb_by_qid": {"index_by": "qid"}},
+                        },
+                    ],
+                },
+            ],
+        },
+    }
+
+
+def run_app(argv: List[str], config: Dict) -> None:
+    """Run app with arguments and configuration, discarding its output."""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        with YagerTest(argv=argv, config_defaults=config) as app:
+            app.run()
+
+
+def peak_memory(func: Callable[[], None]) -> int:
+    """Return peak size of memory blocks allocated by Python while running func.
+
+    Memory allocated by SQLite itself is not traced, so this tracks the
+    footprint of parsing, buffering and rendering done by the app.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def record_stats(benchmark, rows: int, func: Callable[[], None]) -> None:
+    """Record throughput and peak memory in extra info of benchmark results."""
+    benchmark.extra_info["rows"] = rows
+    benchmark.extra_info["rows_per_second"] = rows / benchmark.stats.stats.mean
+    benchmark.extra_info["peak_memory_bytes"] = peak_memory(func)
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        name
+        for name in os.environ.get("YAGER_BENCHMARK_SIZES", "small,medium").split(",")
+        if name in DATA_SETS
+    ],
+)
+def data_set(request, tmp_path_factory):
+    """Provide synthetic data set and app configuration for it."""
+    data_dir = tmp_path_factory.mktemp("data_{}".format(request.param))
+    data_set = make_data_set(data_dir, request.param, **DATA_SETS[request.param])
+
+    return data_set, make_config(data_set, data_dir)
+
+
+@pytest.fixture(scope="module")
+def loaded_data_set(data_set):
+    """Provide synthetic data set loaded into the database."""
+    data_set_files, config = data_set
+    run_app(["refresh-db", "--file", str(data_set_files.xml_path)], config)
+
+    return data_set
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Module defines benchmarks of the app subcommands."""
+import gzip
+from copy import deepcopy
+from pathlib import Path
+from shutil import copyfileobj
+
+import pytest
+
+from tests.performance.conftest import record_stats, run_app
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_refresh_db(benchmark, data_set, compressed):
+    """Benchmark loading of plain or gzip compressed data sources."""
+    data_set_files, config = data_set
+    xml_path = data_set_files.xml_path
+
+    if compressed:
+        xml_path = xml_path.with_name(xml_path.name + ".gz")
+        if not xml_path.exists():
+            with open(str(data_set_files.xml_path), "rb") as xml_file:
+                with gzip.open(str(xml_path), "wb") as gzip_file:
+                    copyfileobj(xml_file, gzip_file)
+
+    argv = ["refresh-db", "--file", str(xml_path)]
+
+    # a database of its own, so the one loaded for other benchmarks is kept
+    config = deepcopy(config)
+    db_path = Path(config["yager"]["data"]["db_uri"]).with_name("refresh.db")
+    config["yager"]["data"]["db_uri"] = str(db_path)
+
+    def remove_db():
+        for path in db_path.parent.glob(db_path.name + "*"):
+            path.unlink()
+
+    benchmark.pedantic(
+        run_app, args=(argv, config), setup=remove_db, rounds=3, iterations=1
+    )
+
+    remove_db()
+    record_stats(benchmark, data_set_files.rows, lambda: run_app(argv, config))
+
+
+def test_query(benchmark, loaded_data_set):
+    """Benchmark streaming of a whole table as CSV."""
+    data_set_files, config = loaded_data_set
+    argv = ["query", "--output", "csv", "SELECT * FROM Vulns"]
+    rows = data_set_files.sizes["hosts"] * data_set_files.sizes["vulns_per_host"]
+
+    benchmark.pedantic(run_app, args=(argv, config), rounds=5, iterations=1)
+
+    record_stats(benchmark, rows, lambda: run_app(argv, config))
+
+
+def test_report(benchmark, loaded_data_set):
+    """Benchmark rendering of a report for a subscription."""
+    data_set_files, config = loaded_data_set
+    argv = ["report", "vulns_md", "--param", "sub_id=sub-0"]
+    rows = data_set_files.sizes["hosts"] * data_set_files.sizes["vulns_per_host"]
+
+    benchmark.pedantic(run_app, args=(argv, config), rounds=5, iterations=1)
+
+    # rows of vulnerabilities of a single subscription out of all of them
+    record_stats(
+        benchmark,
+        rows // data_set_files.sizes["subscriptions"],
+        lambda: run_app(argv, config),
+    )
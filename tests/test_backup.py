@@ -0,0 +1,55 @@
+"""Module defines database backup test cases."""
+from datetime import timedelta
+from pathlib import Path
+from sqlite3 import connect
+
+from yager.core.backup import backup_db, list_backups, prune_backups, restore_db
+
+
+def test_backup_restore(tmp):
+    """Test backups restore the database, compressed or not."""
+    backup_dir = Path(tmp.dir) / "backups"
+    connection = connect(str(Path(tmp.dir) / "yager.db"))
+    connection.execute("CREATE TABLE Hosts (id INTEGER PRIMARY KEY)")
+    connection.executemany("INSERT INTO Hosts VALUES (?)", [(n,) for n in range(100)])
+    connection.commit()
+
+    plain = backup_db(connection, backup_dir, "yager.db", pages=1)
+    compressed = backup_db(connection, backup_dir, "yager.db", compress=True)
+
+    assert plain.name.endswith(".bak")  # noqa: S101
+    assert compressed.name.endswith(".bak.gz")  # noqa: S101
+    assert list_backups(backup_dir, "yager.db") == [plain, compressed]  # noqa: S101
+    assert not list(backup_dir.glob("*.tmp"))  # noqa: S101
+
+    for backup_path in (plain, compressed):
+        connection.execute("DELETE FROM Hosts")
+        connection.commit()
+
+        restore_db(backup_path, connection)
+
+        assert connection.execute(  # noqa: S101
+            "SELECT count(*) FROM Hosts"
+        ).fetchone() == (100,)
+
+
+def test_prune_backups(tmp):
+    """Test retention policy removes the oldest backups."""
+    backup_dir = Path(tmp.dir)
+    connection = connect(":memory:")
+
+    backups = [backup_db(connection, backup_dir, "yager.db") for _ in range(4)]
+
+    assert (
+        prune_backups(backup_dir, "yager.db", keep_last=2) == backups[:2]  # noqa: S101
+    )
+    assert list_backups(backup_dir, "yager.db") == backups[2:]  # noqa: S101
+
+    assert (
+        prune_backups(backup_dir, "yager.db", max_age=timedelta(days=1))  # noqa: S101
+        == []
+    )
+    assert (
+        prune_backups(backup_dir, "yager.db", max_age=timedelta(days=-1))  # noqa: S101
+        == backups[2:]
+    )
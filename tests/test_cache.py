@@ -0,0 +1,52 @@
+"""Module defines query result cache test cases."""
+from pathlib import Path
+
+from yager.core.cache import CacheStats, ResultCache, database_version
+
+
+def test_result_cache(tmp):
+    """Test results are cached per database version across app runs."""
+    cache_path = Path(tmp.dir) / "sqlite.db.cache"
+    query = "SELECT * FROM HostAssets WHERE id == {}"
+
+    cache = ResultCache(cache_path, "v1")
+    assert cache.get(query.format(1), {"id": "1"}) is None  # noqa: S101
+
+    cache.put(query.format(1), {"id": "1"}, ["id"], [(1,)])
+    cache.close()
+
+    cache = ResultCache(cache_path, "v1")
+    assert cache.get(query.format(1), {"id": "1"}) == (["id"], [(1,)])  # noqa: S101
+    assert cache.get(query.format(2), {"id": "2"}) is None  # noqa: S101
+    assert cache.stats() == CacheStats(hits=1, misses=2)  # noqa: S101
+    cache.close()
+
+    cache = ResultCache(cache_path, "v2")
+    assert cache.get(query.format(1), {"id": "1"}) is None  # noqa: S101
+    cache.close()
+
+
+def test_result_cache_eviction(tmp):
+    """Test the least recently used results are evicted over size limit."""
+    cache = ResultCache(Path(tmp.dir) / "sqlite.db.cache", "v1", max_size=40000)
+    rows = [(n, "host-{}".format(n)) for n in range(1000)]
+
+    cache.put("SELECT 1", {}, ["id", "name"], rows)
+    cache.put("SELECT 2", {}, ["id", "name"], rows)
+    cache.get("SELECT 1", {})
+    cache.put("SELECT 3", {}, ["id", "name"], rows)
+
+    assert cache.get("SELECT 1", {}) is not None  # noqa: S101
+    assert cache.get("SELECT 2", {}) is None  # noqa: S101
+    assert cache.get("SELECT 3", {}) is not None  # noqa: S101
+
+
+def test_database_version(tmp):
+    """Test database version changes with the database file."""
+    db_path = Path(tmp.dir) / "sqlite.db"
+    db_path.write_bytes(b"1")
+    version = database_version(db_path)
+
+    db_path.write_bytes(b"12")
+
+    assert database_version(db_path) != version  # noqa: S101
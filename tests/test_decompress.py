@@ -0,0 +1,51 @@
+"""Module defines input file decompression test cases."""
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+
+import pytest
+
+from yager.core.decompress import ThreadedReader, detect_compression, open_input
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+    None: bytes,
+}
+
+
+@pytest.mark.parametrize("compression", list(COMPRESSORS))
+def test_open_input(tmp, compression):
+    """Test compressed files are detected and decompressed in both modes."""
+    data = "".join("line {}, ĉu\r\n".format(n) for n in range(10000)).encode("utf-8")
+    path = Path(tmp.dir) / "input.dat"
+    path.write_bytes(COMPRESSORS[compression](data))
+
+    assert detect_compression(path) == compression  # noqa: S101
+
+    with open_input(path, chunk_size=1000, buffer_chunks=2) as input_file:
+        assert input_file.read() == data  # noqa: S101
+
+    with open_input(path, "r", encoding="utf-8", newline="") as input_file:
+        assert input_file.readlines()[-1] == "line 9999, ĉu\r\n"  # noqa: S101
+
+
+def test_threaded_reader(tmp):
+    """Test errors of the source are raised and closing stops the thread."""
+    path = Path(tmp.dir) / "input.gz"
+    path.write_bytes(gzip.compress(b"x" * 100000)[:-100])
+
+    reader = ThreadedReader(gzip.open(str(path)), chunk_size=10000)
+    with pytest.raises(EOFError):
+        while reader.read(1000):
+            pass
+    reader.close()
+
+    reader = ThreadedReader(open(str(path), "rb"), chunk_size=1, buffer_chunks=1)
+    assert reader.read(10) == b"\x1f"  # noqa: S101
+    reader.close()
+
+    assert not reader._thread.is_alive()  # noqa: S101
+    assert reader.source.closed  # noqa: S101
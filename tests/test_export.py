@@ -0,0 +1,70 @@
+"""Module defines data export test cases."""
+import gzip
+from pathlib import Path
+from sqlite3 import OperationalError, connect
+
+import pytest
+
+from yager.core.export import export_query
+
+
+@pytest.fixture
+def db_cursor():
+    """Provide in-memory database with a table of five rows."""
+    connection = connect(":memory:")
+    connection.execute("CREATE TABLE Hosts (id INTEGER, name TEXT)")
+    connection.executemany(
+        "INSERT INTO Hosts VALUES (?, ?)",
+        [(host_id, "host-{}".format(host_id)) for host_id in range(5)],
+    )
+
+    yield connection.cursor()
+
+    connection.close()
+
+
+def test_export_query(db_cursor, tmp):
+    """Test exported rows are split into files with repeated header."""
+    path = Path(tmp.dir) / "Hosts.csv"
+
+    output = export_query(db_cursor, "SELECT * FROM Hosts", path, max_rows=2)
+    assert output.row_count == 5  # noqa: S101
+    assert [  # noqa: S101
+        part_path.read_text().splitlines() for part_path in output.paths
+    ] == [
+        ["id,name", "0,host-0", "1,host-1"],
+        ["id,name", "2,host-2", "3,host-3"],
+        ["id,name", "4,host-4"],
+    ]
+    assert output.paths[0].name == "Hosts.0001.csv"  # noqa: S101
+
+    # each line of JSON Lines output is 28 bytes long
+    output = export_query(
+        db_cursor,
+        "SELECT * FROM Hosts",
+        path.with_suffix(".jsonl"),
+        "jsonl",
+        max_bytes=60,
+        compress=True,
+    )
+    assert [part_path.name for part_path in output.paths] == [  # noqa: S101
+        "Hosts.0001.jsonl.gz",
+        "Hosts.0002.jsonl.gz",
+        "Hosts.0003.jsonl.gz",
+    ]
+    with gzip.open(str(output.paths[0]), "rt") as part_file:
+        assert part_file.read() == (  # noqa: S101
+            '{"id": 0, "name": "host-0"}\n{"id": 1, "name": "host-1"}\n'
+        )
+
+    output = export_query(db_cursor, "SELECT * FROM Hosts WHERE id > 9", path)
+    assert output.paths == [path]  # noqa: S101
+    assert path.read_text() == "id,name\n"  # noqa: S101
+
+
+def test_export_query_error(db_cursor, tmp):
+    """Test no files are left after a failed export."""
+    with pytest.raises(OperationalError):
+        export_query(db_cursor, "SELECT * FROM Missing", Path(tmp.dir) / "Missing.csv")
+
+    assert list(Path(tmp.dir).iterdir()) == []  # noqa: S101
@@ -0,0 +1,329 @@
+"""Module defines data ingestion test cases."""
+from io import StringIO
+from pathlib import Path
+from xml.etree.ElementTree import fromstring  # noqa: S405
+
+import pytest
+
+from tests.conftest import HOST_ASSET_XML, make_qualys_xml
+
+from yager.core.exc import YagerError
+from yager.core.ingest import (
+    CsvRows,
+    ExtractionPlan,
+    LookupIndex,
+    column_affinity,
+    compile_path_matcher,
+    compile_plans,
+    extract_row,
+    iter_xml_rows,
+    iter_xml_stream,
+    iter_xml_tree,
+)
+
+VULNS_DATA_SOURCES = {"Vulns": ".//HostAssetVuln"}
+VULNS_INPUT_MAP = {"id": "hostInstanceVulnId", "qid": "qid"}
+VULNS_INPUT_MAP_PARAMETRIZED = {
+    "hostAssetsId": ".//HostAssetVuln/[hostInstanceVulnId='{id}']/.../.../.../id",
+}
+
+
+@pytest.mark.parametrize(
+    "xpath,tag_path,expected",
+    [
+        (".//HostAsset", ["ServiceResponse", "data", "HostAsset"], True),
+        (".//HostAsset", ["HostAsset"], False),
+        ("./data/HostAsset", ["ServiceResponse", "data", "HostAsset"], True),
+        ("./data/*", ["ServiceResponse", "data", "HostAsset"], True),
+        ("./HostAsset", ["ServiceResponse", "data", "HostAsset"], False),
+        ("data//id", ["ServiceResponse", "data", "HostAsset", "id"], True),
+        (".//vuln/list", ["ServiceResponse", "data", "vuln", "list", "x"], False),
+    ],
+)
+def test_compile_path_matcher(xpath, tag_path, expected):
+    """Test matching tag paths against XPath."""
+    assert compile_path_matcher(xpath)(tag_path) is expected  # noqa: S101
+
+
+@pytest.mark.parametrize("xpath", ["/data", ".//a[@b='c']", ".//a/..", ".//"])
+def test_compile_path_matcher_unsupported(xpath):
+    """Test rejection of XPath not supported by the streaming parser."""
+    with pytest.raises(YagerError):
+        compile_path_matcher(xpath)
+
+
+def test_iter_xml_stream_matches_tree(xml_file):
+    """Test streaming and tree parsers return the same elements for each table."""
+    data_sources = {"HostAssets": ".//HostAsset", "Vulns": ".//HostAssetVuln"}
+    results = {}
+
+    for iter_xml in (iter_xml_tree, iter_xml_stream):
+        results[iter_xml] = {table_name: [] for table_name in data_sources}
+
+        for table_name, element, _ in iter_xml(xml_file, data_sources):
+            results[iter_xml][table_name].append(element.findtext("./*"))
+
+    assert results[iter_xml_stream] == results[iter_xml_tree]  # noqa: S101
+    assert len(results[iter_xml_tree]["HostAssets"]) == 3  # noqa: S101
+    assert len(results[iter_xml_tree]["Vulns"]) == 6  # noqa: S101
+
+
+@pytest.mark.parametrize("data_source", [".//HostAsset", ".//HostAssetVuln"])
+def test_iter_xml_stream_frees_elements(tmp, data_source):
+    """Test streaming parser detaches processed elements from the document."""
+    # hosts without vulnerabilities followed by ones with them
+    xml_path = Path(tmp.dir) / "large.xml"
+    xml_path.write_text(
+        make_qualys_xml(hosts=100, vulns_per_host=1, first_host_id=2001).replace(
+            "<data>",
+            "<data>"
+            + "".join(
+                HOST_ASSET_XML.format(host_id=host_id, sub_id=0, vulns="")
+                for host_id in range(1, 2001)
+            ),
+        )
+    )
+    plan = ExtractionPlan(VULNS_INPUT_MAP, VULNS_INPUT_MAP_PARAMETRIZED)
+
+    rows = []
+    max_in_memory = 0
+    for _, element, xml_root in iter_xml_stream(
+        str(xml_path), {"t": data_source}, retained_tags=plan.lookup_tags
+    ):
+        max_in_memory = max(max_in_memory, len(xml_root.find("data")))
+        if element.tag == "HostAssetVuln":
+            rows.append(plan.extract(element, xml_root))
+
+    assert 0 < max_in_memory < 200  # noqa: S101
+    assert list(xml_root.iter()) == [xml_root]  # noqa: S101
+    assert len(rows) == (100 if data_source == ".//HostAssetVuln" else 0)  # noqa: S101
+    assert all(row[0] == row[2] + "000" for row in rows)  # noqa: S101
+
+
+def test_extract_row_parametrized(xml_file):
+    """Test parametrized lookups resolve against the document in both parsers."""
+    for xml_data in (
+        iter_xml_tree(xml_file, VULNS_DATA_SOURCES),
+        iter_xml_stream(xml_file, VULNS_DATA_SOURCES),
+    ):
+        rows = [
+            extract_row(element, root, VULNS_INPUT_MAP, VULNS_INPUT_MAP_PARAMETRIZED)
+            for _, element, root in xml_data
+        ]
+
+        assert rows[0] == {  # noqa: S101
+            "id": "1000",
+            "qid": "100",
+            "hostAssetsId": "1",
+        }
+        assert rows[-1]["hostAssetsId"] == "3"  # noqa: S101
+
+
+def test_extract_row_undefined():
+    """Test missing sub-elements are mapped to 'undefined' value."""
+    element = fromstring("<HostAsset><id>1</id></HostAsset>")  # noqa: S314
+
+    row = extract_row(element, element, {"id": "id", "name": "name"}, {})
+
+    assert row == {"id": "1", "name": "undefined"}  # noqa: S101
+
+
+@pytest.mark.parametrize("iter_xml", [iter_xml_tree, iter_xml_stream])
+def test_lookup_index(xml_file, iter_xml):
+    """Test indexed parametrized lookups match XPath ones."""
+    lookup_index = LookupIndex(VULNS_INPUT_MAP_PARAMETRIZED)
+
+    rows = [
+        extract_row(
+            element, root, VULNS_INPUT_MAP, VULNS_INPUT_MAP_PARAMETRIZED, lookup_index
+        )
+        for _, element, root in iter_xml(
+            xml_file, VULNS_DATA_SOURCES, {"Vulns": lookup_index}
+        )
+    ]
+    expected = [
+        extract_row(element, root, VULNS_INPUT_MAP, VULNS_INPUT_MAP_PARAMETRIZED)
+        for _, element, root in iter_xml_tree(xml_file, VULNS_DATA_SOURCES)
+    ]
+
+    assert "hostAssetsId" in lookup_index  # noqa: S101
+    assert rows == expected  # noqa: S101
+
+
+def test_lookup_index_fallback():
+    """Test parametrized XPath not matching index pattern is not indexed."""
+    element = fromstring(  # noqa: S314
+        "<r><a><id>1</id><b>x</b></a><a><id>2</id><b>y</b></a></r>"
+    )
+    input_map_parametrized = {
+        "b": ".//a/[id='{id}']/b",
+        "c": "./a[id='{id}']/b",
+        "parent": ".//a/[id='{id}']/../../id",
+    }
+    lookup_index = LookupIndex(input_map_parametrized)
+    lookup_index.build(element)
+
+    row = extract_row(
+        element, element, {"id": "./a/id"}, input_map_parametrized, lookup_index
+    )
+
+    assert "c" not in lookup_index  # noqa: S101
+    assert row == {  # noqa: S101
+        "id": "1",
+        "b": "x",
+        "c": "x",
+        "parent": "undefined",
+    }
+
+
+def test_extraction_plan():
+    """Test compiled input maps resolve paths the same way as element.find()."""
+    element = fromstring(  # noqa: S314
+        "<h><id>1</id><s><l><a><x>2</x></a><a><x>3</x><y>4</y></a></l></s>"
+        "<v><q>5</q></v><v><q>6</q></v></h>"
+    )
+    input_map = {
+        "self": ".",
+        "id": "id",
+        "x": "./s/l/a/x",
+        "y": "./s/l/a/y",
+        "z": "./s/l/a/z",
+        "q": "./v[2]/q",
+        "any": ".//q",
+    }
+    input_map_parametrized = {
+        "qid": "./v[q='{q}']/q",
+        "key": ".//a/[y='{y}']/x",
+        "format": "./v[q='{qid!s:>1}']/q",
+    }
+
+    values = ExtractionPlan(input_map, input_map_parametrized).extract(element, element)
+    expected = [
+        element.find(xpath).text if element.find(xpath) is not None else "undefined"
+        for xpath in input_map.values()
+    ] + ["6", "3", "6"]
+
+    assert values == expected  # noqa: S101
+
+
+@pytest.mark.parametrize("xml_parser", ["tree", "stream"])
+def test_iter_xml_rows_reused_plans(tmp, xml_parser):
+    """Test plans reused for multiple files do not keep indexed values."""
+    xml_tables = {
+        "Vulns": {
+            "data_source": "xml:.//HostAssetVuln",
+            "input_map": VULNS_INPUT_MAP,
+            "input_map_parametrized": VULNS_INPUT_MAP_PARAMETRIZED,
+        }
+    }
+    file_paths = []
+    for host_id in ("1", "7"):
+        # same vulnerability IDs under a different host in each file
+        xml_path = Path(tmp.dir) / "host_{}.xml".format(host_id)
+        xml_path.write_text(
+            make_qualys_xml(hosts=1, vulns_per_host=2).replace(
+                "<id>1</id>", "<id>{}</id>".format(host_id)
+            )
+        )
+        file_paths.append(str(xml_path))
+
+    plans = compile_plans(xml_tables, "index")
+
+    rows = [
+        row
+        for file_path in file_paths
+        for _, row in iter_xml_rows(
+            file_path, xml_tables, xml_parser, "index", plans=plans
+        )
+    ]
+
+    assert rows == [  # noqa: S101
+        ("1000", "100", "1"),
+        ("1001", "101", "1"),
+        ("1000", "100", "7"),
+        ("1001", "101", "7"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "input_map,input_map_parametrized",
+    [
+        ({"id": "id"}, {"parent": ".//a/[id='{key}']/../id"}),
+        ({"id": "id"}, {"a": "./a[id='{b}']", "b": "./b"}),
+        ({"id": "./a[id='1'"}, {}),
+        ({"id": ""}, {}),
+        ({}, {}),
+    ],
+)
+def test_compile_plans_invalid(input_map, input_map_parametrized):
+    """Test invalid input maps are reported before extraction."""
+    xml_tables = {
+        "t": {
+            "data_source": "xml:.//a",
+            "input_map": input_map,
+            "input_map_parametrized": input_map_parametrized,
+        }
+    }
+
+    for parametrized_lookup in ("xpath", "index"):
+        with pytest.raises(YagerError, match="table 't'|Table 't'"):
+            compile_plans(xml_tables, parametrized_lookup)
+
+
+@pytest.mark.parametrize(
+    "declared_type,affinity",
+    [
+        ("INTEGER", "integer"),
+        ("BIGINT", "integer"),
+        ("VARCHAR(255)", "text"),
+        ("", "blob"),
+        ("DOUBLE PRECISION", "real"),
+        ("DATETIME", "numeric"),
+        ("BOOLEAN", "numeric"),
+    ],
+)
+def test_column_affinity(declared_type, affinity):
+    """Test SQLite type affinity rules."""
+    assert column_affinity(declared_type) == affinity  # noqa: S101
+
+
+def test_csv_rows():
+    """Test CSV header is mapped to table columns and values are converted."""
+    csv_file = StringIO(
+        "ID,name,unknown,score,level,found,flag\n"
+        "1,a,x,1.5,3.0,2020-01-01,true\n"
+        "\n"
+        "2,,y,n/a,,,0\n"
+        "3\n"
+    )
+    column_types = {
+        "id": "INTEGER",
+        "name": "TEXT",
+        "score": "REAL",
+        "level": "INT",
+        "found": "DATETIME",
+        "flag": "BOOLEAN",
+    }
+
+    csv_rows = CsvRows(csv_file, column_types, {"flag": "boolean"})
+
+    assert csv_rows.columns == [  # noqa: S101
+        "id",
+        "name",
+        "score",
+        "level",
+        "found",
+        "flag",
+    ]
+    assert csv_rows.skipped == ["unknown"]  # noqa: S101
+    assert list(csv_rows) == [  # noqa: S101
+        [1, "a", 1.5, 3, "2020-01-01", 1],
+        [2, "", "n/a", None, None, 0],
+        [3, None, None, None, None, None],
+    ]
+
+
+def test_csv_rows_unknown_converter():
+    """Test unknown converters are rejected."""
+    with pytest.raises(YagerError):
+        CsvRows(StringIO("id\n1\n"), {"id": "INTEGER"}, {"id": "date"})
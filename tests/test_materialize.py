@@ -0,0 +1,97 @@
+"""Module defines materialized summary tables test cases."""
+from sqlite3 import OperationalError, connect
+
+import pytest
+
+from yager.core.exc import YagerError
+from yager.core.materialize import (
+    modified_tables,
+    rebuild_table,
+    stale_tables,
+    track_changes,
+    untrack_changes,
+)
+
+MATERIALIZED = [
+    {"name": "VulnsByHost", "query": "SELECT 1", "depends_on": ["Vulns"]},
+    {"name": "Subs", "query": "SELECT 1", "depends_on": ["AzureSubscriptions"]},
+    {"name": "HostsBySub", "query": "SELECT 1", "depends_on": ["VulnsByHost"]},
+    {"name": "Everything", "query": "SELECT 1"},
+]
+
+
+@pytest.mark.parametrize(
+    "changed_tables,existing_tables,expected",
+    [
+        (None, {"VulnsByHost", "Subs", "HostsBySub", "Everything"}, [0, 1, 2, 3]),
+        (set(), {"VulnsByHost", "Subs", "HostsBySub", "Everything"}, []),
+        (set(), {"VulnsByHost", "HostsBySub", "Everything"}, [1, 3]),
+        ({"Vulns"}, {"VulnsByHost", "Subs", "HostsBySub", "Everything"}, [0, 2, 3]),
+    ],
+)
+def test_stale_tables(changed_tables, existing_tables, expected):
+    """Test tables are stale if missing or built from changed tables."""
+    stale = stale_tables(MATERIALIZED, changed_tables, existing_tables)
+
+    assert stale == [MATERIALIZED[n] for n in expected]  # noqa: S101
+
+
+def test_stale_tables_invalid():
+    """Test tables without query are rejected."""
+    with pytest.raises(YagerError):
+        stale_tables([{"name": "Summary"}], None, set())
+
+
+def test_rebuild_table():
+    """Test table is replaced with query result or kept if the query fails."""
+    cursor = connect(":memory:").cursor()
+    cursor.execute("CREATE TABLE t (level INTEGER)")
+    cursor.executemany("INSERT INTO t VALUES (?)", [(5,), (5,), (3,)])
+    query = "SELECT level, COUNT(*) AS n FROM t GROUP BY level;"
+
+    assert rebuild_table(cursor, "summary", query) == 2  # noqa: S101
+    assert (
+        rebuild_table(  # noqa: S101
+            cursor, "summary", query, "level INTEGER PRIMARY KEY, n INTEGER"
+        )
+        == 2
+    )
+
+    with pytest.raises(OperationalError):
+        rebuild_table(cursor, "summary", "SELECT missing FROM t")
+
+    assert cursor.execute(  # noqa: S101
+        "SELECT * FROM summary ORDER BY level"
+    ).fetchall() == [(3, 1), (5, 2)]
+    assert (
+        "PRIMARY KEY"
+        in cursor.execute(  # noqa: S101
+            "SELECT sql FROM sqlite_master WHERE name == 'summary'"
+        ).fetchone()[0]
+    )
+
+
+def test_track_changes():
+    """Test changes of tables used by materialized tables are recorded."""
+    cursor = connect(":memory:").cursor()
+    for table_name in ("Vulns", "AzureSubscriptions", "QualysKB"):
+        cursor.execute("CREATE TABLE {} (id INTEGER)".format(table_name))
+
+    assert modified_tables(cursor) == set()  # noqa: S101
+
+    track_changes(cursor, MATERIALIZED[:3])
+    cursor.execute("INSERT INTO Vulns VALUES (1)")
+    cursor.execute("INSERT INTO AzureSubscriptions VALUES (2)")
+    cursor.execute("INSERT INTO QualysKB VALUES (3)")
+
+    assert modified_tables(cursor) == {"Vulns", "AzureSubscriptions"}  # noqa: S101
+
+    track_changes(cursor, MATERIALIZED)
+    assert modified_tables(cursor) == set()  # noqa: S101
+
+    cursor.execute("INSERT INTO QualysKB VALUES (1)")
+    assert modified_tables(cursor) == {"QualysKB"}  # noqa: S101
+
+    untrack_changes(cursor)
+    cursor.execute("DROP TABLE yager_changes")
+    cursor.execute("INSERT INTO QualysKB VALUES (1)")
@@ -0,0 +1,37 @@
+"""Module defines performance metrics test cases."""
+import json
+from pathlib import Path
+
+from yager.core.metrics import Metrics
+
+
+def test_metrics(tmp):
+    """Test phases are timed and rows are counted only once enabled."""
+    metrics = Metrics()
+
+    with metrics.phase("disabled"):
+        metrics.add_rows("disabled", 1)
+    assert list(metrics.iterate("disabled", iter([1, 2]))) == [1, 2]  # noqa: S101
+    assert metrics.phases == {}  # noqa: S101
+
+    metrics.start()
+
+    with metrics.phase("load", rows=2):
+        metrics.add_rows("load", 3)
+    with metrics.phase("load"):
+        pass
+    assert list(metrics.iterate("parse", iter([1, 2]))) == [1, 2]  # noqa: S101
+
+    metrics.stop()
+
+    assert metrics.phases["load"].calls == 2  # noqa: S101
+    assert metrics.phases["load"].rows == 5  # noqa: S101
+    assert metrics.phases["parse"].calls == 3  # noqa: S101
+    assert "load" in metrics.summary()  # noqa: S101
+
+    path = Path(tmp.dir) / "metrics.json"
+    metrics.write(path)
+    recorded = json.loads(path.read_text())
+    assert list(recorded["phases"]) == ["load", "parse"]  # noqa: S101
+    assert recorded["phases"]["load"]["rows"] == 5  # noqa: S101
+    assert recorded["wall_seconds"] == metrics.to_dict()["wall_seconds"]  # noqa: S101
@@ -0,0 +1,69 @@
+"""Module defines query output test cases."""
+from io import StringIO
+from sqlite3 import connect
+
+import pytest
+
+from yager.core.output import write_result, write_table
+
+
+@pytest.fixture
+def db_connection():
+    """Provide in-memory database with a table of three rows."""
+    connection = connect(":memory:")
+    connection.execute("CREATE TABLE Hosts (id INTEGER, name TEXT, data BLOB)")
+    connection.executemany(
+        "INSERT INTO Hosts VALUES (?, ?, ?)",
+        [(1, "host-1", b"\x01"), (2, 'host "2"', None), (3, "host\t3", None)],
+    )
+
+    yield connection
+
+    connection.close()
+
+
+@pytest.mark.parametrize(
+    "out_format,expected",
+    [
+        ("csv", 'id,name,data\n1,host-1,b\'\\x01\'\n2,"host ""2""",\n3,host\t3,\n',),
+        (
+            "tsv",
+            'id\tname\tdata\n1\thost-1\tb\'\\x01\'\n2\t"host ""2"""\t\n'
+            '3\t"host\t3"\t\n',
+        ),
+        (
+            "jsonl",
+            '{"id": 1, "name": "host-1", "data": "01"}\n'
+            '{"id": 2, "name": "host \\"2\\"", "data": null}\n'
+            '{"id": 3, "name": "host\\t3", "data": null}\n',
+        ),
+    ],
+)
+def test_write_result(db_connection, out_format, expected):
+    """Test query results are streamed in row based formats."""
+    output = StringIO()
+
+    assert (
+        write_result(  # noqa: S101
+            db_connection.execute("SELECT * FROM Hosts ORDER BY id"),
+            output,
+            out_format,
+            chunk_size=2,
+        )
+        == 3
+    )
+    assert output.getvalue() == expected  # noqa: S101
+
+
+def test_write_table(db_connection):
+    """Test table output is limited to the first rows."""
+    for limit, expected_ids, truncated in ((2, "12", True), (3, "123", False)):
+        output = StringIO()
+
+        assert (
+            write_table(  # noqa: S101
+                db_connection.execute("SELECT id FROM Hosts ORDER BY id"), output, limit
+            )
+            is truncated
+        )
+        assert "".join(output.getvalue().split()[2:]) == expected_ids  # noqa: S101
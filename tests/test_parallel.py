@@ -0,0 +1,57 @@
+"""Module defines parallel data ingestion test cases."""
+from pathlib import Path
+
+import pytest
+
+from yager.core.exc import YagerError
+from yager.core.ingest import iter_xml_rows
+from yager.core.parallel import iter_xml_batches
+from tests.conftest import make_qualys_xml
+
+XML_TABLES = {
+    "HostAssets": {
+        "data_source": "xml:.//HostAsset",
+        "input_map": {"id": "id", "name": "name"},
+        "batch_size": 2,
+    },
+}
+
+
+def test_iter_xml_batches_order(tmp, xml_file):
+    """Test batches from parallel workers are returned in sequential order."""
+    file_paths = [xml_file] * 5
+
+    batches = list(iter_xml_batches(file_paths, XML_TABLES, jobs=3))
+    rows = [
+        (file_path, table_name, row)
+        for file_path, table_name, batch in batches
+        for row in batch
+    ]
+
+    assert rows == [  # noqa: S101
+        (file_path, table_name, row)
+        for file_path in file_paths
+        for table_name, row in iter_xml_rows(file_path, XML_TABLES)
+    ]
+
+
+def test_iter_xml_batches_error(tmp, xml_file):
+    """Test failure to parse a file is reported."""
+    broken_path = Path(tmp.dir) / "broken.xml"
+    broken_path.write_text("<ServiceResponse><data>")
+
+    with pytest.raises(YagerError, match="broken.xml"):
+        list(iter_xml_batches([xml_file, str(broken_path)], XML_TABLES, jobs=2))
+
+
+def test_iter_xml_batches_close(tmp):
+    """Test workers are stopped when batches are no longer consumed."""
+    xml_path = Path(tmp.dir) / "hosts.xml"
+    xml_path.write_text(make_qualys_xml(hosts=500, vulns_per_host=0))
+
+    batches = iter_xml_batches([str(xml_path)] * 6, XML_TABLES, jobs=2)
+    file_path, table_name, batch = next(batches)
+    batches.close()
+
+    assert (file_path, table_name) == (str(xml_path), "HostAssets")  # noqa: S101
+    assert next(batches, None) is None  # noqa: S101
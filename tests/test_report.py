@@ -0,0 +1,187 @@
+"""Module defines report rendering test cases."""
+import os
+from pathlib import Path
+from sqlite3 import connect
+
+from jinja2 import Environment, Template
+
+import pytest
+
+from yager.core import report
+from yager.core.exc import YagerError
+from yager.core.report import (
+    ReportRenderer,
+    RowSet,
+    get_environment,
+    iter_param_sets,
+    load_template,
+    map_template_data,
+    output_file_name,
+)
+
+
+def test_iter_param_sets(csv_file):
+    """Test parameter sets are read from CSV files and lists."""
+    assert [  # noqa: S101
+        param_set["id"] for param_set in iter_param_sets("csv:" + csv_file, None)
+    ] == ["sub-0", "sub-1"]
+    assert list(iter_param_sets("list:sub_id=sub-0,sub-1", None)) == [  # noqa: S101
+        {"sub_id": "sub-0"},
+        {"sub_id": "sub-1"},
+    ]
+
+    with pytest.raises(YagerError):
+        list(iter_param_sets("json:sub_ids.json", None))
+
+
+def test_output_file_name():
+    """Test output file names are made of report name and parameters."""
+    report_config = {"name": "single_sub", "template_file": "single_sub.md.j2"}
+
+    assert (
+        output_file_name(  # noqa: S101
+            None, report_config, {"sub_id": "a/b", "month": "2020-06"}
+        )
+        == "single_sub_a_b_2020-06.md"
+    )
+    assert (
+        output_file_name(  # noqa: S101
+            "{sub_id}.txt", report_config, {"sub_id": "sub-1"}
+        )
+        == "sub-1.txt"
+    )
+
+    for template_file, output_extension, extension in (
+        ("sub/report.html.j2", None, ".html"),
+        ("report.j2", None, ""),
+        ("vulns_by_host.j2", None, ""),
+        ("summary_v2.j2", None, ""),
+        ("report_single_sub_md.j2", "md", ".md"),
+        ("report.txt.j2", ".md", ".md"),
+    ):
+        assert (
+            output_file_name(  # noqa: S101
+                None,
+                {
+                    "name": "single_sub",
+                    "template_file": template_file,
+                    "output_extension": output_extension,
+                },
+                {"sub_id": "sub-1"},
+            )
+            == "single_sub_sub-1" + extension
+        )
+
+
+def test_report_renderer_shares_results():
+    """Test results of queries without parameters are fetched once."""
+    fetched = []
+
+    def fetch(queries):
+        fetched.extend(sql_query for sql_query, _ in queries)
+
+        return [(["value"], [(sql_query,)]) for sql_query, _ in queries]
+
+    renderer = ReportRenderer(
+        Template("{{ kb }} {{ sub }}"),
+        [
+            {"query": "SELECT kb", "var_mapping": {"kb": "value"}},
+            {"query": "SELECT {sub_id}", "var_mapping": {"sub": "value"}},
+        ],
+        fetch,
+    )
+
+    assert renderer.render({"sub_id": "1"}) == "SELECT kb SELECT 1"  # noqa: S101
+    assert renderer.render({"sub_id": "2"}) == "SELECT kb SELECT 2"  # noqa: S101
+    assert fetched == ["SELECT kb", "SELECT 1", "SELECT 2"]  # noqa: S101
+
+
+def test_row_set():
+    """Test rows are fetched lazily each time they are iterated over."""
+    db_connection = connect(":memory:")
+    db_connection.execute("CREATE TABLE Hosts (id INTEGER, name TEXT)")
+    db_connection.executemany(
+        "INSERT INTO Hosts VALUES (?, ?)", [(n, "host-{}".format(n)) for n in range(5)]
+    )
+
+    rows = RowSet("SELECT * FROM Hosts -- all hosts;", db_connection, chunk_size=2)
+
+    assert len(rows) == 5  # noqa: S101
+    assert list(rows) == list(rows)  # noqa: S101
+    assert list(rows)[4] == {"id": 4, "name": "host-4"}  # noqa: S101
+
+    template = Template(
+        "{{ hosts | count }}: {% for h in hosts %}{{ h.name }} {% endfor %}"
+    )
+    renderer = ReportRenderer(
+        template,
+        [{"query": "SELECT * FROM Hosts WHERE id < 2", "var_mapping": {"hosts": "*"}}],
+        lambda queries: [],
+        lambda sql_query: RowSet(sql_query, db_connection),
+    )
+
+    assert renderer.render({}) == "2: host-0 host-1 "  # noqa: S101
+
+
+def test_map_template_data():
+    """Test rows are mapped to template variables as lists, indexes and groups."""
+    results = [
+        (["host", "qid"], [("host-1", 100), ("host-2", 100), ("host-1", 101)]),
+    ]
+    var_mapping = {
+        "first_host": "host",
+        "all_vulns": "*",
+        "vuln_by_qid": {"index_by": "qid"},
+        "vulns_by_host": {"group_by": "host"},
+    }
+
+    data = map_template_data([{"var_mapping": var_mapping}], results)
+
+    assert data["first_host"] == "host-1"  # noqa: S101
+    assert len(data["all_vulns"]) == 3  # noqa: S101
+    assert data["vuln_by_qid"] == {  # noqa: S101
+        100: {"host": "host-1", "qid": 100},
+        101: {"host": "host-1", "qid": 101},
+    }
+    assert data["vulns_by_host"] == {  # noqa: S101
+        "host-1": [{"host": "host-1", "qid": 100}, {"host": "host-1", "qid": 101}],
+        "host-2": [{"host": "host-2", "qid": 100}],
+    }
+
+    with pytest.raises(YagerError):
+        map_template_data([{"var_mapping": {"vulns": {"sort_by": "qid"}}}], results)
+
+
+def test_load_template(tmp, monkeypatch):
+    """Test compiled templates are shared and cached on disk until changed."""
+    template_path = Path(tmp.dir) / "report.j2"
+    template_path.write_text("{{ 1 + 1 }}")
+    cache_dir = str(Path(tmp.dir) / "cache")
+
+    assert (
+        load_template(tmp.dir, "report.j2", True, cache_dir).render() == "2"
+    )  # noqa: S101,E501
+    assert get_environment(tmp.dir, True, cache_dir) is get_environment(  # noqa: S101
+        tmp.dir, True, cache_dir
+    )
+    assert len(list(Path(cache_dir).iterdir())) == 1  # noqa: S101
+
+    def compile_template(*args, **kwargs):
+        raise AssertionError("template compiled")
+
+    # a new process loads compiled template from disk
+    monkeypatch.setattr(report, "_environments", {})
+    monkeypatch.setattr(Environment, "compile", compile_template)
+
+    assert (
+        load_template(tmp.dir, "report.j2", True, cache_dir).render() == "2"
+    )  # noqa: S101,E501
+
+    # a changed template is compiled again
+    monkeypatch.undo()
+    template_path.write_text("{{ 2 + 2 }}")
+    os.utime(str(template_path), (0, 0))
+
+    assert (
+        load_template(tmp.dir, "report.j2", True, cache_dir).render() == "4"
+    )  # noqa: S101,E501
@@ -0,0 +1,33 @@
+"""Module defines database writer test cases."""
+from sqlite3 import connect
+
+from yager.core.writer import TableWriter
+
+
+def test_table_writer():
+    """Test rows are inserted in batches with bound parameters."""
+    cursor = connect(":memory:").cursor()
+    cursor.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+
+    writer = TableWriter(cursor, "t", ["id", "name"], batch_size=2)
+    writer.write([1, "O'Neil"])
+    writer.write_dict({"name": "Doe", "id": 2})
+    writer.write([1, "duplicate"])
+
+    assert cursor.execute("SELECT count(*) FROM t").fetchone()[0] == 2  # noqa: S101
+    assert writer.close() == 3  # noqa: S101
+    assert cursor.execute("SELECT * FROM t").fetchall() == [  # noqa: S101
+        (1, "O'Neil"),
+        (2, "Doe"),
+    ]
+
+
+def test_table_writer_error():
+    """Test failed batches are skipped."""
+    cursor = connect(":memory:").cursor()
+    cursor.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+    writer = TableWriter(cursor, "t", ["id", "missing"])
+    writer.write([1, 2])
+
+    assert writer.close() == 0  # noqa: S101
@@ -1,4 +1,20 @@
 """Module defines app test cases."""
+import gzip
+import json
+import subprocess  # noqa: S404
+import sys
+from itertools import product
+from pathlib import Path
+from pstats import Stats
+from sqlite3 import OperationalError, connect
+from time import perf_counter
+
+import pytest
+
+from tests.conftest import make_qualys_xml
+
+from yager.core.cache import CacheStats, ResultCache, database_version
+from yager.core.shadow import ShadowDatabase
 from yager.main import YagerTest
 
 
@@ -15,3 +31,780 @@ def test_yager_debug():
     with YagerTest(argv=argv) as app:
         app.run()
         assert app.debug is True  # noqa: S101
+
+
+def test_yager_startup(record_property):
+    """Test help is shown without opening database or loading heavy modules."""
+    # modules loaded by Cement itself (e.g. `pickle` or `multiprocessing`)
+    # are left out
+    modules = (
+        "csv",
+        "gzip",
+        "jinja2",
+        "json",
+        "tabulate",
+        "xml.etree",
+        "yager.core.backup",
+        "yager.core.cache",
+        "yager.core.manifest",
+        "yager.core.shadow",
+        "yager.core.writer",
+    )
+    script = (
+        "import sys\n"
+        "from yager.main import main\n"
+        "sys.argv = ['yager', '--help']\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(name for name in {!r} if name in sys.modules))\n".format(modules)
+    )
+
+    started = perf_counter()
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    record_property("startup_time", perf_counter() - started)
+
+    assert result.stdout.endswith("\n[]\n")  # noqa: S101
+    assert "database" not in result.stderr  # noqa: S101
+
+
+def test_refresh_db_xml_modes(app_config, xml_file):
+    """Test XML parsers and lookup modes load the same data."""
+    results = {}
+
+    for xml_parser, parametrized_lookup in product(
+        ("tree", "stream"), ("xpath", "index")
+    ):
+        app_config["yager"]["data"]["xml_parser"] = xml_parser
+        app_config["yager"]["data"]["parametrized_lookup"] = parametrized_lookup
+        argv = ["refresh-db", "--file", xml_file]
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            results[(xml_parser, parametrized_lookup)] = app.db_cursor.execute(
+                "SELECT * FROM HostAssets "
+                "JOIN Vulns ON Vulns.hostAssetsId = HostAssets.id"
+            ).fetchall()
+
+    expected = results[("tree", "xpath")]
+
+    assert len(expected) == 6  # noqa: S101
+    assert all(result == expected for result in results.values())  # noqa: S101
+
+
+def test_refresh_db_csv(app_config, xml_file):
+    """Test CSV data source values are inserted verbatim."""
+    app_config["yager"]["data"]["layout"][0]["batch_size"] = 1
+
+    with YagerTest(argv=["refresh-db"], config_defaults=app_config) as app:
+        app.run()
+
+        subscriptions = app.db_cursor.execute(
+            "SELECT id, name FROM AzureSubscriptions ORDER BY id"
+        ).fetchall()
+
+    assert subscriptions == [  # noqa: S101
+        ("sub-0", "Subscription Zero"),
+        ("sub-1", "Subscription O'One"),
+    ]
+
+
+def test_refresh_db_csv_typed(app_config, tmp):
+    """Test CSV values are converted according to column types and options."""
+    kb_path = Path(tmp.dir) / "kb.csv"
+    kb_path.write_bytes(
+        "QID;Title;severity_level;patchable;published;extra\n"
+        "100;Caf\u00e9 vulnérabilité;5;yes;2020-02-01;x\n"
+        "101;Other;;no;;y\n".encode("cp1252")
+    )
+    app_config["yager"]["data"]["layout"].append(
+        {
+            "name": "QualysKB",
+            "columns": "qid INTEGER PRIMARY KEY, title TEXT, "
+            "severity_level INTEGER, patchable BOOLEAN, published DATETIME",
+            "data_source": "csv:{}".format(kb_path),
+            "csv": {
+                "delimiter": ";",
+                "encoding": "cp1252",
+                "converters": {"patchable": "boolean"},
+            },
+        }
+    )
+
+    with YagerTest(argv=["refresh-db"], config_defaults=app_config) as app:
+        app.run()
+
+        kb = app.db_cursor.execute(
+            "SELECT qid, title, severity_level, patchable, published "
+            "FROM QualysKB ORDER BY qid"
+        ).fetchall()
+
+    assert kb == [  # noqa: S101
+        (100, "Caf\u00e9 vulnérabilité", 5, 1, "2020-02-01"),
+        (101, "Other", None, 0, None),
+    ]
+
+
+def test_refresh_db_csv_out_of_range(app_config, tmp):
+    """Test integers out of the 64-bit range are loaded as reals."""
+    numbers_path = Path(tmp.dir) / "numbers.csv"
+    numbers_path.write_text(
+        "id,value\n"
+        "1,9223372036854775807\n"
+        "2,9223372036854775808\n"
+        "3,-99999999999999999999\n"
+        "4,inf\n"
+    )
+    app_config["yager"]["data"]["layout"].append(
+        {
+            "name": "Numbers",
+            "columns": "id INTEGER PRIMARY KEY, value INTEGER",
+            "data_source": "csv:{}".format(numbers_path),
+        }
+    )
+
+    with YagerTest(argv=["refresh-db"], config_defaults=app_config) as app:
+        app.run()
+
+        numbers = app.db_cursor.execute(
+            "SELECT id, value FROM Numbers ORDER BY id"
+        ).fetchall()
+
+    assert numbers == [  # noqa: S101
+        (1, 2 ** 63 - 1),
+        (2, 2.0 ** 63),
+        (3, -1e20),
+        (4, "inf"),
+    ]
+
+
+def test_refresh_db_compressed(app_config, xml_file, csv_file, tmp):
+    """Test compressed XML and CSV files are loaded like uncompressed ones."""
+    tables = {}
+
+    for suffix, compress in (("", bytes), (".gz", gzip.compress)):
+        xml_path = Path(tmp.dir) / ("compressed.xml" + suffix)
+        xml_path.write_bytes(compress(Path(xml_file).read_bytes()))
+
+        csv_path = Path(tmp.dir) / ("compressed.csv" + suffix)
+        csv_path.write_bytes(compress(Path(csv_file).read_bytes()))
+        app_config["yager"]["data"]["layout"][0]["data_source"] = "csv:{}".format(
+            csv_path
+        )
+
+        for xml_parser in ("tree", "stream"):
+            app_config["yager"]["data"]["xml_parser"] = xml_parser
+
+            with YagerTest(
+                argv=["refresh-db", "-f", str(xml_path)], config_defaults=app_config
+            ) as app:
+                app.run()
+
+                tables[suffix, xml_parser] = [
+                    app.db_cursor.execute(
+                        "SELECT * FROM {} ORDER BY 1".format(table)
+                    ).fetchall()
+                    for table in ("AzureSubscriptions", "HostAssets", "Vulns")
+                ]
+
+    assert [len(rows) for rows in tables["", "tree"]] == [2, 3, 6]  # noqa: S101
+    assert all(rows == tables["", "tree"] for rows in tables.values())  # noqa: S101
+
+
+def test_refresh_db_jobs(app_config, tmp):
+    """Test parallel XML parsing loads the same data as a sequential run."""
+    xml_files = []
+    for n in range(4):
+        xml_path = Path(tmp.dir) / "host_assets_{}.xml".format(n)
+        # overlapping IDs with distinct dates make the result depend on file order
+        xml_path.write_text(
+            make_qualys_xml(
+                hosts=50, vulns_per_host=3, first_host_id=n * 25 + 1
+            ).replace("2020-06-01", "2020-06-0{}".format(n + 1))
+        )
+        xml_files.append(str(xml_path))
+
+    for table in app_config["yager"]["data"]["layout"]:
+        table["batch_size"] = 7
+
+    results = {}
+
+    for jobs in ("1", "3"):
+        argv = ["refresh-db", "--jobs", jobs]
+        for xml_file in xml_files:
+            argv += ["--file", xml_file]
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            results[jobs] = app.db_cursor.execute(
+                "SELECT * FROM Vulns ORDER BY rowid"
+            ).fetchall()
+
+    assert len(results["1"]) == 375  # noqa: S101
+    assert results["3"] == results["1"]  # noqa: S101
+
+
+def test_refresh_db_incremental(app_config, tmp):
+    """Test incremental refresh replaces rows of changed sources only."""
+    xml_paths = [Path(tmp.dir) / "host_assets_{}.xml".format(n) for n in range(2)]
+    for n, xml_path in enumerate(xml_paths):
+        xml_path.write_text(
+            make_qualys_xml(hosts=2, vulns_per_host=2, first_host_id=n * 2 + 1)
+        )
+
+    argv = ["refresh-db", "--incremental"]
+    for xml_path in xml_paths:
+        argv += ["--file", str(xml_path)]
+
+    def refresh():
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            return (
+                app.db_cursor.execute(
+                    "SELECT id, lastFound FROM Vulns ORDER BY id"
+                ).fetchall(),
+                app.db_cursor.execute(
+                    "SELECT source, row_counts FROM yager_manifest ORDER BY source"
+                ).fetchall(),
+            )
+
+    vulns, manifest = refresh()
+
+    assert len(vulns) == 8  # noqa: S101
+    assert manifest[0] == (  # noqa: S101
+        str(xml_paths[0].resolve()),
+        '{"HostAssets": 2, "Vulns": 4}',
+    )
+
+    # second host of the first file is gone and dates are changed
+    xml_paths[0].write_text(
+        make_qualys_xml(hosts=1, vulns_per_host=2).replace("2020-06-01", "2021-01-01")
+    )
+    vulns_changed, manifest = refresh()
+
+    assert (
+        vulns_changed
+        == [  # noqa: S101
+            (1000, "2021-01-01T00:00:00Z"),
+            (1001, "2021-01-01T00:00:00Z"),
+        ]
+        + vulns[4:]
+    )
+    assert manifest[0][1] == '{"HostAssets": 1, "Vulns": 2}'  # noqa: S101
+
+    assert refresh()[0] == vulns_changed  # noqa: S101
+
+
+def test_refresh_db_incremental_removed_source(app_config, tmp):
+    """Test incremental refresh deletes rows of sources no longer given."""
+    xml_paths = [Path(tmp.dir) / "host_assets_{}.xml".format(n) for n in range(2)]
+    for n, xml_path in enumerate(xml_paths):
+        xml_path.write_text(
+            make_qualys_xml(hosts=2, vulns_per_host=1, first_host_id=n * 2 + 1)
+        )
+
+    def refresh(*paths):
+        argv = ["refresh-db", "--incremental"]
+        for xml_path in paths:
+            argv += ["--file", str(xml_path)]
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            return (
+                app.db_cursor.execute(
+                    "SELECT id FROM HostAssets ORDER BY id"
+                ).fetchall(),
+                app.db_cursor.execute(
+                    "SELECT source FROM yager_manifest WHERE source LIKE '%.xml'"
+                ).fetchall(),
+            )
+
+    assert refresh(*xml_paths)[0] == [(1,), (2,), (3,), (4,)]  # noqa: S101
+    assert refresh(xml_paths[1]) == (  # noqa: S101
+        [(3,), (4,)],
+        [(str(xml_paths[1].resolve()),)],
+    )
+
+
+def test_refresh_db_incremental_shared_rows(app_config, tmp):
+    """Test rows contained in several sources are kept until all drop them."""
+    # both files contain host 2 and its vulnerability
+    xml_paths = [Path(tmp.dir) / "host_assets_{}.xml".format(n) for n in range(2)]
+    for n, xml_path in enumerate(xml_paths):
+        xml_path.write_text(
+            make_qualys_xml(hosts=2, vulns_per_host=1, first_host_id=n + 1)
+        )
+
+    argv = ["refresh-db", "--incremental"]
+    for xml_path in xml_paths:
+        argv += ["--file", str(xml_path)]
+
+    def refresh():
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            return [
+                app.db_cursor.execute(
+                    "SELECT id FROM {} ORDER BY id".format(table)
+                ).fetchall()
+                for table in ("HostAssets", "Vulns")
+            ]
+
+    assert refresh() == [[(1,), (2,), (3,)], [(1000,), (2000,), (3000,)]]  # noqa: S101
+
+    # the first file drops host 2, which the second one still contains
+    xml_paths[0].write_text(make_qualys_xml(hosts=1, vulns_per_host=1))
+
+    assert refresh() == [[(1,), (2,), (3,)], [(1000,), (2000,), (3000,)]]  # noqa: S101
+
+    # once the second file drops it too, it is gone
+    xml_paths[1].write_text(make_qualys_xml(hosts=1, vulns_per_host=1, first_host_id=3))
+
+    assert refresh() == [[(1,), (3,)], [(1000,), (3000,)]]  # noqa: S101
+
+
+def test_refresh_db_materialized(app_config, csv_file, tmp, caplog):
+    """Test materialized tables are rebuilt once tables they use change."""
+    xml_path = Path(tmp.dir) / "host_assets.xml"
+    xml_path.write_text(make_qualys_xml(hosts=3, vulns_per_host=2))
+
+    app_config["yager"]["data"]["materialized"] = [
+        {
+            "name": "VulnsBySubscription",
+            "query": "SELECT azureSubscriptionId AS sub_id, COUNT(*) AS vulns "
+            "FROM Vulns JOIN HostAssets ON HostAssets.id == Vulns.hostAssetsId "
+            "GROUP BY azureSubscriptionId",
+            "depends_on": ["Vulns", "HostAssets"],
+            "indexes": ["sub_id"],
+        },
+        {
+            "name": "SubscriptionNames",
+            "columns": "id TEXT PRIMARY KEY, name TEXT",
+            "query": "SELECT id, name FROM AzureSubscriptions",
+            "depends_on": ["AzureSubscriptions"],
+        },
+    ]
+    argv = ["refresh-db", "--incremental", "--file", str(xml_path)]
+
+    def refresh():
+        caplog.clear()
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            return [
+                app.db_cursor.execute(
+                    "SELECT * FROM {} ORDER BY 1".format(table)
+                ).fetchall()
+                for table in ("VulnsBySubscription", "SubscriptionNames")
+            ]
+
+    assert refresh() == [  # noqa: S101
+        [("sub-0", 2), ("sub-1", 4)],
+        [("sub-0", "Subscription Zero"), ("sub-1", "Subscription O'One")],
+    ]
+    assert "Rebuilding materialized table 'SubscriptionNames'" in (  # noqa: S101
+        caplog.text
+    )
+
+    xml_path.write_text(make_qualys_xml(hosts=2, vulns_per_host=1))
+    assert refresh()[0] == [("sub-0", 1), ("sub-1", 1)]  # noqa: S101
+    assert "Materialized table 'SubscriptionNames' is up to date" in (  # noqa: S101
+        caplog.text
+    )
+
+    # tables changed outside of the refresh are picked up too
+    db = connect(app_config["yager"]["data"]["db_uri"])
+    db.execute("UPDATE AzureSubscriptions SET name = 'Renamed' WHERE id == 'sub-0'")
+    db.commit()
+    db.close()
+
+    assert refresh()[1][0] == ("sub-0", "Renamed")  # noqa: S101
+    assert "Tables changed since last rebuild: AzureSubscriptions" in (  # noqa: S101
+        caplog.text
+    )
+    assert "Materialized table 'VulnsBySubscription' is up to date" in (  # noqa: S101
+        caplog.text
+    )
+
+
+def test_refresh_db_shadow(app_config, xml_file):
+    """Test shadow rebuild swaps in a complete database."""
+    argv = ["refresh-db", "--file", xml_file]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+        app.db_cursor.execute("CREATE TABLE QualysKB (qid INTEGER PRIMARY KEY)")
+        app.db_cursor.execute("INSERT INTO QualysKB VALUES (100)")
+        app.db_cursor.connection.commit()
+
+    db_path = app_config["yager"]["data"]["db_uri"]
+    reader = connect(db_path)
+    reader.execute("BEGIN")
+    hosts_before = reader.execute("SELECT count(*) FROM HostAssets").fetchone()
+
+    app_config["yager"]["data"]["exclude_from_refresh"] = ["QualysKB"]
+    app_config["yager"]["data"]["layout"][1]["input_map"]["name"] = "fqdn"
+
+    with YagerTest(argv=argv + ["--shadow"], config_defaults=app_config) as app:
+        app.run()
+
+        assert app.db_cursor.execute(  # noqa: S101
+            "SELECT name FROM HostAssets ORDER BY id"
+        ).fetchall() == [("host-{}.example.org".format(n),) for n in range(1, 4)]
+        assert app.db_cursor.execute(  # noqa: S101
+            "SELECT * FROM QualysKB"
+        ).fetchall() == [(100,)]
+
+    # reader keeps a consistent snapshot of the replaced database
+    assert (  # noqa: S101
+        reader.execute("SELECT count(*) FROM HostAssets").fetchone() == hosts_before
+    )
+    assert not Path(db_path + ".shadow").exists()  # noqa: S101
+
+
+def test_refresh_db_shadow_invalid(app_config, xml_file, monkeypatch):
+    """Test live database is left intact, if shadow database is invalid."""
+    argv = ["refresh-db", "--file", xml_file]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+    monkeypatch.setattr(ShadowDatabase, "validate", lambda *_: ["broken"])
+    app_config["yager"]["data"]["layout"][1]["input_map"]["name"] = "fqdn"
+
+    with YagerTest(argv=argv + ["--shadow"], config_defaults=app_config) as app:
+        app.run()
+
+        assert app.db_cursor.execute(  # noqa: S101
+            "SELECT name FROM HostAssets WHERE id = 1"
+        ).fetchone() == ("host-1",)
+
+    assert not Path(
+        app_config["yager"]["data"]["db_uri"] + ".shadow"
+    ).exists()  # noqa: S101,E501
+
+
+def test_refresh_db_shadow_wal(app_config, xml_file):
+    """Test shadow rebuild of a database read in WAL mode."""
+    app_config["yager"]["data"]["profiles"] = {
+        "read": {"pragmas": {"journal_mode": "WAL"}},
+    }
+    argv = ["refresh-db", "--file", xml_file]
+    query = ["query", "SELECT name FROM HostAssets ORDER BY id"]
+
+    # reader keeps write-ahead log of the live database open
+    with YagerTest(argv=["query", "SELECT 1"], config_defaults=app_config) as reader:
+        reader.run()
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+        reader.db_cursor.execute("BEGIN")
+        names_before = reader.db_cursor.execute(query[1]).fetchall()
+
+        app_config["yager"]["data"]["layout"][1]["input_map"]["name"] = "fqdn"
+        with YagerTest(argv=argv + ["--shadow"], config_defaults=app_config) as app:
+            app.run()
+
+        # reader keeps a consistent snapshot of the replaced database
+        assert reader.db_cursor.execute(query[1]).fetchall() == (  # noqa: S101
+            names_before
+        )
+        reader.db_cursor.execute("COMMIT")
+
+    with YagerTest(argv=query, config_defaults=app_config) as app:
+        app.run()
+
+        assert app.db_cursor.execute(  # noqa: S101
+            "PRAGMA journal_mode"
+        ).fetchone() == ("wal",)
+        assert app.db_cursor.execute(  # noqa: S101
+            "PRAGMA integrity_check"
+        ).fetchone() == ("ok",)
+        assert app.db_cursor.execute(query[1]).fetchall() == [  # noqa: S101
+            ("host-{}.example.org".format(n),) for n in range(1, 4)
+        ]
+
+
+def test_backup_restore(app_config, xml_file, tmp):
+    """Test database is restored from the latest backup."""
+    app_config["yager"]["data"]["backup"] = {
+        "dir": str(Path(tmp.dir) / "backups"),
+        "keep_last": 2,
+    }
+
+    argv = ["refresh-db", "--file", xml_file]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+    for _ in range(3):
+        with YagerTest(argv=["backup"], config_defaults=app_config) as app:
+            app.run()
+
+    assert len(list(Path(tmp.dir, "backups").glob("*.bak"))) == 2  # noqa: S101
+
+    with YagerTest(argv=["restore"], config_defaults=app_config) as app:
+        app.db_cursor.execute("DELETE FROM HostAssets")
+        app.db_cursor.connection.commit()
+
+        app.run()
+
+        assert app.db_cursor.execute(  # noqa: S101
+            "SELECT count(*) FROM HostAssets"
+        ).fetchone() == (3,)
+
+
+def test_connection_profiles(app_config, xml_file, tmp):
+    """Test subcommands apply their connection profiles."""
+    app_config["yager"]["data"]["profiles"] = {
+        "read": {"uri_params": {"mode": "ro"}, "pragmas": {"cache_size": -1024}},
+    }
+    metrics_path = Path(tmp.dir) / "metrics.json"
+
+    for argv in (
+        ["refresh-db", "--file", xml_file],
+        ["--metrics-file", str(metrics_path), "refresh-db", "--file", xml_file],
+    ):
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+            assert app.db_cursor.execute(  # noqa: S101
+                "PRAGMA cache_size"
+            ).fetchone() == (-262144,)
+
+    with YagerTest(argv=["query", "SELECT 1"], config_defaults=app_config) as app:
+        app.run()
+
+        assert app.db_cursor.execute("PRAGMA cache_size").fetchone() == (  # noqa: S101
+            -1024,
+        )
+
+        with pytest.raises(OperationalError, match="readonly"):
+            app.db_cursor.execute("CREATE TABLE QualysKB (qid INTEGER)")
+
+
+def test_refresh_db_indexes(app_config, xml_file):
+    """Test configured indexes are created and analyzed."""
+    app_config["yager"]["data"]["layout"][2]["indexes"] = [
+        "hostAssetsId",
+        {"name": "Vulns_found", "columns": "hostAssetsId, qid DESC", "unique": True},
+    ]
+    argv = ["refresh-db", "--file", xml_file]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+        assert app.db_cursor.execute(  # noqa: S101
+            "SELECT name FROM sqlite_master "
+            "WHERE type == 'index' AND tbl_name == 'Vulns' AND sql IS NOT NULL "
+            "ORDER BY name"
+        ).fetchall() == [("Vulns_found",), ("Vulns_hostAssetsId",)]
+        assert (
+            app.db_cursor.execute(  # noqa: S101
+                "SELECT count(*) FROM sqlite_stat1 WHERE tbl == 'Vulns'"
+            ).fetchone()[0]
+            > 0
+        )
+
+
+def test_profile(app_config, xml_file, tmp, capsys):
+    """Test metrics of command phases are printed and written into files."""
+    metrics_path = Path(tmp.dir) / "metrics.json"
+    cprofile_path = Path(tmp.dir) / "refresh.prof"
+    argv = [
+        "--profile",
+        "--metrics-file",
+        str(metrics_path),
+        "--cprofile-file",
+        str(cprofile_path),
+        "refresh-db",
+        "-f",
+        xml_file,
+    ]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+    phases = json.loads(metrics_path.read_text())["phases"]
+    assert phases["xpath_match"]["rows"] == 9  # noqa: S101
+    assert phases["input_map_parametrized"]["calls"] == 6  # noqa: S101
+    assert phases["insert"]["rows"] == 11  # noqa: S101
+    assert phases["csv_load"]["rows"] == 2  # noqa: S101
+    assert "input_map_parametrized" in capsys.readouterr().err  # noqa: S101
+    assert Stats(str(cprofile_path)).total_calls > 0  # noqa: S101
+
+    with YagerTest(
+        argv=["--profile", "report", "hosts_md", "-p", "sub_id=sub-1"],
+        config_defaults=app_config,
+    ) as app:
+        app.run()
+        phases = app.metrics.phases
+
+    assert set(phases) == {"template_load", "sql_query", "render"}  # noqa: S101
+    assert phases["sql_query"].rows == 3  # noqa: S101
+
+
+def test_query(app_config, xml_file, capsys):
+    """Test query results are streamed and tables are limited."""
+    with YagerTest(
+        argv=["refresh-db", "-f", xml_file], config_defaults=app_config
+    ) as app:
+        app.run()
+
+    argv = ["query", "SELECT id, qid FROM Vulns WHERE id < 2000 ORDER BY id"]
+
+    for options, expected in (
+        (["-o", "csv", "--chunk-size", "1"], "id,qid\n1000,100\n1001,101\n"),
+        (["-o", "tsv"], "id\tqid\n1000\t100\n1001\t101\n"),
+        (["-o", "jsonl"], '{"id": 1000, "qid": 100}\n{"id": 1001, "qid": 101}\n',),
+        (["--limit", "1"], "  id    qid\n----  -----\n1000    100\n"),
+    ):
+        with YagerTest(argv=argv + options, config_defaults=app_config) as app:
+            app.run()
+
+        assert capsys.readouterr().out == expected  # noqa: S101
+
+
+def test_export(app_config, xml_file, tmp):
+    """Test tables and queries are exported sequentially and concurrently."""
+    with YagerTest(
+        argv=["refresh-db", "-f", xml_file], config_defaults=app_config
+    ) as app:
+        app.run()
+
+    for jobs in ("1", "2"):
+        output_dir = Path(tmp.dir) / "export-{}".format(jobs)
+        argv = [
+            "export",
+            "HostAssets",
+            "Vulns",
+            "--query",
+            "host_ids=SELECT id FROM HostAssets ORDER BY id",
+            "--max-rows",
+            "4",
+            "--gzip",
+            "--output-dir",
+            str(output_dir),
+            "--jobs",
+            jobs,
+        ]
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+        assert sorted(path.name for path in output_dir.iterdir()) == [  # noqa: S101
+            "HostAssets.0001.csv.gz",
+            "Vulns.0001.csv.gz",
+            "Vulns.0002.csv.gz",
+            "host_ids.0001.csv.gz",
+        ]
+        with gzip.open(str(output_dir / "host_ids.0001.csv.gz"), "rt") as csv_file:
+            assert csv_file.read() == "id\n1\n2\n3\n"  # noqa: S101
+
+
+def test_report(app_config, xml_file, capsys):
+    """Test report is rendered with sequential, concurrent and lazy queries."""
+    with YagerTest(
+        argv=["refresh-db", "-f", xml_file], config_defaults=app_config
+    ) as app:
+        app.run()
+
+    argv = ["report", "hosts_md", "--param", "sub_id=sub-1"]
+
+    for options in (
+        ["--jobs", "1"],
+        ["--jobs", "2"],
+        ["--stream", "--chunk-size", "1"],
+    ):
+        with YagerTest(argv=argv + options, config_defaults=app_config) as app:
+            app.run()
+
+        assert capsys.readouterr().out == (  # noqa: S101
+            "# Subscription O'One\n\n* host-1: 2\n* host-3: 2\n"
+        )
+
+
+def test_report_cache(app_config, xml_file, capsys):
+    """Test report query results are cached until the database changes."""
+    app_config["yager"]["data"]["report_cache"] = {}
+    argv = ["refresh-db", "--file", xml_file]
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+    def report(sub_id):
+        argv = ["report", "hosts_md", "--param", "sub_id={}".format(sub_id)]
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+        return capsys.readouterr().out
+
+    def cached():
+        db_path = Path(app_config["yager"]["data"]["db_uri"])
+        cache = ResultCache(
+            db_path.with_name(db_path.name + ".cache"), database_version(db_path)
+        )
+        stats = cache.stats()
+        cache.close()
+
+        return stats
+
+    output = report("sub-1")
+
+    assert report("sub-1") == output  # noqa: S101
+    assert cached() == CacheStats(hits=2, misses=2)  # noqa: S101
+
+    with YagerTest(argv=argv, config_defaults=app_config) as app:
+        app.run()
+
+    assert report("sub-1") == output  # noqa: S101
+    assert cached() == CacheStats(hits=2, misses=4)  # noqa: S101
+
+
+def test_report_batch(app_config, xml_file, tmp):
+    """Test report is rendered into a file per parameter set."""
+    with YagerTest(
+        argv=["refresh-db", "-f", xml_file], config_defaults=app_config
+    ) as app:
+        app.run()
+
+    expected = {
+        "hosts_md_sub-0.md": "# Subscription Zero\n\n* host-2: 2\n",
+        "hosts_md_sub-1.md": "# Subscription O'One\n\n* host-1: 2\n* host-3: 2\n",
+    }
+
+    for batch, processes, stream in product(
+        ("list:sub_id=sub-0,sub-1", "sql:SELECT id AS sub_id FROM AzureSubscriptions"),
+        ("1", "2"),
+        ([], ["--stream"]),
+    ):
+        output_dir = Path(tmp.dir) / "reports-{}-{}-{}".format(
+            batch[:3], processes, len(stream)
+        )
+        argv = [
+            "report",
+            "hosts_md",
+            "--batch",
+            batch,
+            "--output-dir",
+            str(output_dir),
+            "--processes",
+            processes,
+        ] + stream
+
+        with YagerTest(argv=argv, config_defaults=app_config) as app:
+            app.run()
+
+        assert {  # noqa: S101
+            path.name: path.read_text() for path in output_dir.iterdir()
+        } == expected
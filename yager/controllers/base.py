@@ -1,21 +1,31 @@
 """Base app controller module."""
-from csv import DictReader
-from datetime import datetime
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pathlib import Path
-from shutil import copyfile
+from queue import Queue
 from sqlite3 import Cursor, Error, OperationalError
-from string import Formatter
-from typing import Dict, List, Optional
-from xml.etree.ElementTree import Element, parse as xml_parse  # noqa: S405
+from typing import Dict, List, Optional, Set, TYPE_CHECKING, TextIO, Tuple
 
 from cement import Controller, ex
 from cement.utils.version import get_version_banner
 
-from jinja2 import Environment, FileSystemLoader
+from ..core.exc import YagerError
+from ..core.hooks import get_db_settings, open_db
+from ..core.output import DEFAULT_CHUNK_SIZE, DEFAULT_TABLE_LIMIT, OUTPUT_FORMATS
+from ..core.version import get_version
 
-from tabulate import tabulate
+if TYPE_CHECKING:
+    from jinja2 import Template
 
-from ..core.version import get_version
+    from ..core.cache import CacheStats, ResultCache
+    from ..core.export import ChunkedFile
+    from ..core.ingest import ExtractionPlan
+    from ..core.manifest import Manifest, SourceSignature
+    from ..core.metrics import Metrics
+    from ..core.report import Query, QueryResult, ReportRenderer
+    from ..core.writer import TableWriter
 
 VERSION_BANNER = """
 Yager %s
@@ -34,208 +44,1315 @@ class Base(Controller):
 
         label = "base"
 
-        description = "Yet Another GEneric Reporter tool for parsing of XML data into an SQLite database and subsequent universal reporting based on SQL queries and Jinja2 templates."  # noqa: E501
-        epilog = "Usage: yager {sub-command} {options}"
+        description = "Yet Another GEneric Reporter tool for parsing of XML data into an SQLite database and subsequent universal reporting based on SQL queries and Jinja2 templates."  # noqa: E501
+        epilog = "Usage: yager {sub-command} {options}"
+
+        arguments = [
+            (["-v", "--version"], {"action": "version", "version": VERSION_BANNER}),
+            (
+                ["--profile"],
+                {
+                    "help": "print time, rows and rows/s of each phase of the \
+                        command and peak memory usage",
+                    "action": "store_true",
+                    "dest": "profile",
+                },
+            ),
+            (
+                ["--metrics-file"],
+                {
+                    "help": "write metrics collected with '--profile' into \
+                        JSON file",
+                    "action": "store",
+                    "metavar": "PATH",
+                    "dest": "metrics_file",
+                },
+            ),
+            (
+                ["--cprofile-file"],
+                {
+                    "help": "profile function calls with cProfile and write \
+                        statistics into file for 'pstats' or 'snakeviz'",
+                    "action": "store",
+                    "metavar": "PATH",
+                    "dest": "cprofile_file",
+                },
+            ),
+        ]
+
+    @property
+    def _metrics(self) -> Optional["Metrics"]:
+        """Return metrics collector, if collecting metrics is enabled.
+
+        Core functions instrumenting each row take ``None`` when metrics
+        are not collected, so they skip timing altogether.
+        """
+        return self.app.metrics if self.app.metrics.enabled else None
+
+    def _query_db(
+        self, sql_query: str, db_cursor: Optional[Cursor] = None
+    ) -> Optional[Cursor]:
+        """Query database.
+
+        Helper to execute `sql_query` against the app database.
+
+        Parameters
+        ----------
+        sql_query
+            SQLite3 query to be executed.
+        db_cursor
+            Cursor to execute the query with (default: the app database cursor).
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`~sqlite3.Cursor`]
+            If successful, returns :obj:`~sqlite3.Cursor` with results.
+            Otherwise returns ``None``.
+        """
+        if db_cursor is None:
+            db_cursor = self.app.db_cursor
+
+        # Stop processing, if DB is not available
+        if db_cursor is None:
+            self.app.log.error("No database connection")
+            return
+
+        self.app.log.debug("Executing query '{}'".format(sql_query))
+
+        response: Optional[Cursor] = None
+
+        try:
+            response = db_cursor.execute(sql_query)
+
+        except OperationalError as e:
+            self.app.log.error("sqlite3.OperationalError: {}".format(str(e)))
+
+        except Error as e:
+            self.app.log.error("Unexpected Error: {}".format(str(e)))
+
+            if self.app.debug:
+                import traceback
+
+                traceback.print_exc()
+
+        else:
+            return response
+
+    def _main_db_path(self) -> Optional[Path]:
+        """Return path to the main database file.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`~pathlib.Path`]
+            Path to the main database file, if it is not an in-memory one.
+        """
+        database_query: Optional[Cursor] = self._query_db("PRAGMA database_list;")
+        if database_query:
+            db_list: List = database_query.fetchall()
+            db_name_dict: Dict = dict(map(lambda x: (x[1], x[2]), db_list))
+
+            if db_name_dict.get("main"):
+                return Path(db_name_dict["main"])
+
+        return None
+
+    def _backup_db(self, main_db_path: Path) -> Path:
+        """Back up main database and prune expired backups.
+
+        Parameters
+        ----------
+        main_db_path
+            Path to the main database file.
+
+        Returns
+        -------
+        :obj:`~pathlib.Path`
+            Path to the backup.
+        """
+        from ..core.backup import DEFAULT_PAGES_PER_STEP, backup_db, prune_backups
+
+        backup_config: Dict = self.app.config.get("yager", "data").get("backup", {})
+        backup_dir: Path = Path(backup_config.get("dir", main_db_path.parent))
+
+        self.app.log.info("Backup DB '{}' to '{}'".format(main_db_path, backup_dir))
+
+        def log_progress(status: int, remaining: int, total: int) -> None:
+            self.app.log.debug(
+                "Backed up {} of {} pages".format(total - remaining, total)
+            )
+
+        backup_path: Path = backup_db(
+            self.app.db_cursor.connection,
+            backup_dir,
+            main_db_path.name,
+            backup_config.get("pages_per_step", DEFAULT_PAGES_PER_STEP),
+            backup_config.get("compress", False),
+            log_progress,
+        )
+
+        self.app.log.info("Backup DB '{}' as '{}'".format(main_db_path, backup_path))
+
+        max_age_days: Optional[float] = backup_config.get("max_age_days")
+        for expired_path in prune_backups(
+            backup_dir,
+            main_db_path.name,
+            backup_config.get("keep_last"),
+            None if max_age_days is None else timedelta(days=max_age_days),
+        ):
+            self.app.log.info("Removed expired backup '{}'".format(expired_path))
+
+        return backup_path
+
+    def _open_report_cache(self) -> Optional["ResultCache"]:
+        """Open cache of report query results, if configured.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:class:`~yager.core.cache.ResultCache`]
+            Result cache for the current version of the database.
+        """
+        from ..core.cache import DEFAULT_MAX_SIZE_MB, ResultCache, database_version
+
+        cache_config: Optional[Dict] = self.app.config.get("yager", "data").get(
+            "report_cache"
+        )
+        if cache_config is None or not cache_config.get("enabled", True):
+            return None
+
+        main_db_path: Optional[Path] = self._main_db_path()
+        if main_db_path is None:
+            return None
+
+        cache_path: Path = Path(
+            cache_config.get("path", "{}.cache".format(main_db_path))
+        )
+        self.app.log.debug("Using report cache '{}'".format(cache_path))
+
+        return ResultCache(
+            cache_path,
+            database_version(main_db_path),
+            int(cache_config.get("max_size_mb", DEFAULT_MAX_SIZE_MB) * 1024 * 1024),
+        )
+
+    def _execute_report_query(
+        self, sql_query: str, db_cursor: Optional[Cursor] = None
+    ) -> Optional["QueryResult"]:
+        """Execute report query and fetch its result.
+
+        Parameters
+        ----------
+        sql_query
+            SQL query with parameters already expanded.
+        db_cursor
+            Cursor to execute the query with (default: the app database cursor).
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`~typing.Tuple`]
+            Column names and rows of the result, if successful.
+            Otherwise returns ``None``.
+        """
+        with self.app.metrics.phase("sql_query"):
+            sql_result: Optional[Cursor] = self._query_db(sql_query, db_cursor)
+            if not sql_result:
+                return None
+
+            rows: List[Tuple] = sql_result.fetchall()
+            self.app.metrics.add_rows("sql_query", len(rows))
+
+        return [h[0] for h in sql_result.description], rows
+
+    def _fetch_report_data(
+        self,
+        queries: List["Query"],
+        report_cache: Optional["ResultCache"] = None,
+        jobs: int = 1,
+    ) -> List[Optional["QueryResult"]]:
+        """Fetch results of report queries, from cache if possible.
+
+        Queries missing from the cache are executed one by one with the app
+        database cursor or, if `jobs` is over 1, concurrently with a pool of
+        read-only connections to the database.
+
+        Parameters
+        ----------
+        queries
+            SQL queries with parameters already expanded and parameters used
+            by each of them.
+        report_cache
+            Cache of query results.
+        jobs
+            Number of queries executed concurrently.
+
+        Returns
+        -------
+        :obj:`~typing.List` [:obj:`~typing.Optional` [:obj:`~typing.Tuple`]]
+            Column names and rows of the result of each query in the order of
+            `queries`, if successful. Otherwise ``None``.
+        """
+        results: List[Optional[QueryResult]] = [None] * len(queries)
+        pending: List[int] = []
+
+        for query_index, (sql_query, params) in enumerate(queries):
+            if report_cache:
+                results[query_index] = report_cache.get(sql_query, params)
+
+            if results[query_index] is None:
+                pending.append(query_index)
+            else:
+                self.app.log.debug("Using cached result of '{}'".format(sql_query))
+
+        if jobs > 1 and len(pending) > 1 and self._main_db_path():
+            db_cursors: Queue = Queue()
+            for _ in range(min(jobs, len(pending))):
+                db_cursors.put(open_db(self.app, read_only=True))
+
+            def execute(query_index: int) -> Optional["QueryResult"]:
+                db_cursor: Optional[Cursor] = db_cursors.get()
+                try:
+                    return (
+                        self._execute_report_query(queries[query_index][0], db_cursor)
+                        if db_cursor
+                        else None
+                    )
+                finally:
+                    db_cursors.put(db_cursor)
+
+            self.app.log.info(
+                "Executing {} queries with {} connections".format(
+                    len(pending), db_cursors.qsize()
+                )
+            )
+
+            with ThreadPoolExecutor(max_workers=db_cursors.qsize()) as executor:
+                fetched: List[Optional[QueryResult]] = list(
+                    executor.map(execute, pending)
+                )
+
+            while not db_cursors.empty():
+                db_cursor: Optional[Cursor] = db_cursors.get()
+                if db_cursor:
+                    db_cursor.connection.close()
+
+        else:
+            fetched = [
+                self._execute_report_query(queries[query_index][0])
+                for query_index in pending
+            ]
+
+        for query_index, sql_data in zip(pending, fetched):
+            results[query_index] = sql_data
+
+            if report_cache and sql_data is not None:
+                report_cache.put(*queries[query_index], *sql_data)
+
+        return results
+
+    def _write_report(
+        self, renderer: "ReportRenderer", params: Dict[str, str], output: TextIO
+    ) -> None:
+        """Render report and write it to output.
+
+        Parameters
+        ----------
+        renderer
+            Renderer of the report.
+        params
+            Mapping between query parameter names and values.
+        output
+            Text stream to write the report to.
+        """
+        try:
+            with self.app.metrics.phase("render"):
+                renderer.write(params, output)
+        except Error as e:
+            self.app.log.error("Failed to render report: {}".format(str(e)))
+
+            if self.app.debug:
+                import traceback
+
+                traceback.print_exc()
+
+    def _forget_source(
+        self, manifest: "Manifest", path: str, remove: bool = False
+    ) -> Dict[str, int]:
+        """Delete rows previously ingested from data source file.
+
+        Parameters
+        ----------
+        manifest
+            Manifest of ingested data sources.
+        path
+            Path to data source file.
+        remove
+            Whether to also remove the source from the manifest.
+
+        Returns
+        -------
+        :obj:`~typing.Dict` [:obj:`str`, :obj:`int`]
+            Mapping between table names and numbers of deleted rows.
+        """
+        deleted: Dict[str, int] = (
+            manifest.remove(path) if remove else manifest.forget(path)
+        )
+
+        for table_name, row_count in deleted.items():
+            self.app.log.info(
+                "Deleted {} records from table '{}' ingested from '{}'".format(
+                    row_count, table_name, path
+                )
+            )
+
+        return deleted
+
+    def _create_indexes(self, table: Dict) -> None:
+        """Create indexes configured for table.
+
+        Each index is configured either as a string with columns or as
+        a mapping with `columns` and optional `name` and `unique` flag.
+
+        Parameters
+        ----------
+        table
+            Table config.
+        """
+        for index in table.get("indexes", []):
+            if isinstance(index, str):
+                index = {"columns": index}
+
+            index_columns: str = index["columns"].replace("\n", "")
+            index_name: str = index.get(
+                "name",
+                "{}_{}".format(
+                    table["name"], re.sub(r"\W+", "_", index_columns).strip("_")
+                ),
+            )
+
+            self.app.log.info(
+                "Creating index '{}' on '{}' ({})".format(
+                    index_name, table["name"], index_columns
+                )
+            )
+            self._query_db(
+                "CREATE {}INDEX IF NOT EXISTS {} ON {} ({});".format(
+                    "UNIQUE " if index.get("unique", False) else "",
+                    index_name,
+                    table["name"],
+                    index_columns,
+                )
+            )
+
+    def _refresh_materialized(
+        self, materialized: List[Dict], changed_tables: Optional[Set[str]]
+    ) -> None:
+        """Rebuild stale materialized tables.
+
+        Helper to replace summary tables configured in the `materialized`
+        section with results of their queries, once the tables they depend
+        on are loaded, and to create their indexes. Tables changed since the
+        last rebuild outside of the refresh, e.g. by hand, are taken into
+        account as well.
+
+        Parameters
+        ----------
+        materialized
+            Configs of materialized tables.
+        changed_tables
+            Names of tables changed by the refresh, ``None`` if all of them
+            were.
+        """
+        from ..core.materialize import (
+            modified_tables,
+            rebuild_table,
+            stale_tables,
+            track_changes,
+        )
+
+        all_data_configs: Dict = self.app.config.get("yager", "data")
+        layout_tables: Set[str] = {
+            table["name"] for table in all_data_configs["layout"]
+        }
+
+        database_query: Optional[Cursor] = self._query_db(
+            "SELECT name FROM sqlite_master WHERE type == 'table';"
+        )
+        existing_tables: Set[str] = (
+            {row[0] for row in database_query.fetchall()} if database_query else set()
+        )
+
+        if changed_tables is not None:
+            modified: Set[str] = modified_tables(self.app.db_cursor)
+            if modified:
+                self.app.log.info(
+                    "Tables changed since last rebuild: {}".format(
+                        ", ".join(sorted(modified))
+                    )
+                )
+
+            changed_tables = changed_tables | modified
+
+        stale: List[Dict] = stale_tables(materialized, changed_tables, existing_tables)
+        failed: bool = False
+
+        for table in materialized:
+            if table not in stale:
+                self.app.log.info(
+                    "Materialized table '{}' is up to date".format(table["name"])
+                )
+
+        for table in stale:
+            table_name: str = table["name"]
+
+            if table_name in layout_tables:
+                self.app.log.error(
+                    "Materialized table '{}' conflicts with a layout table".format(
+                        table_name
+                    )
+                )
+                continue
+
+            self.app.log.info("Rebuilding materialized table '{}'".format(table_name))
+
+            try:
+                row_count: int = rebuild_table(
+                    self.app.db_cursor,
+                    table_name,
+                    table["query"],
+                    table.get("columns", "").replace("\n", ""),
+                )
+            except Error as e:
+                self.app.log.error(
+                    "Failed to rebuild materialized table '{}': {}".format(
+                        table_name, str(e)
+                    )
+                )
+                failed = True
+                continue
+
+            self.app.metrics.add_rows("materialize", row_count)
+            self.app.log.info(
+                "Total records in materialized table '{}': {}".format(
+                    table_name, row_count
+                )
+            )
+
+            self._create_indexes(table)
+
+        # keep changes recorded, so tables failed to rebuild are retried
+        if not failed:
+            track_changes(self.app.db_cursor, materialized)
+
+    def _load_csv_file(self, file_path: Path, table: Dict) -> None:
+        """Load CSV file into table.
+
+        Helper to map the CSV header to table columns once and insert rows
+        with values converted according to the declared column types or
+        the converters in the `csv` section of the table config. Files
+        compressed with gzip, bz2 or xz are decompressed on the fly.
+
+        Parameters
+        ----------
+        file_path
+            Path to CSV file.
+        table
+            Config of the CSV-backed table.
+        """
+        from ..core.decompress import open_input
+        from ..core.ingest import CsvRows
+        from ..core.writer import (
+            DEFAULT_BATCH_SIZE,
+            DEFAULT_TRANSACTION_SIZE,
+            TableWriter,
+        )
+
+        csv_options: Dict = table.get("csv") or {}
+        encoding: str = csv_options.get("encoding", "utf-8")
+
+        self.app.log.info("Inserting data from CSV file '{}'".format(file_path))
+
+        table_info: Optional[Cursor] = self._query_db(
+            "PRAGMA table_info({})".format(table["name"])
+        )
+        if table_info is None:
+            return
+
+        column_types: Dict[str, str] = {
+            column[1]: column[2] for column in table_info.fetchall()
+        }
+
+        try:
+            csv_file: TextIO = open_input(file_path, "r", encoding=encoding, newline="")
+        except LookupError:
+            raise YagerError(
+                "Unknown encoding '{}' of CSV file '{}'".format(encoding, file_path)
+            )
+
+        with csv_file:
+            csv_rows: CsvRows = CsvRows(
+                csv_file,
+                column_types,
+                csv_options.get("converters"),
+                csv_options.get("delimiter", ","),
+            )
+
+            if csv_rows.skipped:
+                self.app.log.warning(
+                    "Skipping CSV columns not found in table '{}': {}".format(
+                        table["name"], ", ".join(csv_rows.skipped)
+                    )
+                )
+
+            table_writer: TableWriter = TableWriter(
+                self.app.db_cursor,
+                table["name"],
+                csv_rows.columns,
+                table.get("batch_size", DEFAULT_BATCH_SIZE),
+                table.get("transaction_size", DEFAULT_TRANSACTION_SIZE),
+                self.app.log,
+                self._metrics,
+            )
+
+            try:
+                for row in csv_rows:
+                    table_writer.write(row)
+            except UnicodeDecodeError as e:
+                raise YagerError(
+                    "Failed to decode CSV file '{}' as '{}': {}".format(
+                        file_path, encoding, str(e)
+                    )
+                )
+
+            self.app.metrics.add_rows("csv_load", table_writer.close())
+
+    def _load_xml_files(
+        self,
+        file_paths: List[str],
+        xml_tables: Dict[str, Dict],
+        xml_parser: str,
+        parametrized_lookup: str,
+        jobs: int = 1,
+        manifest: Optional["Manifest"] = None,
+    ) -> None:
+        """Load XML files into tables.
+
+        Helper to parse each file in `file_paths` once and insert its elements
+        into every table with a matching `data_source` XPath. With more than
+        one job, files are parsed in parallel by a process pool and rows are
+        inserted in the same order a sequential run would insert them.
+
+        Parameters
+        ----------
+        file_paths
+            Paths to XML files.
+        xml_tables
+            Mapping between table names and configs of XML-backed tables.
+        xml_parser
+            Parser to use (``tree`` or ``stream``).
+        parametrized_lookup
+            Resolution of parametrized inputs (``xpath`` or ``index``).
+        jobs
+            Number of worker processes parsing files.
+        manifest
+            Manifest to record provenance of inserted rows with.
+        """
+        from ..core.ingest import compile_plans, iter_xml_rows
+        from ..core.parallel import iter_xml_batches
+        from ..core.writer import (
+            DEFAULT_BATCH_SIZE,
+            DEFAULT_TRANSACTION_SIZE,
+            TableWriter,
+        )
+
+        # compile input maps once for all files, failing on invalid ones before
+        # any file is parsed
+        plans: Dict[str, ExtractionPlan] = compile_plans(
+            xml_tables, parametrized_lookup
+        )
+        table_writers: Dict[str, TableWriter] = {}
+
+        for table_name, table in xml_tables.items():
+            self.app.log.info(
+                "Inserting elements matching XPath '{}' into table '{}'".format(
+                    table["data_source"].split(":")[1], table_name
+                )
+            )
+
+            table_writers[table_name] = TableWriter(
+                self.app.db_cursor,
+                table_name,
+                list(plans[table_name].columns),
+                table.get("batch_size", DEFAULT_BATCH_SIZE),
+                table.get("transaction_size", DEFAULT_TRANSACTION_SIZE),
+                self.app.log,
+                self._metrics,
+            )
+
+        if jobs > 1 and len(file_paths) > 1:
+            self.app.log.info(
+                "Parsing {} XML files with {} jobs".format(len(file_paths), jobs)
+            )
+
+            current_file: Optional[str] = None
+
+            # parsing and extraction happen in workers, so only the time
+            # spent waiting for their batches is measured
+            for file_path, table_name, rows in self.app.metrics.iterate(
+                "xml_workers",
+                iter_xml_batches(
+                    file_paths, xml_tables, xml_parser, parametrized_lookup, jobs
+                ),
+            ):
+                if file_path != current_file:
+                    current_file = file_path
+                    self._switch_xml_source(file_path, table_writers, manifest)
+
+                    self.app.log.info(
+                        "Inserting data from XML file '{}'".format(file_path)
+                    )
+
+                table_writers[table_name].write_many(rows)
+
+        else:
+            for file_path in file_paths:
+                self._switch_xml_source(file_path, table_writers, manifest)
+
+                self.app.log.info("Inserting data from XML file '{}'".format(file_path))
+
+                for table_name, row in iter_xml_rows(
+                    file_path,
+                    xml_tables,
+                    xml_parser,
+                    parametrized_lookup,
+                    self._metrics,
+                    plans,
+                ):
+                    table_writers[table_name].write(row)
+
+        for table_writer in table_writers.values():
+            table_writer.close()
+
+        if manifest:
+            manifest.set_source(None)
+
+    def _switch_xml_source(
+        self,
+        file_path: str,
+        table_writers: Dict[str, "TableWriter"],
+        manifest: Optional["Manifest"],
+    ) -> None:
+        """Attribute rows inserted from now on to another XML file.
+
+        Parameters
+        ----------
+        file_path
+            Path to XML file rows are about to be inserted from.
+        table_writers
+            Writers with rows buffered from the previous file.
+        manifest
+            Manifest to record provenance of inserted rows with.
+        """
+        if manifest:
+            for table_writer in table_writers.values():
+                table_writer.flush()
+
+            manifest.set_source(file_path)
+
+    @ex(
+        help="execute a query against database",
+        arguments=[
+            (
+                ["--output", "-o"],
+                {
+                    "help": "defines how to format the output (choose from 'csv', 'jsonl', 'table' or 'tsv'; default: 'table')",  # noqa: E501
+                    "action": "store",
+                    "metavar": "FORMAT",
+                    "required": False,
+                    "dest": "output_format",
+                    "choices": OUTPUT_FORMATS,
+                    "default": "table",
+                },
+            ),
+            (
+                ["--chunk-size"],
+                {
+                    "help": "number of rows fetched and written at a time \
+                        in 'csv', 'jsonl' and 'tsv' formats (default: {})".format(
+                        DEFAULT_CHUNK_SIZE
+                    ),
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "chunk_size",
+                    "default": DEFAULT_CHUNK_SIZE,
+                },
+            ),
+            (
+                ["--limit", "-l"],
+                {
+                    "help": "maximum number of rows shown in 'table' format, \
+                        0 shows all rows (default: {})".format(
+                        DEFAULT_TABLE_LIMIT
+                    ),
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "limit",
+                    "default": DEFAULT_TABLE_LIMIT,
+                },
+            ),
+            (["sql_query"], {"help": "query to be executed", "metavar": "QUERY"},),
+        ],
+    )
+    def query(self) -> None:
+        """Execute a query against the app database."""
+        from ..core.output import write_result, write_table
+
+        # Stop processing, if DB is not available
+        if self.app.db_cursor is None:
+            self.app.log.error("No database connection")
+            return
+
+        # get required params from CLI
+        out_format: str = self.app.pargs.output_format
+        sql_query: str = self.app.pargs.sql_query
+        limit: int = self.app.pargs.limit
+
+        with self.app.metrics.phase("sql_query"):
+            sql_response: Optional[Cursor] = self._query_db(sql_query)
+        if sql_response is None or sql_response.description is None:
+            return
+
+        try:
+            # rows are fetched while written, so output includes fetching
+            with self.app.metrics.phase("output"):
+                if out_format == "table":
+                    if write_table(sql_response, sys.stdout, limit):
+                        self.app.log.info(
+                            "Showing first {} rows, use '--limit' to change".format(
+                                limit
+                            )
+                        )
+
+                else:
+                    self.app.metrics.add_rows(
+                        "output",
+                        write_result(
+                            sql_response,
+                            sys.stdout,
+                            out_format,
+                            self.app.pargs.chunk_size,
+                        ),
+                    )
+
+        except Error as e:
+            self.app.log.error("Unable to fetch query results: {}".format(e))
+
+    @ex(
+        help="execute a pre-configured report",
+        arguments=[
+            (
+                ["--param", "-p"],
+                {
+                    "help": "NAME=VALUE pair defining a global query parameter \
+                        to be used for each query in the template \
+                        (could be repetated)",
+                    "action": "append",
+                    "metavar": "PARAM",
+                    "dest": "param_list",
+                },
+            ),
+            (
+                ["--jobs", "-j"],
+                {
+                    "help": "number of queries executed concurrently with \
+                        read-only connections (default: 1)",
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "jobs",
+                    "default": 1,
+                },
+            ),
+            (
+                ["--batch", "-b"],
+                {
+                    "help": "render report into a file per parameter set \
+                        from 'sql:QUERY', 'csv:PATH' or 'list:NAME=VALUE,...'",
+                    "metavar": "SOURCE",
+                    "dest": "batch",
+                },
+            ),
+            (
+                ["--output-dir", "-o"],
+                {
+                    "help": "directory to write reports rendered in batch mode \
+                        into (default: current directory)",
+                    "metavar": "PATH",
+                    "dest": "output_dir",
+                    "default": ".",
+                },
+            ),
+            (
+                ["--output-name"],
+                {
+                    "help": "name of files with reports rendered in batch mode \
+                        with parameter names in curly brackets \
+                        (default: '{report}_{NAME}...')",
+                    "metavar": "PATTERN",
+                    "dest": "output_name",
+                },
+            ),
+            (
+                ["--processes"],
+                {
+                    "help": "number of worker processes rendering reports \
+                        in batch mode (default: 1)",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "processes",
+                    "default": 1,
+                },
+            ),
+            (
+                ["--stream", "-s"],
+                {
+                    "help": "fetch rows of queries with all variables mapped \
+                        to '*' lazily while rendering, and write the report \
+                        as it is rendered",
+                    "action": "store_true",
+                    "dest": "stream",
+                },
+            ),
+            (
+                ["--chunk-size"],
+                {
+                    "help": "number of rows fetched at a time in streaming mode \
+                        (default: {})".format(
+                        DEFAULT_CHUNK_SIZE
+                    ),
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "chunk_size",
+                    "default": DEFAULT_CHUNK_SIZE,
+                },
+            ),
+            (["report_name"], {"help": "report to be executed", "metavar": "NAME"},),
+        ],
+    )
+    def report(self) -> None:
+        """Execute a pre-configured report."""
+        from ..core.report import (
+            ReportRenderer,
+            RowSet,
+            iter_param_sets,
+            load_template,
+            output_file_name,
+            render_batch,
+        )
+
+        # Stop processing, if DB is not available
+        if self.app.db_cursor is None:
+            self.app.log.error("No database connection")
+            return
+
+        # get required params from app config
+        all_report_configs: List[Dict] = self.app.config.get("yager", "reports")
+        all_report_names: List[str] = list(map(lambda x: x["name"], all_report_configs))
+
+        # get required params from CLI
+        query_params_list: List = self.app.pargs.param_list or []
+        jobs: int = self.app.pargs.jobs
+        batch: Optional[str] = self.app.pargs.batch
+        processes: int = self.app.pargs.processes
+        chunk_size: Optional[int] = (
+            self.app.pargs.chunk_size if self.app.pargs.stream else None
+        )
+
+        report_name: str = self.app.pargs.report_name
+        if report_name not in all_report_names:
+            self.app.log.error("Unknown report name '{}'".format(report_name))
+            self.app.log.debug(
+                "Available reports are: '{}'".format("','".join(all_report_names))
+            )
+
+            return
+
+        # init local vars
+        report_config: Dict = all_report_configs[all_report_names.index(report_name)]
+        template_params: List = report_config["template_params"]
+        template_dir: str = self.app.config.get("yager", "data")["template_dir"]
+        report_cache: Optional[ResultCache] = self._open_report_cache()
+
+        # convert CLI list of query params to a dict
+        quey_params_dict: Dict = {
+            query_param.split("=")[0]: query_param.split("=")[1]
+            for query_param in query_params_list
+        }
+        self.app.log.debug("Token values from CLI: '{}'".format(quey_params_dict))
 
-        arguments = [
-            (["-v", "--version"], {"action": "version", "version": VERSION_BANNER}),
-        ]
+        self.app.log.info(
+            "Executing report template '{}'".format(report_config["name"])
+        )
 
-    def _query_db(self, sql_query: str) -> Optional[Cursor]:
-        """Query database.
+        template_cache_config: Dict = self.app.config.get("yager", "data").get(
+            "template_cache", {}
+        )
+        bytecode_cache: bool = template_cache_config.get("enabled", True)
+        bytecode_cache_dir: Optional[str] = template_cache_config.get("dir")
+
+        with self.app.metrics.phase("template_load"):
+            template: Template = load_template(
+                template_dir,
+                report_config["template_file"],
+                bytecode_cache,
+                bytecode_cache_dir,
+            )
 
-        Helper to execute `sql_query` against the app database.
+        def fetch(queries: List["Query"]) -> List[Optional["QueryResult"]]:
+            for sql_query, used_params in queries:
+                self.app.log.debug(
+                    "Preparing query '{}' with '{}'".format(sql_query, used_params)
+                )
 
-        Parameters
-        ----------
-        sql_query
-            SQLite3 query to be executed.
+            return self._fetch_report_data(queries, report_cache, jobs)
 
-        Returns
-        -------
-        :obj:`~typing.Optional` [:obj:`~sqlite3.Cursor`]
-            If successful, returns :obj:`~sqlite3.Cursor` with results.
-            Otherwise returns ``None``.
-        """
-        # Stop processing, if DB is not available
-        if self.app.db_cursor is None:
-            self.app.log.error("No database connection")
-            return
+        renderer: ReportRenderer = ReportRenderer(
+            template,
+            template_params,
+            fetch,
+            None
+            if chunk_size is None
+            else lambda sql_query: RowSet(
+                sql_query, self.app.db_cursor.connection, chunk_size
+            ),
+        )
 
-        self.app.log.debug("Executing query '{}'".format(sql_query))
+        if batch is None:
+            self._write_report(renderer, quey_params_dict, sys.stdout)
 
-        response: Optional[Cursor] = None
+        else:
+            # render report into a file per parameter set
+            output_dir: Path = Path(self.app.pargs.output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            outputs: List[Tuple[Dict[str, str], str]] = []
+            for param_set in iter_param_sets(batch, self.app.db_cursor):
+                outputs.append(
+                    (
+                        {**quey_params_dict, **param_set},
+                        str(
+                            output_dir
+                            / output_file_name(
+                                self.app.pargs.output_name, report_config, param_set
+                            )
+                        ),
+                    )
+                )
 
-        try:
-            response = self.app.db_cursor.execute(sql_query)
+            self.app.log.info(
+                "Rendering report for {} parameter sets into '{}'".format(
+                    len(outputs), output_dir
+                )
+            )
 
-        except OperationalError as e:
-            self.app.log.error("sqlite3.OperationalError: {}".format(str(e)))
+            if processes > 1 and self._main_db_path():
+                db_uri, pragmas = get_db_settings(self.app, read_only=True)
+
+                for output_path, problems in self.app.metrics.iterate(
+                    "render_workers",
+                    render_batch(
+                        db_uri,
+                        pragmas,
+                        template_dir,
+                        report_config["template_file"],
+                        template_params,
+                        outputs,
+                        processes,
+                        chunk_size,
+                        bytecode_cache,
+                        bytecode_cache_dir,
+                    ),
+                ):
+                    for problem in problems:
+                        self.app.log.error(problem)
+
+                    self.app.log.info("Rendered report '{}'".format(output_path))
 
-        except Error as e:
-            self.app.log.error("Unexpected Error: {}".format(str(e)))
+            else:
+                for params, output_path in outputs:
+                    with open(output_path, "w") as output_file:
+                        self._write_report(renderer, params, output_file)
 
-            if self.app.debug:
-                import traceback
+                    self.app.log.info("Rendered report '{}'".format(output_path))
 
-                traceback.print_exc()
+        if report_cache:
+            cache_stats: CacheStats = report_cache.stats()
+            self.app.log.info(
+                "Report cache: {} hits, {} misses ({} hits, {} misses in total)".format(
+                    report_cache.hits,
+                    report_cache.misses,
+                    cache_stats.hits,
+                    cache_stats.misses,
+                )
+            )
+            report_cache.close()
 
-        else:
-            return response
+        self.app.log.info("Finished report template '{}'".format(report_config["name"]))
 
     @ex(
-        help="execute a query against database",
+        help="export tables and query results into files",
         arguments=[
             (
-                ["--output", "-o"],
+                ["--query", "-q"],
+                {
+                    "help": "NAME=QUERY pair defining a query to export result of \
+                        into file NAME (could be repeated)",
+                    "action": "append",
+                    "metavar": "QUERY",
+                    "dest": "query_list",
+                },
+            ),
+            (
+                ["--format", "-f"],
                 {
-                    "help": "defines how to format the output (choose from 'csv' or 'table'; default: 'table')",  # noqa: E501
+                    "help": "format of exported files (choose from 'csv', 'jsonl' \
+                        or 'tsv'; default: 'csv')",
                     "action": "store",
                     "metavar": "FORMAT",
-                    "required": False,
-                    "dest": "output_format",
-                    "choices": ["csv", "table"],
-                    "default": "table",
+                    "dest": "out_format",
+                    "choices": ["csv", "jsonl", "tsv"],
+                    "default": "csv",
                 },
             ),
-            (["sql_query"], {"help": "query to be executed", "metavar": "QUERY"},),
+            (
+                ["--output-dir", "-o"],
+                {
+                    "help": "directory to write exported files into \
+                        (default: current directory)",
+                    "action": "store",
+                    "metavar": "PATH",
+                    "dest": "output_dir",
+                    "default": ".",
+                },
+            ),
+            (
+                ["--max-rows"],
+                {
+                    "help": "split output into files of at most N rows \
+                        (default: 0, no limit)",
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "max_rows",
+                    "default": 0,
+                },
+            ),
+            (
+                ["--max-size"],
+                {
+                    "help": "split output into files of at most MB megabytes \
+                        before compression (default: 0, no limit)",
+                    "action": "store",
+                    "metavar": "MB",
+                    "type": float,
+                    "dest": "max_size",
+                    "default": 0,
+                },
+            ),
+            (
+                ["--gzip", "-z"],
+                {
+                    "help": "compress exported files with gzip",
+                    "action": "store_true",
+                    "dest": "compress",
+                },
+            ),
+            (
+                ["--jobs", "-j"],
+                {
+                    "help": "number of exports running concurrently with \
+                        read-only connections (default: 1)",
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "jobs",
+                    "default": 1,
+                },
+            ),
+            (
+                ["--chunk-size"],
+                {
+                    "help": "number of rows fetched and written at a time \
+                        (default: {})".format(
+                        DEFAULT_CHUNK_SIZE
+                    ),
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "chunk_size",
+                    "default": DEFAULT_CHUNK_SIZE,
+                },
+            ),
+            (
+                ["table_list"],
+                {"help": "table to be exported", "metavar": "TABLE", "nargs": "*"},
+            ),
         ],
     )
-    def query(self) -> None:
-        """Execute a query against the app database."""
+    def export(self) -> None:
+        """Export tables and query results of the app database into files."""
+        from ..core.export import export_query
+
         # Stop processing, if DB is not available
         if self.app.db_cursor is None:
             self.app.log.error("No database connection")
             return
 
         # get required params from CLI
-        out_format: str = self.app.pargs.output_format
-        sql_query: str = self.app.pargs.sql_query
+        out_format: str = self.app.pargs.out_format
+        output_dir: Path = Path(self.app.pargs.output_dir)
+        jobs: int = self.app.pargs.jobs
 
-        # init local vars
-        sql_header: List[str] = []
-        sql_response: Optional[Cursor] = None
-        sql_data: List[str] = []
+        exports: List[Tuple[str, str]] = [
+            (table_name, 'SELECT * FROM "{}"'.format(table_name.replace('"', '""')))
+            for table_name in self.app.pargs.table_list
+        ]
+        for query_def in self.app.pargs.query_list or []:
+            name, _, sql_query = query_def.partition("=")
+            if not name or not sql_query:
+                self.app.log.error("Invalid query definition '{}'".format(query_def))
+                return
 
-        sql_response = self._query_db(sql_query)
-        if sql_response:
-            sql_header = list(map(lambda x: x[0], self.app.db_cursor.description))
-            sql_data = sql_response.fetchall()
+            exports.append((name, sql_query))
 
-            if out_format == "table":
-                print(tabulate(sql_data, headers=sql_header))
+        if not exports:
+            self.app.log.error("Nothing to export, give tables or '--query'")
+            return
 
-            elif out_format == "csv":
-                self.app.render(
-                    {"records": sql_data, "header": sql_header}, "output_csv.j2",
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        def export_result(name: str, sql_query: str, db_cursor: Cursor) -> None:
+            self.app.log.info("Exporting '{}'".format(name))
+
+            try:
+                output: ChunkedFile = export_query(
+                    db_cursor,
+                    sql_query,
+                    output_dir / "{}.{}".format(name, out_format),
+                    out_format,
+                    self.app.pargs.max_rows,
+                    int(self.app.pargs.max_size * 1024 * 1024),
+                    self.app.pargs.compress,
+                    self.app.pargs.chunk_size,
                 )
+            except (Error, OSError) as e:
+                self.app.log.error("Unable to export '{}': {}".format(name, e))
+                return
 
-            else:
-                self.app.log.error("Unknown output format {}".format(out_format))
+            self.app.log.info(
+                "Exported {} rows of '{}' into {} files".format(
+                    output.row_count, name, len(output.paths)
+                )
+            )
+
+        if jobs > 1 and len(exports) > 1 and self._main_db_path():
+            db_cursors: Queue = Queue()
+            for _ in range(min(jobs, len(exports))):
+                db_cursors.put(open_db(self.app, read_only=True))
+
+            def export_with_pool(name: str, sql_query: str) -> None:
+                db_cursor: Optional[Cursor] = db_cursors.get()
+                try:
+                    if db_cursor:
+                        export_result(name, sql_query, db_cursor)
+                finally:
+                    db_cursors.put(db_cursor)
+
+            self.app.log.info(
+                "Exporting {} results with {} connections".format(
+                    len(exports), db_cursors.qsize()
+                )
+            )
+
+            with ThreadPoolExecutor(max_workers=db_cursors.qsize()) as executor:
+                list(executor.map(lambda args: export_with_pool(*args), exports))
+
+            while not db_cursors.empty():
+                db_cursor: Optional[Cursor] = db_cursors.get()
+                if db_cursor:
+                    db_cursor.connection.close()
+
+        else:
+            for name, sql_query in exports:
+                export_result(name, sql_query, self.app.db_cursor)
+
+    @ex(help="back up database and remove expired backups")
+    def backup(self) -> None:
+        """Back up the app database."""
+        # Stop processing, if DB is not available
+        if self.app.db_cursor is None:
+            self.app.log.error("No database connection")
+            return
+
+        main_db_path: Optional[Path] = self._main_db_path()
+        if main_db_path is None:
+            self.app.log.error("Backup requires a database file")
+            return
+
+        self._backup_db(main_db_path)
 
     @ex(
-        help="execute a pre-configured report",
+        help="restore database from backup",
         arguments=[
             (
-                ["--param", "-p"],
+                ["backup_path"],
                 {
-                    "help": "NAME=VALUE pair defining a global query parameter \
-                        to be used for each query in the template \
-                        (could be repetated)",
-                    "action": "append",
-                    "metavar": "PARAM",
-                    "dest": "param_list",
+                    "help": "backup to be restored (default: the latest one)",
+                    "metavar": "PATH",
+                    "nargs": "?",
                 },
             ),
-            (["report_name"], {"help": "report to be executed", "metavar": "NAME"},),
         ],
     )
-    def report(self) -> None:
-        """Execute a pre-configured report."""
+    def restore(self) -> None:
+        """Restore the app database from backup."""
+        from ..core.backup import DEFAULT_PAGES_PER_STEP, list_backups, restore_db
+
         # Stop processing, if DB is not available
         if self.app.db_cursor is None:
             self.app.log.error("No database connection")
             return
 
         # get required params from app config
-        all_report_configs: List[Dict] = self.app.config.get("yager", "reports")
-        all_report_names: List[str] = list(map(lambda x: x["name"], all_report_configs))
+        backup_config: Dict = self.app.config.get("yager", "data").get("backup", {})
 
         # get required params from CLI
-        query_params_list: List = self.app.pargs.param_list
-
-        report_name: str = self.app.pargs.report_name
-        if report_name not in all_report_names:
-            self.app.log.error("Unknown report name '{}'".format(report_name))
-            self.app.log.debug(
-                "Available reports are: '{}'".format("','".join(all_report_names))
-            )
-
-            return
-
-        # init local vars
-        report_config: Dict = all_report_configs[all_report_names.index(report_name)]
-        template_params: List = report_config["template_params"]
-        template_input_data: Dict = {}
-
-        self.app.log.info(
-            "Executing report template '{}'".format(report_config["name"])
-        )
+        backup_path: Optional[str] = self.app.pargs.backup_path
 
-        for param in template_params:
-            # expand possible query parameters
-            sql_query_parametrized: str = param["query"]
-            self.app.log.debug("Preparing query '{}'".format(sql_query_parametrized))
+        if backup_path is None:
+            main_db_path: Optional[Path] = self._main_db_path()
+            if main_db_path is None:
+                self.app.log.error("Restore requires a database file")
+                return
 
-            query_keys = [
-                t[1]
-                for t in Formatter().parse(sql_query_parametrized)
-                if t[1] is not None
-            ]
-            self.app.log.debug("Tokens used by query: '{}'".format(query_keys))
-
-            # convert CLI list of query params to a dict
-            quey_params_dict: Dict = {
-                query_param.split("=")[0]: query_param.split("=")[1]
-                for query_param in query_params_list
-            }
-            self.app.log.debug("Token values from CLI: '{}'".format(quey_params_dict))
-
-            sql_query: str = sql_query_parametrized.format(**quey_params_dict)
-
-            sql_result: Optional[Cursor] = None
-            var_mapping: Dict = param["var_mapping"]
-
-            sql_result = self._query_db(sql_query)
-            if sql_result:
-                data_tuples: List = sql_result.fetchall()
-                data_header: List = [h[0] for h in sql_result.description]
-                data_dicts: List[Dict] = [
-                    {key: value for key, value in zip(data_header, row)}
-                    for row in data_tuples
-                ]
+            backups: List[Path] = list_backups(
+                Path(backup_config.get("dir", main_db_path.parent)), main_db_path.name
+            )
+            if not backups:
+                self.app.log.error("No backups found for '{}'".format(main_db_path))
+                return
 
-                self.app.log.debug("Resulting data '{}'".format(data_dicts))
+            backup_path = str(backups[-1])
 
-                for var_key, var_value in var_mapping.items():
-                    if var_value == "*":
-                        template_input_data.update({var_key: data_dicts})
-                    else:
-                        template_input_data.update(
-                            {var_key: data_dicts[0].get(var_value, "None")}
-                        )
+        self.app.log.info("Restoring DB from '{}'".format(backup_path))
 
-        jinja_env: Environment = Environment(  # noqa: S701
-            loader=FileSystemLoader(
-                self.app.config.get("yager", "data")["template_dir"]
-            ),
-            autoescape=False,
+        restore_db(
+            Path(backup_path),
+            self.app.db_cursor.connection,
+            backup_config.get("pages_per_step", DEFAULT_PAGES_PER_STEP),
         )
-        template = jinja_env.get_template(report_config["template_file"])
-        output_from_parsed_template = template.render(template_input_data)
-        print(output_from_parsed_template)
 
-        self.app.log.info("Finished report template '{}'".format(report_config["name"]))
+        self.app.log.info("Restored DB from '{}'".format(backup_path))
 
     @ex(
         help="generate database from configured data sources",
@@ -243,17 +1360,49 @@ class Base(Controller):
             (
                 ["--file", "-f"],
                 {
-                    "help": "path to XML file with data \
-                        (could be repetated)",
+                    "help": "path to XML file with data, optionally \
+                        compressed with gzip, bz2 or xz (could be repetated)",
                     "action": "append",
                     "metavar": "PATH",
                     "dest": "xml_list",
                 },
             ),
+            (
+                ["--jobs", "-j"],
+                {
+                    "help": "number of worker processes parsing XML files \
+                        in parallel (default: 1)",
+                    "action": "store",
+                    "metavar": "N",
+                    "type": int,
+                    "dest": "jobs",
+                    "default": 1,
+                },
+            ),
+            (
+                ["--shadow", "-s"],
+                {
+                    "help": "load data into a shadow copy of the database \
+                        and swap it in once loaded and validated",
+                    "action": "store_true",
+                    "dest": "shadow",
+                },
+            ),
+            (
+                ["--incremental", "-i"],
+                {
+                    "help": "ingest only data sources changed since the last \
+                        incremental refresh and replace their rows",
+                    "action": "store_true",
+                    "dest": "incremental",
+                },
+            ),
         ],
     )
     def refresh_db(self) -> None:
         """Generate database from configured layout and data sources."""
+        from ..core.shadow import ShadowDatabase
+
         # Stop processing, if DB is not available
         if self.app.db_cursor is None:
             self.app.log.error("No database connection")
@@ -263,33 +1412,126 @@ class Base(Controller):
         all_data_configs: List[Dict] = self.app.config.get("yager", "data")
 
         # get required params from CLI
-        xml_files: str = self.app.pargs.xml_list
+        xml_files: List[str] = self.app.pargs.xml_list
+        jobs: int = self.app.pargs.jobs
+        incremental: bool = self.app.pargs.incremental
+        shadow: bool = self.app.pargs.shadow
 
-        # init local vars
-        database_query: Optional[Cursor] = None
+        backup_config: Dict = all_data_configs.get("backup", {})
 
         # make backup of main DB
-        database_query = self._query_db("PRAGMA database_list;")
-        if database_query:
-            db_list: List = database_query.fetchall()
-            db_name_dict: Dict = dict(map(lambda x: (x[1], x[2]), db_list))
-            main_db_path: str = Path(db_name_dict["main"])
-            db_backup_name: str = "{}.{}.bak".format(
-                main_db_path.name, int(datetime.utcnow().timestamp())
-            )
+        main_db_path: Optional[Path] = self._main_db_path()
+        if main_db_path and backup_config.get("enabled", True):
+            with self.app.metrics.phase("backup"):
+                self._backup_db(main_db_path)
 
-            self.app.log.info(
-                "Backup DB '{}' as '{}'".format(main_db_path, db_backup_name)
+        if not shadow:
+            self._refresh_tables(xml_files, jobs, incremental)
+            return
+
+        if not main_db_path or not main_db_path.is_file():
+            self.app.log.error("Shadow rebuild requires a database file")
+            return
+
+        shadow_db: ShadowDatabase = ShadowDatabase(main_db_path)
+        live_cursor: Cursor = self.app.db_cursor
+
+        self.app.log.info("Building shadow database '{}'".format(shadow_db.path))
+
+        with self.app.metrics.phase("shadow_create"):
+            shadow_db.create(
+                live_cursor.connection,
+                ["*"] if incremental else all_data_configs["exclude_from_refresh"],
             )
 
-            copyfile(
-                main_db_path, main_db_path.with_name(db_backup_name),
+        # load data into the shadow database instead of the live one
+        self.app.db_cursor = shadow_db.cursor
+        try:
+            self._refresh_tables(xml_files, jobs, incremental)
+        except BaseException:
+            shadow_db.discard()
+            raise
+        finally:
+            self.app.db_cursor = live_cursor
+
+        with self.app.metrics.phase("shadow_validate"):
+            problems: List[str] = shadow_db.validate(
+                [
+                    table["name"]
+                    for table in all_data_configs["layout"]
+                    + (all_data_configs.get("materialized") or [])
+                ]
             )
+        if problems:
+            for problem in problems:
+                self.app.log.error("Shadow database is invalid: {}".format(problem))
 
-        # delete all tables  from existing DB but leave excluded ones
-        database_query = self._query_db(
-            "SELECT name FROM sqlite_master WHERE type == 'table';"
+            shadow_db.discard()
+            self.app.log.error("Live database '{}' is left intact".format(main_db_path))
+            return
+
+        self.app.log.info(
+            "Replacing live database '{}' with shadow database".format(main_db_path)
+        )
+        with self.app.metrics.phase("shadow_swap"):
+            shadow_db.swap(live_cursor.connection)
+        self.app.db_cursor = open_db(self.app)
+
+    def _refresh_tables(
+        self, xml_files: Optional[List[str]], jobs: int, incremental: bool
+    ) -> None:
+        """Drop, create and load tables.
+
+        Helper to rebuild tables of the app database according to the
+        configured layout and data sources.
+
+        Parameters
+        ----------
+        xml_files
+            Paths to XML files with data.
+        jobs
+            Number of worker processes parsing XML files.
+        incremental
+            Whether to ingest only data sources changed since the last
+            incremental refresh.
+        """
+        from ..core.manifest import Manifest
+        from ..core.materialize import untrack_changes
+
+        # get required params from app config
+        all_data_configs: List[Dict] = self.app.config.get("yager", "data")
+
+        xml_parser: str = all_data_configs.get("xml_parser", "tree")
+        parametrized_lookup: str = all_data_configs.get("parametrized_lookup", "xpath")
+
+        # init local vars
+        database_query: Optional[Cursor] = None
+        manifest: Optional[Manifest] = None
+        xml_tables: Dict[str, Dict] = {}
+        # keys of data source files given to this refresh
+        sources: Set[str] = set()
+
+        if incremental:
+            manifest = Manifest(self.app.db_cursor)
+
+            if manifest.exists():
+                self.app.log.info("Refreshing data from changed sources only")
+            else:
+                self.app.log.info("No ingestion manifest found, refreshing all data")
+
+        # names of tables changed by an incremental refresh, all of them
+        # change otherwise
+        changed_tables: Optional[Set[str]] = (
+            set() if manifest and manifest.exists() else None
         )
+
+        # delete all tables  from existing DB but leave excluded ones
+        database_query = None
+        if not (manifest and manifest.exists()):
+            untrack_changes(self.app.db_cursor)
+            database_query = self._query_db(
+                "SELECT name FROM sqlite_master WHERE type == 'table';"
+            )
         if database_query:
             table_list: List[str] = database_query.fetchall()
 
@@ -297,10 +1539,14 @@ class Base(Controller):
                 table = record_tuple[0]
                 if table not in all_data_configs["exclude_from_refresh"]:
                     self.app.log.info("Deleting table '{}'".format(table))
-                    self._query_db("DROP TABLE {};".format(table))
+                    with self.app.metrics.phase("drop_table"):
+                        self._query_db("DROP TABLE {};".format(table))
                 else:
                     self.app.log.info("Leaving table '{}' untouched".format(table))
 
+        if manifest:
+            manifest.create()
+
         # create table layout
         for table in all_data_configs["layout"]:
             table_name: str = table["name"]
@@ -318,133 +1564,110 @@ class Base(Controller):
             )
             if data_source_type == "csv":
                 data_source_path: Path = Path(data_source)
-                row_count: int = 0
-
-                self.app.log.info(
-                    "Inserting data from CSV file '{}'".format(data_source_path)
-                )
 
-                # read data from CSV
-                with open(data_source_path, "r") as csv_file:
-                    csv_data = DictReader(csv_file)
+                if manifest:
+                    sources.add(manifest.source_key(data_source))
 
-                    self._query_db("BEGIN TRANSACTION")
-
-                    for row in csv_data:
-                        self._query_db(
-                            "INSERT OR IGNORE INTO {} ({}) VALUES ('{}')".format(
-                                table_name,
-                                ",".join(row.keys()),
-                                "','".join(row.values()),
-                            )
+                    signature: Optional[SourceSignature] = manifest.check(
+                        data_source, [table_name]
+                    )
+                    if signature is None:
+                        self.app.log.info(
+                            "Skipping unchanged CSV file '{}'".format(data_source_path)
                         )
+                        continue
 
-                        row_count += 1
-
-                        # Commit to DB every 100 records
-                        if row_count % 100 == 0:
-                            self._query_db("COMMIT")
+                    self._forget_source(manifest, data_source)
+                    manifest.track([table_name])
+                    manifest.set_source(data_source)
 
-                            self.app.log.info(
-                                "Inserted {} records...".format(row_count)
-                            )
+                with self.app.metrics.phase("csv_load"):
+                    self._load_csv_file(data_source_path, table)
 
-                            self._query_db("BEGIN TRANSACTION")
+                if changed_tables is not None:
+                    changed_tables.add(table_name)
 
-                    self._query_db("COMMIT")
-
-                self.app.log.info("Total records inserted: {}".format(row_count))
+                if manifest:
+                    manifest.set_source(None)
+                    manifest.record(data_source, signature, [table_name])
 
             elif data_source_type == "xml":
-                if xml_files:
-                    for file_path in xml_files:
-                        element_count: int = 0
-
-                        self.app.log.info(
-                            "Inserting data from XML file '{}'".format(file_path)
-                        )
+                xml_tables.update({table_name: table})
 
-                        xml_root: Element = xml_parse(file_path).getroot()  # noqa: S314
-
-                        self.app.log.info(
-                            "Finding all elements matching XPath '{}'".format(
-                                data_source
-                            )
-                        )
+            else:
+                self.app.log.error(
+                    "Unknown data source type '{}'".format(data_source_type)
+                )
 
-                        xml_data: List[Element] = xml_root.findall(data_source)
-                        self.app.log.info("Found {} elements".format(len(xml_data)))
+        # load all XML-backed tables with a single pass over each file
+        if xml_tables:
+            if xml_files:
+                xml_signatures: Dict[str, SourceSignature] = {}
 
-                        self._query_db("BEGIN TRANSACTION")
+                if manifest:
+                    for file_path in xml_files:
+                        sources.add(manifest.source_key(file_path))
 
-                        for element in xml_data:
-                            input_map: Dict[str] = table["input_map"]
-                            input_map_parametrized: Dict[str] = table.get(
-                                "input_map_parametrized", {}
-                            )
-                            row: Dict[str] = {}
-
-                            # Expand straightforward input paramenters into values
-                            for input_key, input_value_map in input_map.items():
-                                element_mapped: Optional[Element] = element.find(
-                                    input_value_map
-                                )
-
-                                if element_mapped is not None:
-                                    input_value: str = element_mapped.text
-                                else:
-                                    input_value = "undefined"
-
-                                row.update({input_key: input_value})
-
-                            # Expand parametrized input paramenters into values
-                            for (
-                                input_key,
-                                input_value_map,
-                            ) in input_map_parametrized.items():
-                                input_value_map_expanded = input_value_map.format(**row)
-
-                                element_mapped: Optional[Element] = xml_root.find(
-                                    input_value_map_expanded
-                                )
-
-                                if element_mapped is not None:
-                                    input_value: str = element_mapped.text
-                                else:
-                                    input_value = "undefined"
-
-                                row.update({input_key: input_value})
-
-                            self._query_db(
-                                "INSERT OR IGNORE INTO {} ({}) VALUES ('{}')".format(
-                                    table_name,
-                                    ",".join(row.keys()),
-                                    "','".join(row.values()),
-                                )
+                        signature = manifest.check(file_path, list(xml_tables))
+                        if signature is None:
+                            self.app.log.info(
+                                "Skipping unchanged XML file '{}'".format(file_path)
                             )
+                            continue
 
-                            element_count += 1
-
-                            # Commit to DB every 100 records
-                            if element_count % 100 == 0:
-                                self._query_db("COMMIT")
+                        self._forget_source(manifest, file_path)
+                        xml_signatures[file_path] = signature
 
-                                self.app.log.info(
-                                    "Inserted {} records...".format(element_count)
-                                )
+                    xml_files = list(xml_signatures)
+                    manifest.track(list(xml_tables))
 
-                                self._query_db("BEGIN TRANSACTION")
-
-                        self._query_db("COMMIT")
+                if xml_files:
+                    self._load_xml_files(
+                        xml_files,
+                        xml_tables,
+                        xml_parser,
+                        parametrized_lookup,
+                        jobs,
+                        manifest,
+                    )
 
-                        self.app.log.info(
-                            "Total records inserted: {}".format(element_count)
-                        )
+                    if changed_tables is not None:
+                        changed_tables.update(xml_tables)
 
-                else:
-                    self.app.log.error("No XML files specified for data input")
+                for file_path, signature in xml_signatures.items():
+                    manifest.record(file_path, signature, list(xml_tables))
 
             else:
-                self.app.log.error(
-                    "Unknown data source type '{}'".format(data_source_type)
+                self.app.log.error("No XML files specified for data input")
+
+        # rows of sources ingested before, but no longer given, are deleted
+        # as a full refresh would do
+        if manifest:
+            for source in manifest.sources():
+                if source in sources:
+                    continue
+
+                self.app.log.info("Forgetting removed data source '{}'".format(source))
+                deleted: Dict[str, int] = self._forget_source(
+                    manifest, source, remove=True
                 )
+
+                if changed_tables is not None:
+                    changed_tables.update(deleted)
+
+        # build indexes once data is loaded, which is faster than maintaining
+        # them while inserting rows, and refresh statistics of query planner
+        with self.app.metrics.phase("create_indexes"):
+            for table in all_data_configs["layout"]:
+                self._create_indexes(table)
+
+        # rebuild summary tables from the loaded data before analyzing, so
+        # the query planner has statistics for them too
+        materialized: List[Dict] = all_data_configs.get("materialized") or []
+        if materialized:
+            with self.app.metrics.phase("materialize"):
+                self._refresh_materialized(materialized, changed_tables)
+
+        self.app.log.info("Analyzing database")
+        with self.app.metrics.phase("analyze"):
+            self._query_db("ANALYZE;")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Database backup module."""
+import gzip
+from datetime import datetime, timedelta
+from os import replace
+from pathlib import Path
+from shutil import copyfileobj
+from sqlite3 import Connection, connect
+from tempfile import NamedTemporaryFile
+from typing import Callable, List, Optional
+
+DEFAULT_PAGES_PER_STEP = 1024
+
+_GZIP_SUFFIX = ".gz"
+
+
+def _backup_timestamp(backup_path: Path) -> int:
+    """Return timestamp encoded in backup file name."""
+    name: str = backup_path.name
+
+    if name.endswith(_GZIP_SUFFIX):
+        name = name[: -len(_GZIP_SUFFIX)]
+
+    try:
+        return int(name.split(".")[-2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def list_backups(backup_dir: Path, db_name: str) -> List[Path]:
+    """List backups of database.
+
+    Parameters
+    ----------
+    backup_dir
+        Directory with backups.
+    db_name
+        File name of the backed up database.
+
+    Returns
+    -------
+    :obj:`~typing.List` [:obj:`~pathlib.Path`]
+        Paths to backups, from the oldest to the latest one.
+    """
+    backups: List[Path] = list(backup_dir.glob("{}.*.bak".format(db_name)))
+    backups.extend(backup_dir.glob("{}.*.bak{}".format(db_name, _GZIP_SUFFIX)))
+
+    return sorted(backups, key=_backup_timestamp)
+
+
+def backup_db(
+    connection: Connection,
+    backup_dir: Path,
+    db_name: str,
+    pages: int = DEFAULT_PAGES_PER_STEP,
+    compress: bool = False,
+    progress: Optional[Callable[[int, int, int], None]] = None,
+) -> Path:
+    """Back up database with the SQLite online backup API.
+
+    The database is copied `pages` pages at a time, so other connections
+    could access it in between the steps, and a consistent snapshot is
+    produced even if the database is modified during the backup. The backup
+    is written under a temporary name and renamed once complete.
+
+    Parameters
+    ----------
+    connection
+        Connection to the database to back up.
+    backup_dir
+        Directory to store backup in.
+    db_name
+        File name of the backed up database.
+    pages
+        Number of pages copied at each step (``-1`` copies all at once).
+    compress
+        Whether to compress the backup with gzip.
+    progress
+        Callback receiving status, remaining and total pages after each step.
+
+    Returns
+    -------
+    :obj:`~pathlib.Path`
+        Path to the backup.
+    """
+    backup_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp: int = int(datetime.utcnow().timestamp())
+    while list(backup_dir.glob("{}.{}.bak*".format(db_name, timestamp))):
+        timestamp += 1
+
+    backup_path: Path = backup_dir / "{}.{}.bak".format(db_name, timestamp)
+    temp_path: Path = backup_path.with_name(backup_path.name + ".tmp")
+
+    try:
+        backup_connection: Connection = connect(str(temp_path))
+        try:
+            connection.backup(backup_connection, pages=pages, progress=progress)
+        finally:
+            backup_connection.close()
+
+        if compress:
+            backup_path = backup_path.with_name(backup_path.name + _GZIP_SUFFIX)
+            compressed_path: Path = backup_path.with_name(backup_path.name + ".tmp")
+
+            with open(str(temp_path), "rb") as backup_file, gzip.open(
+                str(compressed_path), "wb"
+            ) as gzip_file:
+                copyfileobj(backup_file, gzip_file)
+
+            temp_path.unlink()
+            temp_path = compressed_path
+
+        replace(str(temp_path), str(backup_path))
+
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+    return backup_path
+
+
+def restore_db(
+    backup_path: Path,
+    connection: Connection,
+    pages: int = DEFAULT_PAGES_PER_STEP,
+    progress: Optional[Callable[[int, int, int], None]] = None,
+) -> None:
+    """Restore database from backup with the SQLite online backup API.
+
+    Parameters
+    ----------
+    backup_path
+        Path to the backup, optionally compressed with gzip.
+    connection
+        Connection to the database to be overwritten with the backup.
+    pages
+        Number of pages copied at each step (``-1`` copies all at once).
+    progress
+        Callback receiving status, remaining and total pages after each step.
+    """
+    with NamedTemporaryFile(dir=str(backup_path.parent), suffix=".tmp") as temp_file:
+        source_path: str = str(backup_path)
+
+        if backup_path.name.endswith(_GZIP_SUFFIX):
+            with gzip.open(str(backup_path), "rb") as gzip_file:
+                copyfileobj(gzip_file, temp_file)
+
+            temp_file.flush()
+            source_path = temp_file.name
+
+        source_connection: Connection = connect(source_path)
+        try:
+            source_connection.backup(connection, pages=pages, progress=progress)
+        finally:
+            source_connection.close()
+
+
+def prune_backups(
+    backup_dir: Path,
+    db_name: str,
+    keep_last: Optional[int] = None,
+    max_age: Optional[timedelta] = None,
+) -> List[Path]:
+    """Remove backups according to retention policy.
+
+    Parameters
+    ----------
+    backup_dir
+        Directory with backups.
+    db_name
+        File name of the backed up database.
+    keep_last
+        Number of the latest backups to keep.
+    max_age
+        Maximum age of backups to keep.
+
+    Returns
+    -------
+    :obj:`~typing.List` [:obj:`~pathlib.Path`]
+        Paths to removed backups.
+    """
+    backups: List[Path] = list_backups(backup_dir, db_name)
+    expired: List[Path] = []
+
+    if keep_last is not None:
+        expired.extend(backups[: max(0, len(backups) - keep_last)])
+
+    if max_age is not None:
+        oldest: float = (datetime.utcnow() - max_age).timestamp()
+        expired.extend(
+            backup_path
+            for backup_path in backups
+            if _backup_timestamp(backup_path) < oldest and backup_path not in expired
+        )
+
+    for backup_path in expired:
+        backup_path.unlink()
+
+    return expired
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""Query result cache module."""
+import json
+import pickle  # noqa: S403
+from hashlib import sha256
+from pathlib import Path
+from sqlite3 import Connection, connect
+from time import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_MAX_SIZE_MB = 256
+
+_CACHE_TABLE = "results"
+_STATS_TABLE = "stats"
+
+
+class CacheStats(NamedTuple):
+    """Numbers of cache hits and misses."""
+
+    hits: int
+    misses: int
+
+
+def database_version(db_path: Path) -> str:
+    """Return marker changing with every change of the database file.
+
+    The marker is made of inode, size and modification time of the database
+    file and its write-ahead log, so it changes on every committed write as
+    well as when the file is replaced (e.g. by a shadow refresh).
+
+    Parameters
+    ----------
+    db_path
+        Path to the database file.
+
+    Returns
+    -------
+    str
+        Database version marker.
+    """
+    version: List[Tuple[int, int, int]] = []
+
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        if path.exists():
+            stat = path.stat()
+            version.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+
+    return json.dumps(version)
+
+
+class ResultCache:
+    """Class implementing on-disk cache of query results.
+
+    Results are stored in a separate SQLite3 database, so they survive across
+    app runs. Entries are keyed on the SQL query and its parameters, and
+    entries cached for other versions of the database are removed when the
+    cache is opened. Once the cache grows over `max_size` bytes, the least
+    recently used entries are evicted.
+
+    Parameters
+    ----------
+    path
+        Path to the cache database file.
+    db_version
+        Version marker of the database results are cached for, see
+        :func:`database_version`.
+    max_size
+        Maximum size of cached results in bytes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        db_version: str,
+        max_size: int = DEFAULT_MAX_SIZE_MB * 1024 * 1024,
+    ) -> None:
+        """Open cache and drop entries of other database versions."""
+        self.path: Path = path
+        self.db_version: str = db_version
+        self.max_size: int = max_size
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.connection: Connection = connect(str(path), timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "key TEXT PRIMARY KEY, db_version TEXT, result BLOB, size INTEGER, "
+            "accessed REAL)".format(_CACHE_TABLE)
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "name TEXT PRIMARY KEY, value INTEGER)".format(_STATS_TABLE)
+        )
+        self.connection.execute(
+            "DELETE FROM {} WHERE db_version != ?".format(_CACHE_TABLE), (db_version,),
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def key(sql_query: str, params: Dict[str, Any]) -> str:
+        """Return cache key of query.
+
+        Parameters
+        ----------
+        sql_query
+            SQL query with parameters already expanded.
+        params
+            Parameters used by the query.
+
+        Returns
+        -------
+        str
+            Hex digest identifying the query.
+        """
+        return sha256(
+            json.dumps([sql_query, params], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(
+        self, sql_query: str, params: Dict[str, Any]
+    ) -> Optional[Tuple[List[str], List[Tuple]]]:
+        """Return cached query result.
+
+        Parameters
+        ----------
+        sql_query
+            SQL query with parameters already expanded.
+        params
+            Parameters used by the query.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`~typing.Tuple`]
+            Column names and rows, if the result is cached.
+            Otherwise returns ``None``.
+        """
+        key: str = self.key(sql_query, params)
+        record = self.connection.execute(
+            "SELECT result FROM {} WHERE key == ? AND db_version == ?".format(
+                _CACHE_TABLE
+            ),
+            (key, self.db_version),
+        ).fetchone()
+
+        if record is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE {} SET accessed = ? WHERE key == ?".format(_CACHE_TABLE),
+            (time(), key),
+        )
+        self.connection.commit()
+
+        return pickle.loads(record[0])  # noqa: S301
+
+    def put(
+        self,
+        sql_query: str,
+        params: Dict[str, Any],
+        header: List[str],
+        rows: List[Tuple],
+    ) -> None:
+        """Store query result and evict the least recently used ones.
+
+        Parameters
+        ----------
+        sql_query
+            SQL query with parameters already expanded.
+        params
+            Parameters used by the query.
+        header
+            Column names of the result.
+        rows
+            Rows of the result.
+        """
+        result: bytes = pickle.dumps((header, rows), pickle.HIGHEST_PROTOCOL)
+
+        if len(result) > self.max_size:
+            return
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?)".format(_CACHE_TABLE),
+            (self.key(sql_query, params), self.db_version, result, len(result), time()),
+        )
+        self._evict()
+        self.connection.commit()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries over the size limit."""
+        total_size: int = self.connection.execute(
+            "SELECT coalesce(sum(size), 0) FROM {}".format(_CACHE_TABLE)
+        ).fetchone()[0]
+
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM {} ORDER BY accessed".format(_CACHE_TABLE)
+        ).fetchall():
+            if total_size <= self.max_size:
+                break
+
+            self.connection.execute(
+                "DELETE FROM {} WHERE key == ?".format(_CACHE_TABLE), (key,)
+            )
+            total_size -= size
+
+    def stats(self) -> CacheStats:
+        """Return numbers of hits and misses over all app runs.
+
+        Returns
+        -------
+        :class:`CacheStats`
+            Total numbers of cache hits and misses.
+        """
+        recorded: Dict[str, int] = dict(
+            self.connection.execute(
+                "SELECT name, value FROM {}".format(_STATS_TABLE)
+            ).fetchall()
+        )
+
+        return CacheStats(
+            recorded.get("hits", 0) + self.hits, recorded.get("misses", 0) + self.misses
+        )
+
+    def close(self) -> None:
+        """Record hit and miss statistics and close the cache."""
+        for name, value in self.stats()._asdict().items():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO {} VALUES (?, ?)".format(_STATS_TABLE),
+                (name, value),
+            )
+
+        self.connection.commit()
+        self.connection.close()
+
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""Input file decompression module."""
+import io
+from pathlib import Path
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import Any, IO, List, Optional, Tuple, Union
+
+from .exc import YagerError
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_BUFFER_CHUNKS = 8
+
+# Magic numbers at the beginning of compressed files
+_MAGIC_NUMBERS: List[Tuple[bytes, str]] = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """Detect compression of file from its magic number.
+
+    Parameters
+    ----------
+    path
+        Path to the file.
+
+    Returns
+    -------
+    :obj:`~typing.Optional` [:obj:`str`]
+        ``gzip``, ``bz2`` or ``xz``, or ``None`` if the file is not
+        compressed with any of them.
+    """
+    with open(str(path), "rb") as input_file:
+        header: bytes = input_file.read(6)
+
+    for magic_number, compression in _MAGIC_NUMBERS:
+        if header.startswith(magic_number):
+            return compression
+
+    return None
+
+
+def _open_compressed(path: Union[str, Path], compression: str) -> IO[bytes]:
+    """Open compressed file for reading of decompressed bytes."""
+    # imported here, as only compressed inputs need them and `lzma` may be
+    # missing in Python builds without liblzma
+    try:
+        if compression == "gzip":
+            import gzip
+
+            return gzip.open(str(path), "rb")
+
+        if compression == "bz2":
+            import bz2
+
+            return bz2.open(str(path), "rb")
+
+        import lzma
+
+        return lzma.open(str(path), "rb")
+
+    except ImportError:
+        raise YagerError(
+            "Reading of {} files is not supported by this Python build".format(
+                compression
+            )
+        )
+
+
+class ThreadedReader(io.RawIOBase):
+    """Class implementing stream read ahead by a background thread.
+
+    A reader thread reads `source` in chunks into a bounded buffer, while
+    the stream returns chunks from the buffer. Decompressors release the GIL
+    while decompressing, so reading a compressed file this way overlaps
+    decompression with processing of the data already read, e.g. parsing.
+    The buffer holds at most `buffer_chunks` chunks, which bounds memory
+    usage when the data is processed slower than it is decompressed.
+
+    Errors raised by `source` are raised by the stream once it reaches the
+    point the error occurred at.
+
+    Parameters
+    ----------
+    source
+        Binary stream to read from, closed along with this stream.
+    chunk_size
+        Number of bytes read from `source` at a time.
+    buffer_chunks
+        Maximum number of chunks read ahead.
+    """
+
+    def __init__(
+        self,
+        source: IO[bytes],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+    ) -> None:
+        """Initialize stream and start the reader thread."""
+        super().__init__()
+
+        self.source: IO[bytes] = source
+        self.chunk_size: int = max(1, chunk_size)
+
+        self._chunks: Queue = Queue(maxsize=max(1, buffer_chunks))
+        self._closing: Event = Event()
+        self._chunk: memoryview = memoryview(b"")
+        self._eof: bool = False
+
+        self._thread: Thread = Thread(target=self._read_source, daemon=True)
+        self._thread.start()
+
+    def _read_source(self) -> None:
+        """Read chunks into the buffer until the end of the source."""
+        try:
+            while not self._closing.is_set():
+                chunk: bytes = self.source.read(self.chunk_size)
+                self._put(chunk)
+
+                # an empty chunk marks the end of the source
+                if not chunk:
+                    return
+
+        except Exception as e:  # noqa: B902
+            self._put(e)
+
+    def _put(self, item: Any) -> None:
+        """Put item into the buffer, unless the stream is closed meanwhile."""
+        while not self._closing.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def readable(self) -> bool:
+        """Return ``True``, as the stream is readable."""
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        """Read bytes into a pre-allocated buffer.
+
+        Parameters
+        ----------
+        buffer
+            Writable bytes-like object.
+
+        Returns
+        -------
+        int
+            Number of bytes read, ``0`` at the end of the stream.
+        """
+        if not self._chunk:
+            if self._eof:
+                return 0
+
+            item: Any = self._chunks.get()
+
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+
+            if not item:
+                self._eof = True
+                return 0
+
+            self._chunk = memoryview(item)
+
+        size: int = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+
+        return size
+
+    def close(self) -> None:
+        """Stop the reader thread and close the source."""
+        if not self.closed:
+            self._closing.set()
+            self._thread.join()
+            self.source.close()
+
+        super().close()
+
+
+def open_input(
+    path: Union[str, Path],
+    mode: str = "rb",
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+) -> IO:
+    """Open input file, decompressing gzip, bz2 or xz files on the fly.
+
+    Compression is detected from the magic number of the file rather than
+    from its name. Compressed files are decompressed by a
+    :class:`ThreadedReader`, so nothing is written to disk.
+
+    Parameters
+    ----------
+    path
+        Path to the file.
+    mode
+        ``rb`` for a binary stream, ``r`` for a text one.
+    encoding
+        Encoding of a text stream.
+    newline
+        Handling of line endings in a text stream, see :func:`open`.
+    chunk_size
+        Number of decompressed bytes read ahead at a time.
+    buffer_chunks
+        Maximum number of decompressed chunks read ahead.
+
+    Returns
+    -------
+    :obj:`~typing.IO`
+        Stream of decompressed data.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If the Python build can not decompress the file.
+    """
+    compression: Optional[str] = detect_compression(path)
+    binary: bool = "b" in mode
+
+    if compression is None:
+        if binary:
+            return open(str(path), "rb")
+
+        return open(str(path), "r", encoding=encoding, newline=newline)
+
+    stream: io.BufferedReader = io.BufferedReader(
+        ThreadedReader(_open_compressed(path, compression), chunk_size, buffer_chunks)
+    )
+
+    if binary:
+        return stream
+
+    try:
+        return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+    except LookupError:
+        stream.close()
+        raise
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Data export module."""
+import gzip
+from pathlib import Path
+from sqlite3 import Cursor, Error
+from typing import Iterable, List, Optional, TextIO
+
+from .output import DEFAULT_CHUNK_SIZE, write_result
+
+_GZIP_SUFFIX = ".gz"
+
+
+class ChunkedFile:
+    """Class implementing text stream split into numbered part files.
+
+    Every :meth:`write` call is expected to write one complete row, which is
+    how :func:`~yager.core.output.write_result` writes rows. A new part file
+    is started once the current one holds `max_rows` rows or `max_bytes`
+    bytes of uncompressed text, and the header rows written first are
+    repeated at the beginning of each part.
+
+    Parameters
+    ----------
+    path
+        Path to the output file. If the output is split, part numbers are
+        inserted before the suffix (e.g. ``Vulns.0001.csv``).
+    header_rows
+        Number of rows written first, which are repeated in each part.
+    max_rows
+        Maximum number of rows in a part file (``0`` means no limit).
+    max_bytes
+        Maximum size of a part file in bytes (``0`` means no limit).
+    compress
+        Whether to compress part files with gzip.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        header_rows: int = 0,
+        max_rows: int = 0,
+        max_bytes: int = 0,
+        compress: bool = False,
+    ) -> None:
+        """Initialize output without opening any part file."""
+        self.path: Path = path
+        self.header_rows: int = header_rows
+        self.max_rows: int = max_rows
+        self.max_bytes: int = max_bytes
+        self.compress: bool = compress
+
+        self.paths: List[Path] = []
+        self.row_count: int = 0
+
+        self._header: List[str] = []
+        self._part: Optional[TextIO] = None
+        self._part_rows: int = 0
+        self._part_bytes: int = 0
+
+    def _part_path(self) -> Path:
+        """Return path to the next part file."""
+        path: Path = self.path
+
+        if self.max_rows > 0 or self.max_bytes > 0:
+            path = path.with_name(
+                "{}.{:04d}{}".format(path.stem, len(self.paths) + 1, path.suffix)
+            )
+
+        if self.compress:
+            path = path.with_name(path.name + _GZIP_SUFFIX)
+
+        return path
+
+    def _open_part(self) -> None:
+        """Close the current part file and start a new one with the header."""
+        if self._part is not None:
+            self._part.close()
+
+        path: Path = self._part_path()
+        self._part = (
+            gzip.open(str(path), "wt", encoding="utf-8", newline="")
+            if self.compress
+            else open(str(path), "w", encoding="utf-8", newline="")
+        )
+        self.paths.append(path)
+
+        self._part_rows = 0
+        self._part_bytes = 0
+        for header in self._header:
+            self._part.write(header)
+            self._part_bytes += len(header.encode("utf-8"))
+
+    def write(self, text: str) -> int:
+        """Write one row, starting a new part file if the current one is full.
+
+        Parameters
+        ----------
+        text
+            Formatted row including the line terminator.
+
+        Returns
+        -------
+        int
+            Number of characters written.
+        """
+        if len(self._header) < self.header_rows:
+            self._header.append(text)
+            return len(text)
+
+        size: int = len(text.encode("utf-8"))
+
+        if (
+            self._part is None
+            or (self.max_rows > 0 and self._part_rows >= self.max_rows)
+            or (
+                self.max_bytes > 0
+                and self._part_rows > 0
+                and self._part_bytes + size > self.max_bytes
+            )
+        ):
+            self._open_part()
+
+        self.row_count += 1
+        self._part_rows += 1
+        self._part_bytes += size
+
+        return self._part.write(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        """Write rows, each of them with :meth:`write`."""
+        for text in lines:
+            self.write(text)
+
+    def close(self) -> None:
+        """Close the last part file, creating it if no rows were written."""
+        if self._part is None:
+            self._open_part()
+
+        self._part.close()
+        self._part = None
+
+    def discard(self) -> None:
+        """Close and remove all part files."""
+        if self._part is not None:
+            self._part.close()
+            self._part = None
+
+        for path in self.paths:
+            if path.exists():
+                path.unlink()
+
+        self.paths = []
+
+
+def export_query(
+    db_cursor: Cursor,
+    sql_query: str,
+    path: Path,
+    out_format: str = "csv",
+    max_rows: int = 0,
+    max_bytes: int = 0,
+    compress: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ChunkedFile:
+    """Export query result into one or more files.
+
+    Rows are fetched and written `chunk_size` rows at a time, so tables of
+    any size are exported in constant memory. Files of a failed export are
+    removed.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor to execute the query with.
+    sql_query
+        SQL query to export result of.
+    path
+        Path to the output file, see :class:`ChunkedFile`.
+    out_format
+        Output format, ``csv``, ``tsv`` or ``jsonl``.
+    max_rows
+        Maximum number of rows in a file (``0`` means no limit).
+    max_bytes
+        Maximum size of a file in bytes (``0`` means no limit).
+    compress
+        Whether to compress files with gzip.
+    chunk_size
+        Number of rows fetched and written at a time.
+
+    Returns
+    -------
+    :class:`ChunkedFile`
+        Closed output with paths to written files in ``paths`` and number
+        of exported rows in ``row_count``.
+
+    Raises
+    ------
+    :obj:`~sqlite3.Error`
+        If the query fails.
+    """
+    output: ChunkedFile = ChunkedFile(
+        path,
+        header_rows=0 if out_format == "jsonl" else 1,
+        max_rows=max_rows,
+        max_bytes=max_bytes,
+        compress=compress,
+    )
+
+    try:
+        db_cursor.execute(sql_query)
+        write_result(db_cursor, output, out_format, chunk_size)
+        output.close()
+    except (Error, OSError):
+        output.discard()
+        raise
+
+    return output
@@ -1,36 +1,186 @@
 # -*- coding: utf-8 -*-
 """Framework hooks module."""
+import sys
+from pathlib import Path
 from sqlite3 import Connection, Cursor, Error, OperationalError, connect
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
 from cement import App
 
+from .metrics import Metrics
 from .version import get_version
 
+# Connection profiles applied to the database depending on the workload
+DEFAULT_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "bulk_load": {
+        "pragmas": {
+            "synchronous": "NORMAL",
+            "cache_size": -262144,
+            "temp_store": "MEMORY",
+        },
+    },
+    "read": {
+        "pragmas": {
+            "cache_size": -65536,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+    },
+}
 
-def load_db(app: App) -> None:
-    """Extend app with SQLite3 database.
+# Connection profiles used by subcommands
+COMMAND_PROFILES: Dict[str, str] = {
+    "export": "read",
+    "refresh-db": "bulk_load",
+    "query": "read",
+    "report": "read",
+}
 
-    Reads data from configured SQLite3 URI.
+
+def get_profile(app: App) -> Optional[str]:
+    """Return name of the connection profile for the invoked subcommand.
+
+    The subcommand is taken from the parsed arguments, as the database is
+    opened only after them.
 
     Parameters
     ----------
     app
         Cement Framework application object.
+
+    Returns
+    -------
+    :obj:`~typing.Optional` [:obj:`str`]
+        Name of the connection profile, if the subcommand has one.
+    """
+    command: Optional[str] = getattr(app.pargs, "command", None)
+
+    return COMMAND_PROFILES.get(command)
+
+
+def profile_uri(db_uri: str, uri_params: Dict[str, Any]) -> str:
+    """Add query parameters to SQLite3 database URI.
+
+    Parameters
+    ----------
+    db_uri
+        URI or path to the SQLite3 database.
+    uri_params
+        URI query parameters (e.g. ``mode``, ``immutable``).
+
+    Returns
+    -------
+    str
+        URI with the query parameters.
+    """
+    if not uri_params or db_uri == ":memory:":
+        return db_uri
+
+    if not db_uri.startswith("file:"):
+        db_uri = Path(db_uri).resolve().as_uri()
+
+    return "{}{}{}".format(db_uri, "&" if "?" in db_uri else "?", urlencode(uri_params))
+
+
+def apply_pragmas(db_cursor: Cursor, pragmas: Dict[str, Any]) -> List[str]:
+    """Apply settings to SQLite3 database connection.
+
+    ``page_size`` is applied first, as it could only be changed before the
+    database switches to WAL journal mode.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor of the database connection.
+    pragmas
+        Mapping between pragma names and values.
+
+    Returns
+    -------
+    :obj:`~typing.List` [:obj:`str`]
+        Settings failed to be applied along with the reasons.
     """
-    app.log.debug("Extending app object with database connection")
+    problems: List[str] = []
+
+    for pragma, value in sorted(
+        pragmas.items(), key=lambda pragma: pragma[0] != "page_size"
+    ):
+        try:
+            db_cursor.execute("PRAGMA {} = {}".format(pragma, value)).fetchall()
+        except Error as e:
+            problems.append(
+                "Failed to set PRAGMA {} = {}: {}".format(pragma, value, str(e))
+            )
+
+    return problems
+
+
+def get_db_settings(app: App, read_only: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """Return URI and settings of SQLite3 database connection.
+
+    The configured SQLite3 URI and settings are combined with the connection
+    profile of the invoked subcommand.
+
+    Parameters
+    ----------
+    app
+        Cement Framework application object.
+    read_only
+        Whether to open the database read-only.
 
+    Returns
+    -------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`~typing.Dict`]
+        Database URI and mapping between pragma names and values.
+    """
     data_config: Dict[str, str] = app.config.get("yager", "data")
-    if data_config:
-        db_uri: str = data_config.get("db_uri", "file:/home/user/.yager/data/sqlite.db")
+    db_uri: str = data_config.get("db_uri", "file:/home/user/.yager/data/sqlite.db")
+
+    profile_name: Optional[str] = get_profile(app)
+    profile: Dict[str, Dict[str, Any]] = {
+        **DEFAULT_PROFILES,
+        **data_config.get("profiles", {}),
+    }.get(profile_name, {})
+
+    uri_params: Dict[str, Any] = profile.get("uri_params", {})
+    if read_only:
+        uri_params = {**uri_params, "mode": "ro"}
+
+    app.log.debug("Using '{}' connection profile".format(profile_name))  # noqa: G001
+
+    return profile_uri(db_uri, uri_params), profile.get("pragmas", {})
+
+
+def open_db(app: App, read_only: bool = False) -> Optional[Cursor]:
+    """Open SQLite3 database.
+
+    Connects to the configured SQLite3 URI with the connection profile of
+    the invoked subcommand.
+
+    Parameters
+    ----------
+    app
+        Cement Framework application object.
+    read_only
+        Whether to open the database read-only. Read-only connections could
+        be used by threads other than the one they were opened in.
+
+    Returns
+    -------
+    :obj:`~typing.Optional` [:obj:`~sqlite3.Cursor`]
+        If successful, returns :obj:`~sqlite3.Cursor` of a new connection.
+        Otherwise returns ``None``.
+    """
+    db_uri, pragmas = get_db_settings(app, read_only)
 
     app.log.debug("Using database at '{}'".format(db_uri))  # noqa: G001
 
     try:
-        db_connection: Connection = connect(db_uri)
+        db_connection: Connection = connect(
+            db_uri, uri=True, check_same_thread=not read_only
+        )
     except OperationalError as e:
-        app.extend("db_cursor", None)
-
         app.log.error("OperationalError: {}".format(str(e)))  # noqa: G001
 
         if app.debug:
@@ -48,7 +198,64 @@ def load_db(app: App) -> None:
 
                 traceback.print_exc()
         else:
-            app.extend("db_cursor", db_cursor)
+            for problem in apply_pragmas(db_cursor, pragmas):
+                app.log.warning(problem)
+
+            return db_cursor
+
+    return None
+
+
+def load_metrics(app: App) -> None:
+    """Extend app with performance metrics collector.
+
+    Parameters
+    ----------
+    app
+        Cement Framework application object.
+    """
+    app.extend("metrics", Metrics())
+
+
+def start_metrics(app: App) -> None:
+    """Start collecting performance metrics, if requested in CLI.
+
+    Parameters
+    ----------
+    app
+        Cement Framework application object.
+    """
+    if app.pargs.profile or app.pargs.metrics_file or app.pargs.cprofile_file:
+        app.metrics.start(profile_calls=app.pargs.cprofile_file is not None)
+
+
+def report_metrics(app: App) -> None:
+    """Print and save collected performance metrics.
+
+    Parameters
+    ----------
+    app
+        Cement Framework application object.
+    """
+    if not app.metrics.enabled:
+        return
+
+    app.metrics.stop()
+
+    if app.pargs.profile:
+        print(app.metrics.summary(), file=sys.stderr)
+
+    if app.pargs.metrics_file:
+        app.metrics.write(Path(app.pargs.metrics_file))
+        app.log.info(  # noqa: G001
+            "Metrics written to '{}'".format(app.pargs.metrics_file)
+        )
+
+    if app.pargs.cprofile_file:
+        app.metrics.profiler.dump_stats(app.pargs.cprofile_file)
+        app.log.info(  # noqa: G001
+            "Profile of function calls written to '{}'".format(app.pargs.cprofile_file)
+        )
 
 
 def log_app_version(app: App) -> None:
@@ -0,0 +1,1157 @@
+# -*- coding: utf-8 -*-
+"""Data ingestion module."""
+import csv
+import math
+import re
+from string import Formatter
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    TextIO,
+    Tuple,
+)
+from xml.etree.ElementPath import xpath_tokenizer  # noqa: S405
+from xml.etree.ElementTree import (  # noqa: S405
+    Element,
+    iterparse as xml_iterparse,
+    parse as xml_parse,
+)
+
+from .decompress import open_input
+from .exc import YagerError
+from .metrics import Metrics
+
+UNDEFINED_VALUE = "undefined"
+
+# Parametrized XPath which could be resolved through a lookup index, e.g.
+# `.//HostAssetVuln/[hostInstanceVulnId='{id}']/.../.../.../id`
+_INDEXED_XPATH = re.compile(
+    r"^\.//(?P<tag>[^/\[\]]+)/?"
+    r"\[(?P<key_path>[^=\[\]]+)=(?P<quote>['\"])\{(?P<key>\w+)\}(?P=quote)\]"
+    r"(?P<value_path>.*)$"
+)
+
+# Separator used to join tag names into a path string for XPath matching;
+# it can not appear inside a tag name, even a namespace-qualified one
+_PATH_SEP = "\n"
+
+# Step of an `input_map` path resolved by walking children, i.e. a plain tag
+_PLAIN_STEP = re.compile(r"^[^./\[\]{}@()*:][^/\[\]{}@()*:]*$")
+
+# Column name a replacement field of parametrized XPath refers to
+_FIELD_NAME = re.compile(r"[^.\[]*")
+
+# Range of integers SQLite stores as INTEGER, larger ones do not fit 64 bits
+_MIN_INTEGER = -(2 ** 63)
+_MAX_INTEGER = 2 ** 63 - 1
+
+# Text values converted into booleans, stored as integers by SQLite
+_BOOLEANS: Dict[str, int] = {
+    "1": 1,
+    "true": 1,
+    "yes": 1,
+    "y": 1,
+    "on": 1,
+    "0": 0,
+    "false": 0,
+    "no": 0,
+    "n": 0,
+    "off": 0,
+}
+
+
+def compile_path_matcher(xpath: str) -> Callable[[List[str]], bool]:
+    """Compile XPath into a tag path matcher.
+
+    Converts a predicate-free XPath (e.g. ``.//HostAsset`` or ``./data/*``)
+    into a callable checking whether a stack of tag names, starting from
+    the document root, points to an element the XPath would select with
+    ``root.findall(xpath)``.
+
+    Parameters
+    ----------
+    xpath
+        XPath relative to the document root.
+
+    Returns
+    -------
+    :obj:`~typing.Callable`
+        Function accepting a list of tag names and returning ``True``
+        on match.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If XPath uses features not supported by the streaming parser.
+    """
+    if not xpath or xpath.startswith("/") or re.search(r"[\[\]@()]|\.\.", xpath):
+        raise YagerError(
+            "XPath '{}' is not supported by the streaming parser".format(xpath)
+        )
+
+    steps: List[str] = xpath.split("/")
+    if steps[0] == ".":
+        steps = steps[1:]
+
+    regex: str = ""
+    descendant: bool = False
+
+    for step in steps:
+        if step == "":
+            descendant = True
+            continue
+
+        if step == ".":
+            continue
+
+        if descendant:
+            regex += "(?:{0}[^{0}]+)*".format(_PATH_SEP)
+            descendant = False
+
+        if step == "*":
+            regex += "{0}[^{0}]+".format(_PATH_SEP)
+        else:
+            regex += _PATH_SEP + re.escape(step)
+
+    if descendant or not regex:
+        raise YagerError(
+            "XPath '{}' is not supported by the streaming parser".format(xpath)
+        )
+
+    pattern: Pattern = re.compile("^{}$".format(regex))
+
+    def match(tag_path: List[str]) -> bool:
+        # XPath is relative to the root, so the root itself never matches
+        if len(tag_path) < 2:
+            return False
+
+        return pattern.match(_PATH_SEP + _PATH_SEP.join(tag_path[1:])) is not None
+
+    return match
+
+
+class _IndexedLookup(NamedTuple):
+    """Parsed parametrized XPath resolved through a lookup index."""
+
+    tag: str
+    key_path: str
+    key: str
+    parent_steps: int
+    value_path: str
+
+
+class LookupIndex:
+    """Class implementing lookup index for parametrized input maps.
+
+    Parametrized XPath like ``.//{tag}/[{key_path}='{{{column}}}']{value_path}``
+    would otherwise be evaluated against the whole document for every row.
+    Instead, the index maps each `key_path` value found under `tag` elements
+    to the text `value_path` points at, so every lookup is a dict access.
+    Leading parent steps of `value_path` (``..`` or ``...``) are resolved
+    through the ancestors of indexed elements.
+
+    Parametrized XPath not following this pattern is not indexed and should
+    be resolved by a regular XPath lookup.
+
+    Parameters
+    ----------
+    input_map_parametrized
+        Mapping between table columns and parametrized XPath.
+    """
+
+    def __init__(self, input_map_parametrized: Dict[str, str]) -> None:
+        """Initialize index with parsed parametrized XPath."""
+        self._lookups: Dict[str, _IndexedLookup] = {}
+        self._values: Dict[str, Dict[str, Optional[str]]] = {}
+
+        for input_key, input_value_map in input_map_parametrized.items():
+            match = _INDEXED_XPATH.match(input_value_map)
+            if match is None:
+                continue
+
+            parent_steps: int = 0
+            value_steps: List[str] = match.group("value_path").lstrip("/").split("/")
+
+            # `..` is a parent step and `...` is a parent step followed by `.`
+            while value_steps and value_steps[0] and set(value_steps[0]) == {"."}:
+                parent_steps += len(value_steps.pop(0)) // 2
+
+            self._lookups[input_key] = _IndexedLookup(
+                tag=match.group("tag"),
+                key_path=match.group("key_path"),
+                key=match.group("key"),
+                parent_steps=parent_steps,
+                value_path="/".join(value_steps),
+            )
+            self._values[input_key] = {}
+
+        self.tags: Set[str] = {lookup.tag for lookup in self._lookups.values()}
+
+    def __contains__(self, input_key: str) -> bool:
+        """Check whether parametrized input is resolved through the index."""
+        return input_key in self._lookups
+
+    def add(self, element: Element, ancestors: List[Element]) -> None:
+        """Add element to the index.
+
+        Parameters
+        ----------
+        element
+            XML element with a tag listed in :attr:`tags`.
+        ancestors
+            Ancestors of the `element` starting from the document root.
+        """
+        for input_key, lookup in self._lookups.items():
+            if element.tag != lookup.tag:
+                continue
+
+            if lookup.parent_steps == 0:
+                target: Optional[Element] = element
+            elif lookup.parent_steps <= len(ancestors):
+                target = ancestors[-lookup.parent_steps]
+            else:
+                target = None
+
+            if target is not None and lookup.value_path:
+                target = target.find(lookup.value_path)
+
+            if target is None:
+                continue
+
+            for key_element in element.findall(lookup.key_path):
+                self._values[input_key].setdefault(key_element.text, target.text)
+
+    def build(self, xml_root: Element) -> None:
+        """Add all matching elements of a document to the index.
+
+        Parameters
+        ----------
+        xml_root
+            Root of the XML document.
+        """
+        ancestors: List[Element] = []
+
+        def walk(element: Element) -> None:
+            ancestors.append(element)
+
+            for child in element:
+                if child.tag in self.tags:
+                    self.add(child, ancestors)
+
+                walk(child)
+
+            ancestors.pop()
+
+        walk(xml_root)
+
+    def clear(self) -> None:
+        """Remove all values from the index."""
+        for values in self._values.values():
+            values.clear()
+
+    def get(self, input_key: str, row: Dict[str, str]) -> Optional[str]:
+        """Resolve parametrized input through the index.
+
+        Parameters
+        ----------
+        input_key
+            Table column mapped to an indexed parametrized XPath.
+        row
+            Values already extracted for the row.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`str`]
+            Text of the element the parametrized XPath points at,
+            or :data:`UNDEFINED_VALUE` if there is no such element.
+        """
+        return self.lookup(input_key, row.get(self.key_column(input_key)))
+
+    def key_column(self, input_key: str) -> str:
+        """Return column holding the lookup key of parametrized input.
+
+        Parameters
+        ----------
+        input_key
+            Table column mapped to an indexed parametrized XPath.
+
+        Returns
+        -------
+        str
+            Column the parametrized XPath is parametrized with.
+        """
+        return self._lookups[input_key].key
+
+    def lookup(self, input_key: str, key: Optional[str]) -> Optional[str]:
+        """Resolve parametrized input for a lookup key through the index.
+
+        Parameters
+        ----------
+        input_key
+            Table column mapped to an indexed parametrized XPath.
+        key
+            Value of the column returned by :meth:`key_column`.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`str`]
+            Text of the element the parametrized XPath points at,
+            or :data:`UNDEFINED_VALUE` if there is no such element.
+        """
+        return self._values[input_key].get(key, UNDEFINED_VALUE)
+
+
+def iter_xml_tree(
+    file_path: str,
+    data_sources: Dict[str, str],
+    lookup_indexes: Optional[Dict[str, LookupIndex]] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[Tuple[str, Element, Element]]:
+    """Iterate over XML elements matching XPath in a fully parsed document.
+
+    The document is parsed once and elements matching each XPath in
+    `data_sources` are returned in turn.
+
+    Parameters
+    ----------
+    file_path
+        Path to XML file.
+    data_sources
+        Mapping between table names and XPath selecting elements to be
+        ingested into each table.
+    lookup_indexes
+        Mapping between table names and indexes to be built from the
+        document prior to the iteration.
+    metrics
+        Collector to record time spent in parsing, building indexes and
+        XPath matching with.
+
+    Yields
+    ------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`~xml.etree.ElementTree.Element`, :obj:`~xml.etree.ElementTree.Element`]
+        Table name, matched element and the document root.
+    """  # noqa: E501
+    started: float = perf_counter()
+    with open_input(file_path) as xml_file:
+        xml_root: Element = xml_parse(xml_file).getroot()  # noqa: S314
+
+    if metrics is not None:
+        metrics.add("xml_parse", perf_counter() - started)
+
+    for lookup_index in (lookup_indexes or {}).values():
+        started = perf_counter()
+        lookup_index.build(xml_root)
+
+        if metrics is not None:
+            metrics.add("lookup_index", perf_counter() - started)
+
+    for table_name, data_source in data_sources.items():
+        started = perf_counter()
+        elements: List[Element] = xml_root.findall(data_source)
+
+        if metrics is not None:
+            metrics.add("xpath_match", perf_counter() - started, len(elements))
+
+        for element in elements:
+            yield table_name, element, xml_root
+
+
+def iter_xml_stream(
+    file_path: str,
+    data_sources: Dict[str, str],
+    lookup_indexes: Optional[Dict[str, LookupIndex]] = None,
+    retained_tags: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, Element, Element]]:
+    """Iterate over XML elements matching XPath while parsing incrementally.
+
+    The document is parsed once and each element is yielded for every
+    table with a matching XPath as soon as its closing tag is parsed.
+    Once processed, the element is cleared and detached from its parent,
+    unless it is enclosed by another matched element still being parsed.
+    Other elements are freed the same way once they are parsed, unless
+    their tag is in `retained_tags`. This keeps memory usage bounded by the
+    size of the largest matched element rather than by the size of the
+    document.
+
+    The root yielded with each element is the partially built document,
+    so XPath lookups against it only see elements not yet freed, which
+    includes all ancestors of the current element and retained elements
+    enclosed by them. Similarly, indexes in `lookup_indexes` are filled as
+    elements are parsed and are cleared whenever matched elements are freed.
+
+    Parameters
+    ----------
+    file_path
+        Path to XML file.
+    data_sources
+        Mapping between table names and predicate-free XPath selecting
+        elements to be ingested into each table.
+    lookup_indexes
+        Mapping between table names and indexes to be filled with parsed
+        elements.
+    retained_tags
+        Tags of elements not matched by any XPath, which are kept in the
+        document for lookups, e.g. :attr:`ExtractionPlan.lookup_tags`. By
+        default, all of them are kept.
+
+    Yields
+    ------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`~xml.etree.ElementTree.Element`, :obj:`~xml.etree.ElementTree.Element`]
+        Table name, matched element and the partially built document root.
+    """  # noqa: E501
+    matchers: List[Tuple[str, Callable[[List[str]], bool]]] = [
+        (table_name, compile_path_matcher(data_source))
+        for table_name, data_source in data_sources.items()
+    ]
+    indexes: List[LookupIndex] = list((lookup_indexes or {}).values())
+    indexed_tags: Set[str] = set().union(*(index.tags for index in indexes))
+
+    xml_root: Optional[Element] = None
+    tag_stack: List[str] = []
+    element_stack: List[Element] = []
+    match_stack: List[List[str]] = []
+    open_matches: int = 0
+
+    with open_input(file_path) as xml_file:
+        for event, element in xml_iterparse(  # noqa: S314
+            xml_file, events=("start", "end")
+        ):
+            if event == "start":
+                if xml_root is None:
+                    xml_root = element
+
+                tag_stack.append(element.tag)
+                element_stack.append(element)
+
+                matched_tables: List[str] = [
+                    table_name for table_name, match in matchers if match(tag_stack)
+                ]
+                match_stack.append(matched_tables)
+                open_matches += bool(matched_tables)
+
+                continue
+
+            tag_stack.pop()
+            element_stack.pop()
+
+            if element.tag in indexed_tags:
+                for lookup_index in indexes:
+                    lookup_index.add(element, element_stack)
+
+            matched_tables = match_stack.pop()
+
+            if matched_tables:
+                open_matches -= 1
+
+                for table_name in matched_tables:
+                    yield table_name, element, xml_root
+
+            elif retained_tags is None or element.tag in retained_tags:
+                continue
+
+            # Free subtree, unless an enclosing match may still need it
+            if open_matches == 0:
+                element.clear()
+
+                if element_stack:
+                    element_stack[-1].remove(element)
+
+                if matched_tables:
+                    for lookup_index in indexes:
+                        lookup_index.clear()
+
+
+class _PathNode:
+    """Node of a tree of `input_map` paths sharing their prefixes."""
+
+    __slots__ = ("columns", "children")
+
+    def __init__(self) -> None:
+        """Initialize node without any columns or child steps."""
+        self.columns: List[int] = []
+        self.children: Dict[str, "_PathNode"] = {}
+
+
+def _walk_paths(node: _PathNode, element: Element, values: List[Any]) -> None:
+    """Resolve paths below `node` against `element`, sharing common prefixes.
+
+    Like :meth:`~xml.etree.ElementTree.Element.find`, the first element in
+    document order matching a path sets the value of its columns, which is
+    why matches are visited in reverse order. Each step is a plain tag name,
+    so it is matched by the C implementation of
+    :meth:`~xml.etree.ElementTree.Element.find` without compiling a path.
+    """
+    for tag, child_node in node.children.items():
+        if child_node.children:
+            for child in reversed(element.findall(tag)):
+                for column in child_node.columns:
+                    values[column] = child.text
+
+                _walk_paths(child_node, child, values)
+
+            continue
+
+        leaf: Optional[Element] = element.find(tag)
+        if leaf is not None:
+            for column in child_node.columns:
+                values[column] = leaf.text
+
+
+def _check_xpath(xpath: str, input_key: str) -> None:
+    """Raise :class:`~yager.core.exc.YagerError` if XPath is not valid."""
+    try:
+        Element("_").find(xpath)
+    except (KeyError, SyntaxError, TypeError) as e:
+        raise YagerError(
+            "Invalid XPath '{}' of column '{}': {}".format(xpath, input_key, str(e))
+        )
+
+
+def _lookup_tags(template: str) -> Optional[Set[str]]:
+    """Return tags parametrized XPath could refer to.
+
+    ``None`` is returned if the XPath could refer to any tag, e.g. through
+    a wildcard or a parameter in place of a tag.
+    """
+    try:
+        # a parameter is replaced with a wildcard, unless it is quoted
+        xpath: str = "".join(
+            literal + ("" if field_name is None else "*")
+            for literal, field_name, _, _ in Formatter().parse(template)
+        )
+    except ValueError:
+        return None
+
+    tags: Set[str] = set()
+
+    for operator, tag in xpath_tokenizer(xpath):
+        if operator == "*":
+            return None
+
+        if tag:
+            tags.add(tag)
+
+    return tags
+
+
+class ExtractionPlan:
+    """Class implementing extraction of table rows from XML elements.
+
+    Input maps of a table are compiled once into a plan, which is then run
+    for every element matched by the table `data_source`:
+
+    * `input_map` paths made of plain tag names (e.g. ``id`` or
+      ``./sourceInfo/list/AzureAssetSourceSimple/vmId``) are merged into a
+      tree, so a prefix shared by several paths is searched once per element
+      rather than once per column. Other paths are resolved with
+      :meth:`~xml.etree.ElementTree.Element.find`.
+    * Templates of `input_map_parametrized` XPath are parsed once into
+      literal parts and positions of the columns they refer to.
+    * Parametrized XPath indexed by `lookup_index` is resolved with
+      a dict access.
+
+    Parameters
+    ----------
+    input_map
+        Mapping between table columns and XPath relative to the element.
+    input_map_parametrized
+        Mapping between table columns and XPath relative to the document
+        root, parametrized with values of columns preceding them.
+    lookup_index
+        Index used to resolve parametrized XPath instead of searching
+        the whole document.
+
+    Attributes
+    ----------
+    columns
+        Table columns in the order of extracted values.
+    lookup_tags
+        Tags of elements outside of the matched element that parametrized
+        XPath could refer to, ``None`` if it could refer to any of them.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If XPath is not valid or a parametrized XPath refers to a column
+        not extracted before it.
+    """
+
+    def __init__(
+        self,
+        input_map: Dict[str, str],
+        input_map_parametrized: Optional[Dict[str, str]] = None,
+        lookup_index: Optional[LookupIndex] = None,
+    ) -> None:
+        """Compile input maps into the plan."""
+        input_map_parametrized = input_map_parametrized or {}
+
+        self.columns: Tuple[str, ...] = tuple(input_map) + tuple(input_map_parametrized)
+        self.lookup_index: Optional[LookupIndex] = lookup_index
+        self.lookup_tags: Optional[Set[str]] = set()
+
+        self._self_columns: List[int] = []
+        self._child_paths: List[Tuple[int, str]] = []
+        self._path_tree: _PathNode = _PathNode()
+        self._found_paths: List[Tuple[int, str]] = []
+        self._parametrized: List[
+            Tuple[int, Callable[[List[Any], Element], Optional[str]]]
+        ] = []
+
+        for column, (input_key, xpath) in enumerate(input_map.items()):
+            if not isinstance(xpath, str) or not xpath:
+                raise YagerError("Missing XPath of column '{}'".format(input_key))
+
+            steps: List[str] = (xpath[2:] if xpath.startswith("./") else xpath).split(
+                "/"
+            )
+
+            if xpath == ".":
+                self._self_columns.append(column)
+            elif not all(_PLAIN_STEP.match(step) for step in steps):
+                _check_xpath(xpath, input_key)
+                self._found_paths.append((column, xpath))
+            elif len(steps) == 1:
+                self._child_paths.append((column, steps[0]))
+            else:
+                node: _PathNode = self._path_tree
+                for step in steps:
+                    node = node.children.setdefault(step, _PathNode())
+
+                node.columns.append(column)
+
+        positions: Dict[str, int] = {
+            input_key: column for column, input_key in enumerate(input_map)
+        }
+
+        for input_key, template in input_map_parametrized.items():
+            if not isinstance(template, str) or not template:
+                raise YagerError("Missing XPath of column '{}'".format(input_key))
+
+            self._parametrized.append(
+                (
+                    len(positions),
+                    self._compile_parametrized(input_key, template, positions),
+                )
+            )
+            positions[input_key] = len(positions)
+
+            tags: Optional[Set[str]] = _lookup_tags(template)
+            if tags is None or self.lookup_tags is None:
+                self.lookup_tags = None
+            else:
+                self.lookup_tags.update(tags)
+
+        self._input_map_size: int = len(input_map)
+
+    def _compile_parametrized(
+        self, input_key: str, template: str, positions: Dict[str, int]
+    ) -> Callable[[List[Any], Element], Optional[str]]:
+        """Compile parametrized XPath into function resolving it for a row.
+
+        Parameters
+        ----------
+        input_key
+            Table column mapped to the parametrized XPath.
+        template
+            Parametrized XPath.
+        positions
+            Mapping between columns extracted before `input_key` and their
+            positions in a row.
+
+        Returns
+        -------
+        :obj:`~typing.Callable`
+            Function accepting values of a row and the document root, and
+            returning the value of `input_key`.
+        """
+        if self.lookup_index is not None and input_key in self.lookup_index:
+            key_column: str = self.lookup_index.key_column(input_key)
+            if key_column not in positions:
+                raise YagerError(
+                    "XPath of column '{}' refers to column '{}' not extracted "
+                    "before it".format(input_key, key_column)
+                )
+
+            lookup: Callable[[str, Optional[str]], Optional[str]] = (
+                self.lookup_index.lookup
+            )
+            key_position: int = positions[key_column]
+
+            return lambda values, xml_root: lookup(input_key, values[key_position])
+
+        try:
+            fields: List[Tuple[str, Optional[str], str, Optional[str]]] = list(
+                Formatter().parse(template)
+            )
+        except ValueError as e:
+            raise YagerError(
+                "Invalid XPath '{}' of column '{}': {}".format(
+                    template, input_key, str(e)
+                )
+            )
+
+        parts: List[Tuple[str, int]] = []
+        tail: str = ""
+        plain: bool = True
+
+        for literal, field_name, format_spec, conversion in fields:
+            if field_name is None:
+                tail = literal
+                continue
+
+            column: str = _FIELD_NAME.match(field_name).group()
+            if column not in positions:
+                raise YagerError(
+                    "XPath of column '{}' refers to column '{}' not extracted "
+                    "before it".format(input_key, field_name)
+                )
+
+            plain = plain and column == field_name and not (format_spec or conversion)
+            parts.append((literal, positions[column]))
+
+        if not plain:
+            names: Tuple[str, ...] = self.columns[: len(positions)]
+
+            def expand(values: List[Any]) -> str:
+                return template.format_map(dict(zip(names, values)))
+
+        elif len(parts) == 1:
+            head, position = parts[0]
+
+            def expand(values: List[Any]) -> str:
+                return head + str(values[position]) + tail
+
+        else:
+
+            def expand(values: List[Any]) -> str:
+                return (
+                    "".join(
+                        [literal + str(values[position]) for literal, position in parts]
+                    )
+                    + tail
+                )
+
+        _check_xpath(expand(["0"] * len(positions)), input_key)
+
+        def resolve(values: List[Any], xml_root: Element) -> Optional[str]:
+            element_mapped: Optional[Element] = xml_root.find(expand(values))
+
+            return UNDEFINED_VALUE if element_mapped is None else element_mapped.text
+
+        return resolve
+
+    def extract(
+        self, element: Element, xml_root: Element, metrics: Optional[Metrics] = None
+    ) -> List[Optional[str]]:
+        """Extract table row from XML element.
+
+        Parameters
+        ----------
+        element
+            XML element matched by the table `data_source`.
+        xml_root
+            Root of the XML document used for parametrized lookups.
+        metrics
+            Collector to record time spent in `input_map` and
+            `input_map_parametrized` lookups with.
+
+        Returns
+        -------
+        :obj:`~typing.List` [:obj:`~typing.Optional` [:obj:`str`]]
+            Values in the order of :attr:`columns`.
+        """
+        started: float = perf_counter() if metrics is not None else 0.0
+        values: List[Any] = [UNDEFINED_VALUE] * len(self.columns)
+
+        for column in self._self_columns:
+            values[column] = element.text
+
+        for column, tag in self._child_paths:
+            element_mapped: Optional[Element] = element.find(tag)
+            if element_mapped is not None:
+                values[column] = element_mapped.text
+
+        if self._path_tree.children:
+            _walk_paths(self._path_tree, element, values)
+
+        for column, xpath in self._found_paths:
+            element_mapped = element.find(xpath)
+            values[column] = (
+                UNDEFINED_VALUE if element_mapped is None else element_mapped.text
+            )
+
+        if metrics is not None:
+            resumed: float = perf_counter()
+            metrics.add("input_map", resumed - started, 1)
+            started = resumed
+
+        for column, resolve in self._parametrized:
+            values[column] = resolve(values, xml_root)
+
+        if metrics is not None and self._parametrized:
+            metrics.add("input_map_parametrized", perf_counter() - started, 1)
+
+        return values
+
+
+def compile_plans(
+    xml_tables: Dict[str, Dict], parametrized_lookup: str = "xpath"
+) -> Dict[str, ExtractionPlan]:
+    """Compile extraction plans of XML-backed tables.
+
+    Parameters
+    ----------
+    xml_tables
+        Mapping between table names and configs of XML-backed tables.
+    parametrized_lookup
+        Resolution of parametrized inputs (``xpath`` or ``index``). With
+        ``index``, each plan gets a :class:`LookupIndex` of its own.
+
+    Returns
+    -------
+    :obj:`~typing.Dict` [:obj:`str`, :class:`ExtractionPlan`]
+        Mapping between table names and extraction plans.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If input maps of a table are missing or not valid.
+    """
+    plans: Dict[str, ExtractionPlan] = {}
+
+    for table_name, table in xml_tables.items():
+        input_map_parametrized: Dict[str, str] = table.get("input_map_parametrized", {})
+
+        if not table.get("input_map"):
+            raise YagerError("Table '{}' has no input_map".format(table_name))
+
+        try:
+            plans[table_name] = ExtractionPlan(
+                table["input_map"],
+                input_map_parametrized,
+                LookupIndex(input_map_parametrized)
+                if parametrized_lookup == "index"
+                else None,
+            )
+        except YagerError as e:
+            raise YagerError(
+                "Invalid input map of table '{}': {}".format(table_name, str(e))
+            )
+
+    return plans
+
+
+def extract_row(
+    element: Element,
+    xml_root: Element,
+    input_map: Dict[str, str],
+    input_map_parametrized: Dict[str, str],
+    lookup_index: Optional[LookupIndex] = None,
+    metrics: Optional[Metrics] = None,
+) -> Dict[str, str]:
+    """Extract table row from XML element.
+
+    The input maps are compiled for this element only, so rows of many
+    elements should be extracted with an :class:`ExtractionPlan` instead.
+
+    Parameters
+    ----------
+    element
+        XML element matched by the table `data_source`.
+    xml_root
+        Root of the XML document used for parametrized lookups.
+    input_map
+        Mapping between table columns and XPath relative to `element`.
+    input_map_parametrized
+        Mapping between table columns and XPath relative to `xml_root`,
+        parametrized with values already extracted through `input_map`.
+    lookup_index
+        Index used to resolve parametrized XPath instead of searching
+        the whole document.
+    metrics
+        Collector to record time spent in `input_map` and
+        `input_map_parametrized` lookups with.
+
+    Returns
+    -------
+    :obj:`~typing.Dict` [:obj:`str`, :obj:`str`]
+        Mapping between table columns and values.
+    """
+    plan: ExtractionPlan = ExtractionPlan(
+        input_map, input_map_parametrized, lookup_index
+    )
+
+    return dict(zip(plan.columns, plan.extract(element, xml_root, metrics)))
+
+
+def iter_xml_rows(
+    file_path: str,
+    xml_tables: Dict[str, Dict],
+    xml_parser: str = "tree",
+    parametrized_lookup: str = "xpath",
+    metrics: Optional[Metrics] = None,
+    plans: Optional[Dict[str, ExtractionPlan]] = None,
+) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    """Iterate over table rows extracted from XML file.
+
+    Parameters
+    ----------
+    file_path
+        Path to XML file.
+    xml_tables
+        Mapping between table names and configs of XML-backed tables.
+    xml_parser
+        Parser to use (``tree`` or ``stream``).
+    parametrized_lookup
+        Resolution of parametrized inputs (``xpath`` or ``index``).
+    metrics
+        Collector to record time spent in each phase of the extraction with.
+        The stream parser matches XPath while parsing, so its time is
+        recorded as parsing only.
+    plans
+        Extraction plans of the tables returned by :func:`compile_plans`, to
+        reuse them for multiple files. By default, plans are compiled with
+        `parametrized_lookup` for this file only.
+
+    Yields
+    ------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`~typing.Tuple` [:obj:`str`, ...]]
+        Table name and row values in the order of `input_map` columns
+        followed by `input_map_parametrized` ones.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If input maps of a table are missing or not valid.
+    """
+    if plans is None:
+        plans = compile_plans(xml_tables, parametrized_lookup)
+
+    data_sources: Dict[str, str] = {
+        table_name: table["data_source"].split(":")[1]
+        for table_name, table in xml_tables.items()
+    }
+    lookup_indexes: Dict[str, LookupIndex] = {
+        table_name: plan.lookup_index
+        for table_name, plan in plans.items()
+        if plan.lookup_index is not None
+    }
+
+    # indexes of reused plans still hold values of the previous file
+    for lookup_index in lookup_indexes.values():
+        lookup_index.clear()
+
+    if xml_parser == "stream":
+        retained_tags: Optional[Set[str]] = set()
+        for plan in plans.values():
+            if plan.lookup_tags is None:
+                retained_tags = None
+                break
+
+            retained_tags.update(plan.lookup_tags)
+
+        xml_data: Iterator = iter_xml_stream(
+            file_path, data_sources, lookup_indexes, retained_tags
+        )
+
+        if metrics is not None:
+            xml_data = metrics.iterate("xml_parse", xml_data)
+    else:
+        xml_data = iter_xml_tree(file_path, data_sources, lookup_indexes, metrics)
+
+    for table_name, element, xml_root in xml_data:
+        yield table_name, tuple(plans[table_name].extract(element, xml_root, metrics))
+
+
+def _to_integer(value: Optional[str]) -> Any:
+    """Convert text to integer, falling back to real and to the text itself.
+
+    Integers out of the 64-bit range are converted to real, as SQLite does.
+    """
+    if not value:
+        return None
+
+    try:
+        integer: int = int(value)
+    except ValueError:
+        pass
+    else:
+        return integer if _MIN_INTEGER <= integer <= _MAX_INTEGER else float(integer)
+
+    number: Any = _to_real(value)
+
+    if (
+        isinstance(number, float)
+        and number.is_integer()
+        and _MIN_INTEGER <= number <= _MAX_INTEGER
+    ):
+        return int(number)
+
+    return number
+
+
+def _to_real(value: Optional[str]) -> Any:
+    """Convert text to finite real, falling back to the text itself."""
+    if not value:
+        return None
+
+    try:
+        number: float = float(value)
+    except ValueError:
+        return value
+
+    return number if math.isfinite(number) else value
+
+
+def _to_boolean(value: Optional[str]) -> Any:
+    """Convert text to ``1`` or ``0``, falling back to the text itself."""
+    if not value:
+        return None
+
+    return _BOOLEANS.get(value.strip().lower(), value)
+
+
+# Converters of CSV values by SQLite type affinity, plus `boolean`; values of
+# `text` and `blob` columns are inserted as they are
+CONVERTERS: Dict[str, Optional[Callable[[Optional[str]], Any]]] = {
+    "blob": None,
+    "boolean": _to_boolean,
+    "integer": _to_integer,
+    "numeric": _to_integer,
+    "real": _to_real,
+    "text": None,
+}
+
+
+def column_affinity(declared_type: str) -> str:
+    """Return SQLite type affinity of a declared column type.
+
+    Follows the rules SQLite applies to declared types, e.g. ``DATETIME``
+    and ``BOOLEAN`` columns have ``numeric`` affinity.
+
+    Parameters
+    ----------
+    declared_type
+        Column type as declared in ``CREATE TABLE``.
+
+    Returns
+    -------
+    str
+        ``integer``, ``text``, ``blob``, ``real`` or ``numeric``.
+    """
+    declared_type = declared_type.upper()
+
+    if "INT" in declared_type:
+        return "integer"
+
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "text"
+
+    if "BLOB" in declared_type or not declared_type:
+        return "blob"
+
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "real"
+
+    return "numeric"
+
+
+class CsvRows:
+    """Class implementing iterator over typed table rows read from CSV file.
+
+    The header is mapped to table columns once, matching names regardless
+    of case, and header fields with no matching column are skipped. Values
+    are converted according to the affinity of the declared column type, so
+    e.g. ``INTEGER`` columns get integers, and empty values of all but
+    ``text`` and ``blob`` columns become ``NULL``. Values which could not be
+    converted are kept as text, like SQLite does.
+
+    Parameters
+    ----------
+    csv_file
+        Opened CSV file with a header.
+    column_types
+        Mapping between table columns and their declared types.
+    converters
+        Mapping between table columns and names of converters from
+        :data:`CONVERTERS` used instead of the declared types.
+    delimiter
+        Character separating values in a row.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If a converter is not known.
+    """
+
+    def __init__(
+        self,
+        csv_file: TextIO,
+        column_types: Dict[str, str],
+        converters: Optional[Dict[str, str]] = None,
+        delimiter: str = ",",
+    ) -> None:
+        """Read header and map it to table columns."""
+        self._reader: Iterator[List[str]] = csv.reader(csv_file, delimiter=delimiter)
+
+        table_columns: Dict[str, str] = {name.lower(): name for name in column_types}
+        column_converters: Dict[str, str] = {
+            column.lower(): converter
+            for column, converter in (converters or {}).items()
+        }
+
+        self.columns: List[str] = []
+        self.skipped: List[str] = []
+        self._fields: List[Tuple[int, Optional[Callable[[Optional[str]], Any]]]] = []
+
+        for position, field in enumerate(next(self._reader, [])):
+            column: Optional[str] = table_columns.pop(field.strip().lower(), None)
+
+            if column is None:
+                self.skipped.append(field)
+                continue
+
+            converter: str = column_converters.get(
+                column.lower(), column_affinity(column_types[column])
+            )
+            if converter not in CONVERTERS:
+                raise YagerError(
+                    "Unknown converter '{}' of column '{}', choose from {}".format(
+                        converter, column, ", ".join(sorted(CONVERTERS))
+                    )
+                )
+
+            self.columns.append(column)
+            self._fields.append((position, CONVERTERS[converter]))
+
+        self._width: int = max(
+            (position + 1 for position, _ in self._fields), default=0
+        )
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        """Iterate over rows with values in the order of :attr:`columns`."""
+        fields: List[Tuple[int, Optional[Callable[[Optional[str]], Any]]]] = (
+            self._fields
+        )
+        width: int = self._width
+
+        for row in self._reader:
+            # blank lines are skipped and missing values are NULL
+            if not row:
+                continue
+
+            if len(row) < width:
+                row += [None] * (width - len(row))
+
+            yield [
+                row[position] if converter is None else converter(row[position])
+                for position, converter in fields
+            ]
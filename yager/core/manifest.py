@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""Ingestion manifest module."""
+import json
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from sqlite3 import Cursor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+MANIFEST_TABLE = "yager_manifest"
+PROVENANCE_TABLE = "yager_provenance"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class SourceSignature(NamedTuple):
+    """Size, modification time and content hash of a data source file."""
+
+    size: int
+    mtime: float
+    sha256: str
+
+
+def hash_file(path: str) -> str:
+    """Calculate SHA-256 hash of file content.
+
+    Parameters
+    ----------
+    path
+        Path to file.
+
+    Returns
+    -------
+    str
+        Hex digest of the file content.
+    """
+    content_hash = sha256()
+
+    with open(path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(_HASH_CHUNK_SIZE), b""):
+            content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+class Manifest:
+    """Class implementing manifest of ingested data sources.
+
+    The manifest table records every data source file ingested by
+    an incremental refresh, along with its size, modification time, content
+    hash, target tables and row counts. The provenance table maps rows of
+    target tables to the sources they were inserted from, so rows of a changed
+    source could be replaced without touching the rest of the data. A row
+    ignored as a duplicate of an existing one is attributed to the source of
+    the duplicate as well, and is only deleted once no source contains it.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor to maintain the manifest with.
+    """
+
+    def __init__(self, cursor: Cursor) -> None:
+        """Initialize manifest for the database."""
+        self.cursor: Cursor = cursor
+        self._source: Optional[str] = None
+
+        self.cursor.connection.create_function("yager_source", 0, lambda: self._source)
+
+    @staticmethod
+    def source_key(path: str) -> str:
+        """Return key identifying data source file in the manifest."""
+        return str(Path(path).resolve())
+
+    def exists(self) -> bool:
+        """Check whether the database has a manifest."""
+        return (
+            self.cursor.execute(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type == 'table' AND name == ?",
+                (MANIFEST_TABLE,),
+            ).fetchone()[0]
+            > 0
+        )
+
+    def create(self) -> None:
+        """Create manifest and provenance tables, if missing."""
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "source TEXT PRIMARY KEY, size INTEGER, mtime REAL, sha256 TEXT, "
+            "tables TEXT, row_counts TEXT, ingested_at DATETIME)".format(MANIFEST_TABLE)
+        )
+        self.cursor.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "source TEXT, table_name TEXT, row_id INTEGER)".format(PROVENANCE_TABLE)
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_source ON {0} (source, table_name)".format(
+                PROVENANCE_TABLE
+            )
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_row ON {0} (table_name, row_id)".format(
+                PROVENANCE_TABLE
+            )
+        )
+        self.cursor.connection.commit()
+
+    def sources(self) -> List[str]:
+        """Return keys of data source files recorded in the manifest."""
+        return [
+            record[0]
+            for record in self.cursor.execute(
+                "SELECT source FROM {} ORDER BY source".format(MANIFEST_TABLE)
+            ).fetchall()
+        ]
+
+    def check(self, path: str, tables: List[str]) -> Optional[SourceSignature]:
+        """Check whether data source file changed since it was ingested.
+
+        The content hash is only calculated when size or modification time
+        differ from the recorded ones, so unchanged files are not read.
+
+        Parameters
+        ----------
+        path
+            Path to data source file.
+        tables
+            Names of tables the source is ingested into.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:class:`SourceSignature`]
+            Signature of the file, if it should be ingested.
+            ``None`` if it is unchanged.
+        """
+        stat = Path(path).stat()
+        record = self.cursor.execute(
+            "SELECT size, mtime, sha256, tables FROM {} WHERE source == ?".format(
+                MANIFEST_TABLE
+            ),
+            (self.source_key(path),),
+        ).fetchone()
+
+        if record is None or sorted(json.loads(record[3])) != sorted(tables):
+            return SourceSignature(stat.st_size, stat.st_mtime, hash_file(path))
+
+        if (record[0], record[1]) == (stat.st_size, stat.st_mtime):
+            return None
+
+        content_hash: str = hash_file(path)
+        if content_hash == record[2]:
+            # content is the same, so just remember the new modification time
+            self.cursor.execute(
+                "UPDATE {} SET mtime = ? WHERE source == ?".format(MANIFEST_TABLE),
+                (stat.st_mtime, self.source_key(path)),
+            )
+            self.cursor.connection.commit()
+
+            return None
+
+        return SourceSignature(stat.st_size, stat.st_mtime, content_hash)
+
+    def forget(self, path: str) -> Dict[str, int]:
+        """Delete rows previously ingested from data source file.
+
+        Rows also ingested from other sources are kept.
+
+        Parameters
+        ----------
+        path
+            Path to data source file.
+
+        Returns
+        -------
+        :obj:`~typing.Dict` [:obj:`str`, :obj:`int`]
+            Mapping between table names and numbers of deleted rows.
+        """
+        source: str = self.source_key(path)
+        deleted: Dict[str, int] = {}
+
+        table_names: List[str] = [
+            record[0]
+            for record in self.cursor.execute(
+                "SELECT DISTINCT table_name FROM {} WHERE source == ?".format(
+                    PROVENANCE_TABLE
+                ),
+                (source,),
+            ).fetchall()
+        ]
+
+        for table_name in table_names:
+            deleted[table_name] = self.cursor.execute(
+                "DELETE FROM {0} WHERE rowid IN "
+                "(SELECT row_id FROM {1} WHERE source == ? AND table_name == ?) "
+                "AND NOT EXISTS (SELECT 1 FROM {1} WHERE table_name == ? "
+                "AND row_id == {0}.rowid AND source != ?)".format(
+                    table_name, PROVENANCE_TABLE
+                ),
+                (source, table_name, table_name, source),
+            ).rowcount
+
+        self.cursor.execute(
+            "DELETE FROM {} WHERE source == ?".format(PROVENANCE_TABLE), (source,)
+        )
+        self.cursor.connection.commit()
+
+        return deleted
+
+    def remove(self, path: str) -> Dict[str, int]:
+        """Delete rows ingested from data source file and remove it from manifest.
+
+        Parameters
+        ----------
+        path
+            Path to data source file.
+
+        Returns
+        -------
+        :obj:`~typing.Dict` [:obj:`str`, :obj:`int`]
+            Mapping between table names and numbers of deleted rows.
+        """
+        deleted: Dict[str, int] = self.forget(path)
+
+        self.cursor.execute(
+            "DELETE FROM {} WHERE source == ?".format(MANIFEST_TABLE),
+            (self.source_key(path),),
+        )
+        self.cursor.connection.commit()
+
+        return deleted
+
+    def _unique_keys(self, table_name: str) -> List[List[str]]:
+        """Return columns of unique constraints of table."""
+        keys: List[List[str]] = []
+
+        primary_key: List[Tuple[int, str, str]] = sorted(
+            (column[5], column[1], column[2])
+            for column in self.cursor.execute(
+                "PRAGMA table_info({})".format(table_name)
+            ).fetchall()
+            if column[5]
+        )
+        # INTEGER PRIMARY KEY is an alias of rowid, so it has no index
+        if len(primary_key) == 1 and primary_key[0][2].upper() == "INTEGER":
+            keys.append([primary_key[0][1]])
+
+        for index in self.cursor.execute(
+            "PRAGMA index_list({})".format(table_name)
+        ).fetchall():
+            if not index[2]:
+                continue
+
+            columns: List[Optional[str]] = [
+                column[2]
+                for column in self.cursor.execute(
+                    "PRAGMA index_info({})".format(index[1])
+                ).fetchall()
+            ]
+            # rows conflicting on expressions could not be looked up
+            if None not in columns:
+                keys.append(columns)
+
+        return keys
+
+    def track(self, table_names: List[str]) -> None:
+        """Start recording provenance of rows inserted into tables.
+
+        Rows ignored as duplicates of existing ones on unique constraints are
+        recorded as the existing rows.
+
+        Parameters
+        ----------
+        table_names
+            Names of tables to track.
+        """
+        for table_name in table_names:
+            self.cursor.execute(
+                "CREATE TEMP TRIGGER IF NOT EXISTS {1}_{0} "
+                "AFTER INSERT ON main.{0} WHEN yager_source() IS NOT NULL "
+                "BEGIN INSERT INTO {1} (source, table_name, row_id) "
+                "VALUES (yager_source(), '{0}', NEW.rowid); END".format(
+                    table_name, PROVENANCE_TABLE
+                )
+            )
+
+            keys: List[List[str]] = self._unique_keys(table_name)
+            if not keys:
+                continue
+
+            self.cursor.execute(
+                "CREATE TEMP TRIGGER IF NOT EXISTS {1}_{0}_duplicate "
+                "BEFORE INSERT ON main.{0} WHEN yager_source() IS NOT NULL "
+                "BEGIN INSERT INTO {1} (source, table_name, row_id) "
+                "SELECT yager_source(), '{0}', rowid FROM main.{0} WHERE {2}; "
+                "END".format(
+                    table_name,
+                    PROVENANCE_TABLE,
+                    " OR ".join(
+                        "({})".format(
+                            " AND ".join(
+                                "{0} == NEW.{0}".format(column) for column in key
+                            )
+                        )
+                        for key in keys
+                    ),
+                )
+            )
+
+    def set_source(self, path: Optional[str]) -> None:
+        """Set data source file rows are being inserted from.
+
+        Parameters
+        ----------
+        path
+            Path to data source file or ``None`` to stop recording provenance.
+        """
+        self._source = None if path is None else self.source_key(path)
+
+    def record(self, path: str, signature: SourceSignature, tables: List[str]) -> None:
+        """Record ingested data source file in the manifest.
+
+        Parameters
+        ----------
+        path
+            Path to data source file.
+        signature
+            Signature of the file as returned by :meth:`check`.
+        tables
+            Names of tables the source is ingested into.
+        """
+        source: str = self.source_key(path)
+        row_counts: Dict[str, int] = dict(
+            self.cursor.execute(
+                "SELECT table_name, count(DISTINCT row_id) FROM {} "
+                "WHERE source == ? "
+                "GROUP BY table_name".format(PROVENANCE_TABLE),
+                (source,),
+            ).fetchall()
+        )
+
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?, ?, ?)".format(
+                MANIFEST_TABLE
+            ),
+            (
+                source,
+                signature.size,
+                signature.mtime,
+                signature.sha256,
+                json.dumps(sorted(tables)),
+                json.dumps(row_counts),
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        self.cursor.connection.commit()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Materialized summary tables module."""
+from sqlite3 import Cursor, Error
+from typing import Dict, List, Optional, Set
+
+from .exc import YagerError
+
+# Table with names of tables changed since materialized tables were rebuilt
+CHANGES_TABLE = "yager_changes"
+
+
+def stale_tables(
+    materialized: List[Dict],
+    changed_tables: Optional[Set[str]],
+    existing_tables: Set[str],
+) -> List[Dict]:
+    """Select materialized tables to be rebuilt after refresh.
+
+    A table is stale if it does not exist yet, or if any table listed in its
+    `depends_on` has changed. Tables without `depends_on` are stale whenever
+    any table has changed. Rebuilding a table changes it in turn, so tables
+    built from other materialized tables are rebuilt along with them, which
+    requires tables to be listed after the ones they are built from.
+
+    Parameters
+    ----------
+    materialized
+        Configs of materialized tables.
+    changed_tables
+        Names of tables changed by the refresh, ``None`` if all of them were.
+    existing_tables
+        Names of tables in the database.
+
+    Returns
+    -------
+    :obj:`~typing.List` [:obj:`~typing.Dict`]
+        Configs of stale tables in the order they should be rebuilt.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If a table config has no `name` or `query`.
+    """
+    changed: Optional[Set[str]] = None if changed_tables is None else set(
+        changed_tables
+    )
+    stale: List[Dict] = []
+
+    for table in materialized:
+        if not table.get("name") or not table.get("query"):
+            raise YagerError(
+                "Materialized table '{}' requires both 'name' and 'query'".format(
+                    table.get("name", "")
+                )
+            )
+
+        depends_on: Optional[List[str]] = table.get("depends_on")
+
+        if (
+            changed is None
+            or table["name"] not in existing_tables
+            or (changed if depends_on is None else changed.intersection(depends_on))
+        ):
+            stale.append(table)
+
+            if changed is not None:
+                changed.add(table["name"])
+
+    return stale
+
+
+def rebuild_table(
+    cursor: Cursor, table_name: str, sql_query: str, columns: Optional[str] = None
+) -> int:
+    """Replace table with result of query in a single transaction.
+
+    Readers see the previous content of the table until the new one is
+    committed, and the previous content is kept if the query fails.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor to rebuild the table with.
+    table_name
+        Name of the table.
+    sql_query
+        ``SELECT`` statement with the table content.
+    columns
+        Table columns described as an SQL statement. By default, columns
+        are derived from the query result.
+
+    Returns
+    -------
+    int
+        Number of rows in the rebuilt table.
+
+    Raises
+    ------
+    :obj:`~sqlite3.Error`
+        If the table could not be rebuilt.
+    """
+    sql_query = sql_query.strip().rstrip(";")
+
+    if cursor.connection.in_transaction:
+        cursor.connection.commit()
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("DROP TABLE IF EXISTS {}".format(table_name))
+
+        if columns:
+            cursor.execute("CREATE TABLE {} ({})".format(table_name, columns))
+            cursor.execute("INSERT INTO {} {}".format(table_name, sql_query))
+        else:
+            cursor.execute("CREATE TABLE {} AS {}".format(table_name, sql_query))
+
+        row_count: int = cursor.execute(
+            "SELECT COUNT(*) FROM {}".format(table_name)
+        ).fetchone()[0]
+
+    except Error:
+        cursor.connection.rollback()
+        raise
+
+    cursor.connection.commit()
+
+    return row_count
+
+
+def modified_tables(cursor: Cursor) -> Set[str]:
+    """Return tables changed since materialized tables were rebuilt.
+
+    Changes are recorded by triggers set up with :func:`track_changes`, so
+    they include changes made outside of the app, e.g. to tables excluded
+    from the refresh.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor.
+
+    Returns
+    -------
+    :obj:`~typing.Set` [:obj:`str`]
+        Names of changed tables, empty if changes are not tracked yet.
+    """
+    if not cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type == 'table' AND name == ?",
+        (CHANGES_TABLE,),
+    ).fetchone():
+        return set()
+
+    return {
+        row[0]
+        for row in cursor.execute("SELECT table_name FROM {}".format(CHANGES_TABLE))
+    }
+
+
+def track_changes(cursor: Cursor, materialized: List[Dict]) -> None:
+    """Reset record of changed tables and track changes of tables used.
+
+    Each table listed in `depends_on` of materialized tables, or each table
+    of the database, if any of them has no `depends_on`, gets triggers
+    recording its first change. The triggers are dropped along with their
+    table, so this is repeated after every refresh.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor.
+    materialized
+        Configs of materialized tables.
+    """
+    existing_tables: Set[str] = {
+        row[0]
+        for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type == 'table' "
+            "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+            "AND name NOT LIKE 'yager\\_%' ESCAPE '\\'"
+        )
+    }
+    tracked_tables: Set[str] = existing_tables
+    if all(table.get("depends_on") is not None for table in materialized):
+        tracked_tables = existing_tables.intersection(
+            set().union(*[table["depends_on"] for table in materialized])
+        )
+
+    if cursor.connection.in_transaction:
+        cursor.connection.commit()
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS {} (table_name TEXT PRIMARY KEY)".format(
+                CHANGES_TABLE
+            )
+        )
+        cursor.execute("DELETE FROM {}".format(CHANGES_TABLE))
+
+        for table_name in sorted(tracked_tables):
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(
+                    "CREATE TRIGGER IF NOT EXISTS {changes}_{table}_{name} "
+                    "AFTER {event} ON {table} "
+                    "WHEN NOT EXISTS "
+                    "(SELECT 1 FROM {changes} WHERE table_name == '{table}') "
+                    "BEGIN INSERT INTO {changes} VALUES ('{table}'); END".format(
+                        changes=CHANGES_TABLE,
+                        table=table_name,
+                        event=event,
+                        name=event.lower(),
+                    )
+                )
+
+    except Error:
+        cursor.connection.rollback()
+        raise
+
+    cursor.connection.commit()
+
+
+def untrack_changes(cursor: Cursor) -> None:
+    """Drop triggers set up with :func:`track_changes`.
+
+    Triggers left on tables kept by a full refresh would otherwise fail
+    writes to them, once the table of changes is dropped.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor.
+    """
+    triggers: List[str] = [
+        row[0]
+        for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type == 'trigger' "
+            "AND name LIKE ? ESCAPE '\\'",
+            (CHANGES_TABLE.replace("_", "\\_") + "\\_%",),
+        )
+    ]
+
+    for trigger in triggers:
+        cursor.execute("DROP TRIGGER {}".format(trigger))
+
+    cursor.connection.commit()
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Performance metrics module."""
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TYPE_CHECKING,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from cProfile import Profile
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # not available on Windows
+    resource = None
+
+T = TypeVar("T")
+
+
+class PhaseStats:
+    """Wall time, number of calls and rows processed by a phase."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.seconds: float = 0.0
+        self.calls: int = 0
+        self.rows: int = 0
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        """Return average number of rows processed per second."""
+        if not self.rows or self.seconds <= 0:
+            return None
+
+        return self.rows / self.seconds
+
+
+def peak_rss() -> Dict[str, Optional[int]]:
+    """Return peak resident set size of the process and its children.
+
+    Returns
+    -------
+    :obj:`~typing.Dict` [:obj:`str`, :obj:`~typing.Optional` [:obj:`int`]]
+        Peak resident set size in bytes of the process (``self``) and of its
+        terminated child processes (``children``), ``None`` if unknown.
+    """
+    if resource is None:
+        return {"self": None, "children": None}
+
+    # Linux reports the size in kilobytes, macOS in bytes
+    scale: int = 1 if sys.platform == "darwin" else 1024
+
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+class Metrics:
+    """Class implementing collector of per-phase performance metrics.
+
+    Phases are named parts of a command (e.g. XML parsing, inserts or
+    rendering). Time spent in a phase and rows processed by it add up over
+    all calls, including calls made by concurrent threads. Nested phases are
+    timed independently, so the time of an outer phase includes the time of
+    phases within it. A disabled collector records nothing, so instrumented
+    code costs next to nothing unless profiling is requested.
+
+    Parameters
+    ----------
+    enabled
+        Whether to record metrics.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize collector without any phases."""
+        self.enabled: bool = enabled
+        self.phases: Dict[str, PhaseStats] = {}
+        self.profiler: Optional["Profile"] = None
+
+        self._lock: Lock = Lock()
+        self._started: float = perf_counter()
+        self._stopped: Optional[float] = None
+
+    def start(self, profile_calls: bool = False) -> None:
+        """Enable collector and reset recorded metrics.
+
+        Parameters
+        ----------
+        profile_calls
+            Whether to also profile function calls with :mod:`cProfile`.
+        """
+        self.enabled = True
+        self.phases = {}
+        self._started = perf_counter()
+        self._stopped = None
+
+        if profile_calls:
+            from cProfile import Profile
+
+            self.profiler = Profile()
+            self.profiler.enable()
+
+    def stop(self) -> None:
+        """Stop measuring wall time and profiling function calls."""
+        self._stopped = perf_counter()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def add(self, name: str, seconds: float = 0.0, rows: int = 0) -> None:
+        """Add time and rows to phase.
+
+        Parameters
+        ----------
+        name
+            Name of the phase.
+        seconds
+            Wall time spent in the phase.
+        rows
+            Number of rows processed by the phase.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            phase: PhaseStats = self.phases.setdefault(name, PhaseStats())
+            phase.seconds += seconds
+            phase.calls += 1
+            phase.rows += rows
+
+    def add_rows(self, name: str, rows: int) -> None:
+        """Add rows to phase without counting a call.
+
+        Parameters
+        ----------
+        name
+            Name of the phase.
+        rows
+            Number of rows processed by the phase.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.phases.setdefault(name, PhaseStats()).rows += rows
+
+    @contextmanager
+    def phase(self, name: str, rows: int = 0) -> Iterator[None]:
+        """Time block of code as a call of phase.
+
+        Parameters
+        ----------
+        name
+            Name of the phase.
+        rows
+            Number of rows processed by the block, if known in advance.
+            Rows counted while in the block are added with :meth:`add_rows`.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started: float = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - started, rows)
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Time retrieval of each item from iterable as a call of phase.
+
+        Parameters
+        ----------
+        name
+            Name of the phase.
+        items
+            Iterable producing items lazily (e.g. a generator).
+
+        Yields
+        ------
+        :obj:`~typing.Any`
+            Items of `items`.
+        """
+        if not self.enabled:
+            yield from items
+            return
+
+        iterator: Iterator[T] = iter(items)
+        while True:
+            started: float = perf_counter()
+            try:
+                item: T = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(name, perf_counter() - started)
+
+            yield item
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return metrics in a JSON serializable form.
+
+        Returns
+        -------
+        :obj:`~typing.Dict` [:obj:`str`, :obj:`~typing.Any`]
+            Total wall time, peak resident set sizes and statistics of
+            each phase in the order they were first entered.
+        """
+        return {
+            "wall_seconds": (self._stopped or perf_counter()) - self._started,
+            "peak_rss_bytes": peak_rss(),
+            "phases": {
+                name: {
+                    "seconds": phase.seconds,
+                    "calls": phase.calls,
+                    "rows": phase.rows,
+                    "rows_per_second": phase.rows_per_second,
+                }
+                for name, phase in self.phases.items()
+            },
+        }
+
+    def summary(self) -> str:
+        """Return human readable summary of metrics.
+
+        Returns
+        -------
+        str
+            Table with statistics of each phase followed by totals.
+        """
+        from tabulate import tabulate
+
+        metrics: Dict[str, Any] = self.to_dict()
+        rows: List[List[Any]] = [
+            [
+                name,
+                "{:.3f}".format(phase["seconds"]),
+                phase["calls"],
+                phase["rows"] or "",
+                "{:.0f}".format(phase["rows_per_second"])
+                if phase["rows_per_second"]
+                else "",
+            ]
+            for name, phase in metrics["phases"].items()
+        ]
+        peak: Dict[str, Optional[int]] = metrics["peak_rss_bytes"]
+
+        return "{}\n\nWall time: {:.3f} s, peak RSS: {}".format(
+            tabulate(rows, headers=["phase", "seconds", "calls", "rows", "rows/s"]),
+            metrics["wall_seconds"],
+            "unknown"
+            if peak["self"] is None
+            else "{:.1f} MiB (children: {:.1f} MiB)".format(
+                peak["self"] / 1024 / 1024, peak["children"] / 1024 / 1024
+            ),
+        )
+
+    def write(self, path: Path) -> None:
+        """Write metrics into JSON file.
+
+        Parameters
+        ----------
+        path
+            Path to the metrics file.
+        """
+        import json
+
+        with open(str(path), "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Query output module."""
+from sqlite3 import Cursor
+from typing import Any, Dict, Iterator, List, Sequence, TextIO
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_TABLE_LIMIT = 100
+
+OUTPUT_FORMATS = ["csv", "jsonl", "table", "tsv"]
+
+_DELIMITERS: Dict[str, str] = {"csv": ",", "tsv": "\t"}
+
+
+def iter_chunks(
+    db_cursor: Cursor, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[List[Sequence[Any]]]:
+    """Iterate over query result `chunk_size` rows at a time.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor with an executed query.
+    chunk_size
+        Number of rows fetched at a time.
+
+    Yields
+    ------
+    :obj:`~typing.List`
+        Rows of the next chunk.
+    """
+    while True:
+        rows: List[Sequence[Any]] = db_cursor.fetchmany(max(1, chunk_size))
+
+        if not rows:
+            return
+
+        yield rows
+
+
+def _json_value(value: Any) -> str:
+    """Return JSON compatible representation of BLOB values."""
+    if isinstance(value, bytes):
+        return value.hex()
+
+    raise TypeError("Unsupported value type {}".format(type(value).__name__))
+
+
+def write_delimited(
+    db_cursor: Cursor,
+    output: TextIO,
+    delimiter: str = ",",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Write query result as delimiter separated values.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor with an executed query.
+    output
+        Stream to write rows to.
+    delimiter
+        Character separating values in a row.
+    chunk_size
+        Number of rows fetched and written at a time.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    # imported here, as the module is loaded for defaults of CLI options
+    import csv
+
+    writer = csv.writer(output, delimiter=delimiter, lineterminator="\n")
+    writer.writerow([column[0] for column in db_cursor.description])
+
+    row_count: int = 0
+    for rows in iter_chunks(db_cursor, chunk_size):
+        writer.writerows(rows)
+        row_count += len(rows)
+
+    return row_count
+
+
+def write_jsonl(
+    db_cursor: Cursor, output: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Write query result as JSON Lines with an object per row.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor with an executed query.
+    output
+        Stream to write rows to.
+    chunk_size
+        Number of rows fetched and written at a time.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    import json
+
+    header: List[str] = [column[0] for column in db_cursor.description]
+
+    row_count: int = 0
+    for rows in iter_chunks(db_cursor, chunk_size):
+        output.writelines(
+            json.dumps(dict(zip(header, row)), default=_json_value) + "\n"
+            for row in rows
+        )
+        row_count += len(rows)
+
+    return row_count
+
+
+def write_table(
+    db_cursor: Cursor, output: TextIO, limit: int = DEFAULT_TABLE_LIMIT
+) -> bool:
+    """Write the first `limit` rows of query result as a table.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor with an executed query.
+    output
+        Stream to write the table to.
+    limit
+        Maximum number of rows in the table (``0`` writes all rows).
+
+    Returns
+    -------
+    bool
+        ``True`` if the result has more rows than written.
+    """
+    # imported here, as only the table format needs it
+    from tabulate import tabulate
+
+    header: List[str] = [column[0] for column in db_cursor.description]
+
+    if limit > 0:
+        rows: List[Sequence[Any]] = db_cursor.fetchmany(limit)
+        truncated: bool = db_cursor.fetchone() is not None
+    else:
+        rows = db_cursor.fetchall()
+        truncated = False
+
+    output.write(tabulate(rows, headers=header) + "\n")
+
+    return truncated
+
+
+def write_result(
+    db_cursor: Cursor,
+    output: TextIO,
+    out_format: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Stream query result in one of the row based formats.
+
+    Parameters
+    ----------
+    db_cursor
+        Cursor with an executed query.
+    output
+        Stream to write rows to.
+    out_format
+        Output format, ``csv``, ``tsv`` or ``jsonl``.
+    chunk_size
+        Number of rows fetched and written at a time.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    if out_format == "jsonl":
+        return write_jsonl(db_cursor, output, chunk_size)
+
+    return write_delimited(db_cursor, output, _DELIMITERS[out_format], chunk_size)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Parallel data ingestion module."""
+import pickle  # noqa: S403
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Event
+from queue import Empty
+from tempfile import TemporaryFile
+from typing import Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from .exc import YagerError
+from .ingest import ExtractionPlan, compile_plans, iter_xml_rows
+from .writer import DEFAULT_BATCH_SIZE
+
+# Batch of rows extracted from a file for a single table
+RowBatch = Tuple[str, List[Tuple[str, ...]]]
+
+# Queue shared with pool workers, set by the pool initializer
+_worker_queue: Optional[Queue] = None
+
+# Event telling pool workers to stop, set by the pool initializer
+_worker_cancelled: Optional[Event] = None
+
+# Extraction plans of a pool worker, compiled by the pool initializer
+_worker_plans: Optional[Dict[str, ExtractionPlan]] = None
+
+
+class _Spool:
+    """Class implementing disk-backed FIFO of row batches."""
+
+    def __init__(self) -> None:
+        """Initialize spool with a temporary file."""
+        self._file: IO[bytes] = TemporaryFile()
+        self._count: int = 0
+
+    def append(self, batch: RowBatch) -> None:
+        """Store batch in the spool."""
+        pickle.dump(batch, self._file, pickle.HIGHEST_PROTOCOL)
+        self._count += 1
+
+    def drain(self) -> Iterator[RowBatch]:
+        """Return stored batches in order and release the spool."""
+        self._file.seek(0)
+
+        for _ in range(self._count):
+            yield pickle.load(self._file)  # noqa: S301
+
+        self.close()
+
+    def close(self) -> None:
+        """Release the spool."""
+        self._file.close()
+
+
+def _init_worker(
+    queue: Queue,
+    cancelled: Event,
+    xml_tables: Dict[str, Dict],
+    parametrized_lookup: str,
+) -> None:
+    """Keep references to shared objects and compile plans in a pool worker.
+
+    Plans hold compiled closures, which could not be sent to workers, so each
+    worker compiles them once for all files it parses.
+    """
+    global _worker_queue, _worker_cancelled, _worker_plans
+    _worker_queue = queue
+    _worker_cancelled = cancelled
+    _worker_plans = compile_plans(xml_tables, parametrized_lookup)
+
+
+def _extract_file(
+    file_index: int, file_path: str, xml_tables: Dict[str, Dict], xml_parser: str
+) -> None:
+    """Extract rows from XML file and send them in batches to the queue.
+
+    Each batch is sent as ``(file_index, table_name, rows)`` and the end of
+    the file is marked with ``(file_index, None, error)``, where `error` is
+    ``None`` on success. Extraction stops early once the batches are no
+    longer consumed.
+    """
+    batches: Dict[str, List[Tuple[str, ...]]] = {name: [] for name in xml_tables}
+    error: Optional[str] = None
+
+    try:
+        for table_name, row in iter_xml_rows(
+            file_path, xml_tables, xml_parser, plans=_worker_plans
+        ):
+            batch: List[Tuple[str, ...]] = batches[table_name]
+            batch.append(row)
+
+            if len(batch) >= xml_tables[table_name].get(
+                "batch_size", DEFAULT_BATCH_SIZE
+            ):
+                if _worker_cancelled.is_set():
+                    return
+
+                _worker_queue.put((file_index, table_name, batch))
+                batches[table_name] = []
+
+        for table_name, batch in batches.items():
+            if batch:
+                _worker_queue.put((file_index, table_name, batch))
+
+    except Exception as e:  # noqa: B902
+        error = "{}: {}".format(type(e).__name__, str(e))
+
+    finally:
+        _worker_queue.put((file_index, None, error))
+
+
+def _abort(
+    futures: List[Future],
+    queue: Queue,
+    cancelled: Event,
+    finished: Dict[int, Optional[str]],
+) -> None:
+    """Cancel pending workers and drain the queue until running ones finish."""
+    cancelled.set()
+
+    running: Set[int] = {
+        file_index
+        for file_index, future in enumerate(futures)
+        if file_index not in finished and not future.cancel()
+    }
+
+    while running:
+        try:
+            file_index, table_name, _ = queue.get(timeout=1)
+        except Empty:
+            running = {i for i in running if not futures[i].done()}
+            continue
+
+        if table_name is None:
+            running.discard(file_index)
+
+
+def iter_xml_batches(
+    file_paths: List[str],
+    xml_tables: Dict[str, Dict],
+    xml_parser: str = "tree",
+    parametrized_lookup: str = "xpath",
+    jobs: int = 1,
+) -> Iterator[Tuple[str, str, List[Tuple[str, ...]]]]:
+    """Iterate over batches of table rows extracted from XML files in parallel.
+
+    Each file is parsed by a separate worker of a process pool, and workers
+    send row batches back through a bounded queue. Batches are returned in
+    the same order a sequential run would produce them: batches of the
+    earliest unfinished file are passed through as soon as they arrive,
+    while batches of other files are spooled to disk until their turn.
+
+    Parameters
+    ----------
+    file_paths
+        Paths to XML files.
+    xml_tables
+        Mapping between table names and configs of XML-backed tables.
+    xml_parser
+        Parser to use (``tree`` or ``stream``).
+    parametrized_lookup
+        Resolution of parametrized inputs (``xpath`` or ``index``).
+    jobs
+        Number of worker processes.
+
+    Yields
+    ------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`str`, :obj:`~typing.List`]
+        File path, table name and a batch of row values.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If a worker fails to extract rows from a file.
+    """
+    context = get_context()
+    queue: Queue = context.Queue(maxsize=4 * jobs)
+    cancelled: Event = context.Event()
+
+    spools: Dict[int, _Spool] = {}
+    finished: Dict[int, Optional[str]] = {}
+    head: int = 0
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(queue, cancelled, xml_tables, parametrized_lookup),
+    ) as executor:
+        futures: List[Future] = [
+            executor.submit(
+                _extract_file, file_index, file_path, xml_tables, xml_parser
+            )
+            for file_index, file_path in enumerate(file_paths)
+        ]
+
+        try:
+            while head < len(file_paths):
+                try:
+                    file_index, table_name, payload = queue.get(timeout=1)
+                except Empty:
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise YagerError(
+                                "Worker failed: {}".format(str(future.exception()))
+                            )
+
+                    continue
+
+                if table_name is not None:
+                    if file_index == head:
+                        yield file_paths[file_index], table_name, payload
+                    else:
+                        spools.setdefault(file_index, _Spool()).append(
+                            (table_name, payload)
+                        )
+
+                    continue
+
+                finished[file_index] = payload
+
+                # Advance to the next file and replay what it has sent so far
+                while head in finished:
+                    if finished[head] is not None:
+                        raise YagerError(
+                            "Failed to extract data from '{}': {}".format(
+                                file_paths[head], finished[head]
+                            )
+                        )
+
+                    head += 1
+
+                    if head in spools:
+                        for table_name, rows in spools.pop(head).drain():
+                            yield file_paths[head], table_name, rows
+
+        finally:
+            # stop workers blocked on the full queue, if the consumer stopped
+            # early or extraction failed, so the pool could shut down
+            if head < len(file_paths):
+                _abort(futures, queue, cancelled, finished)
+
+                for spool in spools.values():
+                    spool.close()
@@ -0,0 +1,605 @@
+# -*- coding: utf-8 -*-
+"""Report rendering module."""
+import re
+from concurrent.futures import ProcessPoolExecutor
+from csv import DictReader
+from pathlib import Path
+from sqlite3 import Connection, Cursor, Error, connect
+from string import Formatter
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from .exc import YagerError
+from .hooks import apply_pragmas
+from .output import DEFAULT_CHUNK_SIZE
+
+# Column names and rows of a query result
+QueryResult = Tuple[List[str], List[Tuple]]
+
+# SQL query with parameters already expanded and parameters used by it
+Query = Tuple[str, Dict[str, str]]
+
+# Jinja2 environments shared by all templates in the process
+_environments: Dict[Tuple[str, bool, Optional[str]], Environment] = {}
+
+# Renderer used by a pool worker, set by the pool initializer
+_worker_renderer: Optional["ReportRenderer"] = None
+_worker_problems: List[str] = []
+
+
+class RowSet:
+    """Class implementing lazily fetched rows of a query result.
+
+    The query is executed each time the rows are iterated over, and rows are
+    fetched `chunk_size` at a time, so only a chunk of rows is kept in memory.
+    The number of rows is counted with a separate query.
+
+    Parameters
+    ----------
+    sql_query
+        SQL query with parameters already expanded.
+    db_connection
+        Connection to execute the query with.
+    chunk_size
+        Number of rows fetched at a time.
+    """
+
+    def __init__(
+        self,
+        sql_query: str,
+        db_connection: Connection,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """Initialize row set without executing the query."""
+        self.sql_query: str = sql_query
+        self.db_connection: Connection = db_connection
+        self.chunk_size: int = max(1, chunk_size)
+
+        self._length: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over rows as mappings between column names and values."""
+        sql_result: Cursor = self.db_connection.execute(self.sql_query)
+        data_header: List[str] = [h[0] for h in sql_result.description]
+
+        try:
+            rows: List[Tuple] = sql_result.fetchmany(self.chunk_size)
+            while rows:
+                for row in rows:
+                    yield {key: value for key, value in zip(data_header, row)}
+
+                rows = sql_result.fetchmany(self.chunk_size)
+        finally:
+            sql_result.close()
+
+    def __len__(self) -> int:
+        """Return number of rows."""
+        if self._length is None:
+            self._length = self.db_connection.execute(
+                "SELECT count(*) FROM (\n{}\n)".format(
+                    self.sql_query.strip().rstrip(";")
+                )
+            ).fetchone()[0]
+
+        return self._length
+
+
+def expand_queries(template_params: List[Dict], params: Dict[str, str]) -> List[Query]:
+    """Expand parameters of report queries.
+
+    Parameters
+    ----------
+    template_params
+        Report queries along with mappings of their results to template
+        variables.
+    params
+        Mapping between query parameter names and values.
+
+    Returns
+    -------
+    :obj:`~typing.List` [:obj:`~typing.Tuple`]
+        SQL queries with parameters expanded along with parameters used by
+        each of them.
+    """
+    queries: List[Query] = []
+
+    for param in template_params:
+        sql_query_parametrized: str = param["query"]
+        query_keys: List[str] = [
+            t[1] for t in Formatter().parse(sql_query_parametrized) if t[1] is not None
+        ]
+
+        queries.append(
+            (
+                sql_query_parametrized.format(**params),
+                {key: params.get(key) for key in query_keys},
+            )
+        )
+
+    return queries
+
+
+def index_rows(
+    data_dicts: List[Dict[str, Any]], var_value: Dict[str, str]
+) -> Dict[Any, Any]:
+    """Index rows of query result by column.
+
+    Parameters
+    ----------
+    data_dicts
+        Rows as mappings between column names and values.
+    var_value
+        Mapping in a form of ``{"index_by": column}`` returning the first row
+        for each value of the column, or ``{"group_by": column}`` returning
+        the list of rows for each value of the column, in the order of rows.
+
+    Returns
+    -------
+    :obj:`~typing.Dict`
+        Mapping between column values and rows.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If the mapping is not valid.
+    """
+    index: Dict[Any, Any] = {}
+
+    if list(var_value) == ["index_by"]:
+        for row in data_dicts:
+            index.setdefault(row.get(var_value["index_by"]), row)
+
+    elif list(var_value) == ["group_by"]:
+        for row in data_dicts:
+            index.setdefault(row.get(var_value["group_by"]), []).append(row)
+
+    else:
+        raise YagerError("Unknown variable mapping '{}'".format(var_value))
+
+    return index
+
+
+def map_template_data(
+    template_params: List[Dict], results: List[Optional[Union[QueryResult, RowSet]]]
+) -> Dict[str, Any]:
+    """Map results of report queries to template variables.
+
+    Parameters
+    ----------
+    template_params
+        Report queries along with mappings of their results to template
+        variables.
+    results
+        Column names and rows, or lazily fetched rows of the result of each
+        query, or ``None`` if the query failed.
+
+    Returns
+    -------
+    :obj:`~typing.Dict` [:obj:`str`, :obj:`~typing.Any`]
+        Mapping between template variables and values.
+    """
+    template_input_data: Dict[str, Any] = {}
+
+    for param, sql_data in zip(template_params, results):
+        var_mapping: Dict = param["var_mapping"]
+
+        if isinstance(sql_data, RowSet):
+            template_input_data.update({var_key: sql_data for var_key in var_mapping})
+
+        elif sql_data:
+            data_header, data_tuples = sql_data
+            data_dicts: List[Dict] = [
+                {key: value for key, value in zip(data_header, row)}
+                for row in data_tuples
+            ]
+
+            for var_key, var_value in var_mapping.items():
+                if var_value == "*":
+                    template_input_data.update({var_key: data_dicts})
+                elif isinstance(var_value, dict):
+                    template_input_data.update(
+                        {var_key: index_rows(data_dicts, var_value)}
+                    )
+                else:
+                    template_input_data.update(
+                        {
+                            var_key: data_dicts[0].get(var_value, "None")
+                            if data_dicts
+                            else "None"
+                        }
+                    )
+
+    return template_input_data
+
+
+def get_environment(
+    template_dir: str,
+    bytecode_cache: bool = True,
+    bytecode_cache_dir: Optional[str] = None,
+) -> Environment:
+    """Return Jinja2 environment shared by all templates in the process.
+
+    Compiled templates are kept in memory by the environment, and their
+    bytecode is stored on disk, so templates are only compiled again once
+    their source changes.
+
+    Parameters
+    ----------
+    template_dir
+        Path to directory with templates.
+    bytecode_cache
+        Whether to store bytecode of compiled templates on disk.
+    bytecode_cache_dir
+        Path to directory with bytecode of compiled templates (default:
+        a per-user directory in the system temporary directory).
+
+    Returns
+    -------
+    :class:`~jinja2.Environment`
+        Jinja2 environment.
+    """
+    env_key: Tuple[str, bool, Optional[str]] = (
+        template_dir,
+        bytecode_cache,
+        bytecode_cache_dir,
+    )
+
+    if env_key not in _environments:
+        if bytecode_cache and bytecode_cache_dir:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+
+        _environments[env_key] = Environment(  # noqa: S701
+            loader=FileSystemLoader(template_dir),
+            autoescape=False,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir)
+            if bytecode_cache
+            else None,
+        )
+
+    return _environments[env_key]
+
+
+def load_template(
+    template_dir: str,
+    template_file: str,
+    bytecode_cache: bool = True,
+    bytecode_cache_dir: Optional[str] = None,
+) -> Template:
+    """Load and compile Jinja2 template.
+
+    Parameters
+    ----------
+    template_dir
+        Path to directory with templates.
+    template_file
+        Name of the template file.
+    bytecode_cache
+        Whether to store bytecode of compiled templates on disk.
+    bytecode_cache_dir
+        Path to directory with bytecode of compiled templates.
+
+    Returns
+    -------
+    :class:`~jinja2.Template`
+        Compiled template.
+    """
+    return get_environment(
+        template_dir, bytecode_cache, bytecode_cache_dir
+    ).get_template(template_file)
+
+
+def iter_param_sets(source: str, db_cursor: Cursor) -> Iterator[Dict[str, str]]:
+    """Iterate over sets of report parameters.
+
+    Parameters
+    ----------
+    source
+        Source of parameter sets in a form of `{type}:{locator}`, where
+        `sql:{query}` returns a set per row of the query result,
+        `csv:{path}` returns a set per row of the CSV file, and
+        `list:{name}={value},{value}...` returns a set per value.
+        Column names are used as parameter names.
+    db_cursor
+        Cursor to execute `sql` query with.
+
+    Yields
+    ------
+    :obj:`~typing.Dict` [:obj:`str`, :obj:`str`]
+        Mapping between parameter names and values.
+
+    Raises
+    ------
+    :class:`~yager.core.exc.YagerError`
+        If the source is not valid.
+    """
+    source_type, _, locator = source.partition(":")
+
+    if source_type == "sql":
+        try:
+            sql_result: Cursor = db_cursor.execute(locator)
+        except Error as e:
+            raise YagerError("Failed to query parameter sets: {}".format(str(e)))
+
+        param_names: List[str] = [h[0] for h in sql_result.description]
+        for row in sql_result:
+            yield {name: str(value) for name, value in zip(param_names, row)}
+
+    elif source_type == "csv":
+        with open(locator, newline="") as csv_file:
+            yield from DictReader(csv_file)
+
+    elif source_type == "list" and "=" in locator:
+        param_name, _, values = locator.partition("=")
+        for value in values.split(","):
+            yield {param_name: value}
+
+    else:
+        raise YagerError("Unknown source of parameter sets '{}'".format(source))
+
+
+def output_file_name(
+    pattern: Optional[str], report_config: Dict, params: Dict[str, str]
+) -> str:
+    """Return name of the file a report is rendered to.
+
+    Parameters
+    ----------
+    pattern
+        Pattern of the file name with parameter names in curly brackets,
+        ``{report}`` standing for the report name. Defaults to the report name
+        followed by all parameter values and the `output_extension` of the
+        report config or, without it, the extension of the template name
+        before ``.j2`` (e.g. ``.md`` for ``report.md.j2``), if any.
+    report_config
+        Report config.
+    params
+        Mapping between parameter names and values.
+
+    Returns
+    -------
+    str
+        File name with characters other than letters, digits, ``.``, ``-``
+        and ``_`` in parameter values replaced with ``_``.
+    """
+    if pattern is None:
+        pattern = "_".join(["{report}"] + ["{%s}" % name for name in params])
+
+        extension: Optional[str] = report_config.get("output_extension")
+        if extension:
+            pattern += "." + extension.lstrip(".")
+        else:
+            pattern += Path(report_config["template_file"]).with_suffix("").suffix
+
+    return pattern.format(
+        report=report_config["name"],
+        **{name: re.sub(r"[^\w.-]", "_", str(value)) for name, value in params.items()},
+    )
+
+
+class ReportRenderer:
+    """Class implementing renderer of a report for multiple parameter sets.
+
+    The template is compiled once, and results of queries, which do not use
+    any parameters, are fetched once and shared by all rendered reports.
+
+    If `row_set` is provided, results of queries with all variables mapped
+    to ``*`` are not fetched in advance, but passed to the template as
+    lazily fetched rows, and :meth:`write` streams the rendered report to
+    the output as it is generated.
+
+    Parameters
+    ----------
+    template
+        Compiled report template.
+    template_params
+        Report queries along with mappings of their results to template
+        variables.
+    fetch
+        Function returning results of queries in the same order, or ``None``
+        for failed queries.
+    row_set
+        Function returning lazily fetched rows of a query.
+    """
+
+    def __init__(
+        self,
+        template: Template,
+        template_params: List[Dict],
+        fetch: Callable[[List[Query]], List[Optional[QueryResult]]],
+        row_set: Optional[Callable[[str], RowSet]] = None,
+    ) -> None:
+        """Initialize renderer with compiled template."""
+        self.template: Template = template
+        self.template_params: List[Dict] = template_params
+        self.fetch: Callable[[List[Query]], List[Optional[QueryResult]]] = fetch
+        self.row_set: Optional[Callable[[str], RowSet]] = row_set
+
+        self._shared_results: Dict[str, QueryResult] = {}
+
+    def render(self, params: Dict[str, str]) -> str:
+        """Render report.
+
+        Parameters
+        ----------
+        params
+            Mapping between query parameter names and values.
+
+        Returns
+        -------
+        str
+            Rendered report.
+        """
+        return self.template.render(self._template_data(params))
+
+    def write(self, params: Dict[str, str], output: TextIO) -> None:
+        """Render report and write it to output as it is generated.
+
+        Parameters
+        ----------
+        params
+            Mapping between query parameter names and values.
+        output
+            Text stream to write the report to.
+        """
+        for chunk in self.template.generate(self._template_data(params)):
+            output.write(chunk)
+
+        output.write("\n")
+
+    def _template_data(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Fetch results of queries and map them to template variables."""
+        queries: List[Query] = expand_queries(self.template_params, params)
+        results: List[Optional[Union[QueryResult, RowSet]]] = [
+            self._shared_results.get(sql_query) for sql_query, _ in queries
+        ]
+
+        if self.row_set:
+            for query_index, param in enumerate(self.template_params):
+                if results[query_index] is None and all(
+                    var_value == "*" for var_value in param["var_mapping"].values()
+                ):
+                    results[query_index] = self.row_set(queries[query_index][0])
+
+        pending: List[int] = [i for i, result in enumerate(results) if result is None]
+        for query_index, result in zip(
+            pending, self.fetch([queries[i] for i in pending])
+        ):
+            results[query_index] = result
+
+            sql_query, used_params = queries[query_index]
+            if result is not None and not used_params:
+                self._shared_results[sql_query] = result
+
+        return map_template_data(self.template_params, results)
+
+
+def _fetch_in_worker(
+    db_cursor: Cursor, queries: List[Query]
+) -> List[Optional[QueryResult]]:
+    """Execute report queries one by one in a pool worker."""
+    results: List[Optional[QueryResult]] = []
+
+    for sql_query, _ in queries:
+        try:
+            sql_result: Cursor = db_cursor.execute(sql_query)
+        except Error as e:
+            _worker_problems.append("Failed to execute query: {}".format(str(e)))
+            results.append(None)
+        else:
+            results.append(
+                ([h[0] for h in sql_result.description], sql_result.fetchall())
+            )
+
+    return results
+
+
+def _init_worker(
+    db_uri: str,
+    pragmas: Dict[str, Any],
+    template_dir: str,
+    template_file: str,
+    template_params: List[Dict],
+    chunk_size: Optional[int],
+    bytecode_cache: bool,
+    bytecode_cache_dir: Optional[str],
+) -> None:
+    """Open database and compile template in a pool worker."""
+    global _worker_renderer
+
+    db_connection: Connection = connect(db_uri, uri=True)
+    db_cursor: Cursor = db_connection.cursor()
+    _worker_problems.extend(apply_pragmas(db_cursor, pragmas))
+
+    _worker_renderer = ReportRenderer(
+        load_template(template_dir, template_file, bytecode_cache, bytecode_cache_dir),
+        template_params,
+        lambda queries: _fetch_in_worker(db_cursor, queries),
+        None
+        if chunk_size is None
+        else lambda sql_query: RowSet(sql_query, db_connection, chunk_size),
+    )
+
+
+def _render_to_file(params: Dict[str, str], output_path: str) -> Tuple[str, List[str]]:
+    """Render report in a pool worker and write it to file."""
+    try:
+        with open(output_path, "w") as output_file:
+            _worker_renderer.write(params, output_file)
+    except Error as e:
+        _worker_problems.append("Failed to render report: {}".format(str(e)))
+
+    problems: List[str] = list(_worker_problems)
+    _worker_problems.clear()
+
+    return output_path, problems
+
+
+def render_batch(
+    db_uri: str,
+    pragmas: Dict[str, Any],
+    template_dir: str,
+    template_file: str,
+    template_params: List[Dict],
+    outputs: List[Tuple[Dict[str, str], str]],
+    processes: int,
+    chunk_size: Optional[int] = None,
+    bytecode_cache: bool = True,
+    bytecode_cache_dir: Optional[str] = None,
+) -> Iterator[Tuple[str, List[str]]]:
+    """Render report for multiple parameter sets with a process pool.
+
+    Each worker opens its own database connection and compiles the template
+    once, and renders reports for a share of parameter sets.
+
+    Parameters
+    ----------
+    db_uri
+        URI of the SQLite3 database.
+    pragmas
+        Settings applied to database connections.
+    template_dir
+        Path to directory with templates.
+    template_file
+        Name of the template file.
+    template_params
+        Report queries along with mappings of their results to template
+        variables.
+    outputs
+        Parameter sets along with paths to files reports are written to.
+    processes
+        Number of worker processes.
+    chunk_size
+        Number of rows fetched at a time by lazily fetched results of queries
+        with all variables mapped to ``*``. ``None`` fetches all rows in
+        advance.
+    bytecode_cache
+        Whether to store bytecode of compiled templates on disk.
+    bytecode_cache_dir
+        Path to directory with bytecode of compiled templates.
+
+    Yields
+    ------
+    :obj:`~typing.Tuple` [:obj:`str`, :obj:`~typing.List` [:obj:`str`]]
+        Path to the written report and problems occurred while rendering it.
+    """
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(
+            db_uri,
+            pragmas,
+            template_dir,
+            template_file,
+            template_params,
+            chunk_size,
+            bytecode_cache,
+            bytecode_cache_dir,
+        ),
+    ) as executor:
+        yield from executor.map(
+            _render_to_file,
+            [params for params, _ in outputs],
+            [output_path for _, output_path in outputs],
+            chunksize=max(1, len(outputs) // (4 * processes)),
+        )
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Shadow database module."""
+from os import replace
+from pathlib import Path
+from sqlite3 import Connection, Cursor, connect
+from typing import Dict, List, Optional
+
+# Settings trading durability for speed, which is safe for a shadow database
+# as it is discarded, if the load does not complete
+SHADOW_PRAGMAS: Dict[str, str] = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "locking_mode": "EXCLUSIVE",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",
+}
+
+
+class ShadowDatabase:
+    """Class implementing shadow copy of the database rebuilt off-line.
+
+    Data is loaded into a separate file next to the live database and is
+    moved over the live database with an atomic rename once the load
+    completes and passes validation. Readers of the live database only ever
+    see a complete snapshot: connections opened before the swap keep reading
+    the old file, while new connections open the new one. A live database in
+    WAL mode is instead overwritten with pages of the shadow database in a
+    single transaction, as its readers share the write-ahead log with the
+    live file.
+
+    Parameters
+    ----------
+    live_path
+        Path to the live database file.
+    pragmas
+        Settings applied to the shadow database connection.
+    """
+
+    def __init__(
+        self, live_path: Path, pragmas: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Initialize shadow database next to the live one."""
+        self.live_path: Path = live_path
+        self.path: Path = live_path.with_name("{}.shadow".format(live_path.name))
+        self.pragmas: Dict[str, str] = SHADOW_PRAGMAS if pragmas is None else pragmas
+
+        self.connection: Optional[Connection] = None
+        self.cursor: Optional[Cursor] = None
+
+    def create(self, live_connection: Connection, carry_tables: List[str]) -> None:
+        """Create shadow database with tables carried over from the live one.
+
+        Parameters
+        ----------
+        live_connection
+            Connection to the live database.
+        carry_tables
+            Names of tables to be copied from the live database along with
+            their indexes. ``["*"]`` copies the whole database.
+        """
+        self.discard()
+
+        self.connection = connect(str(self.path))
+        self.cursor = self.connection.cursor()
+
+        # pages are copied to a live database in WAL mode on swap, which
+        # requires the same page size
+        page_size: int = live_connection.execute("PRAGMA page_size").fetchone()[0]
+        self.cursor.execute("PRAGMA page_size = {}".format(page_size))
+
+        if carry_tables == ["*"]:
+            live_connection.backup(self.connection)
+        else:
+            self._copy_tables(carry_tables)
+
+        for pragma, value in self.pragmas.items():
+            self.cursor.execute("PRAGMA {} = {}".format(pragma, value))
+
+    def _copy_tables(self, table_names: List[str]) -> None:
+        """Copy tables and their indexes from the live database."""
+        self.cursor.execute("ATTACH DATABASE ? AS live", (str(self.live_path),))
+
+        for table_name in table_names:
+            schema: List = self.cursor.execute(
+                "SELECT type, sql FROM live.sqlite_master "
+                "WHERE tbl_name == ? AND sql IS NOT NULL "
+                "ORDER BY type == 'table' DESC",
+                (table_name,),
+            ).fetchall()
+
+            for object_type, sql in schema:
+                self.cursor.execute(sql)
+
+                if object_type == "table":
+                    self.cursor.execute(
+                        "INSERT INTO main.{0} SELECT * FROM live.{0}".format(table_name)
+                    )
+
+        self.connection.commit()
+        self.cursor.execute("DETACH DATABASE live")
+
+    def validate(self, table_names: List[str]) -> List[str]:
+        """Validate shadow database.
+
+        Parameters
+        ----------
+        table_names
+            Names of tables expected in the database.
+
+        Returns
+        -------
+        :obj:`~typing.List` [:obj:`str`]
+            Problems found, empty if the database is valid.
+        """
+        problems: List[str] = [
+            "integrity check: {}".format(record[0])
+            for record in self.cursor.execute("PRAGMA integrity_check").fetchall()
+            if record[0] != "ok"
+        ]
+
+        existing_tables: List[str] = [
+            record[0]
+            for record in self.cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type == 'table'"
+            ).fetchall()
+        ]
+        problems.extend(
+            "missing table '{}'".format(table_name)
+            for table_name in table_names
+            if table_name not in existing_tables
+        )
+
+        return problems
+
+    def swap(self, live_connection: Connection) -> None:
+        """Move shadow database over the live one.
+
+        Parameters
+        ----------
+        live_connection
+            Connection to the live database, which is closed during the swap.
+        """
+        self.connection.commit()
+        live_connection.commit()
+
+        # write-ahead log and its index of the live database are shared with
+        # its readers and would be paired with the renamed file, so pages are
+        # copied through the log instead
+        if live_connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            self.connection.backup(live_connection)
+            live_connection.close()
+            self.discard()
+            return
+
+        self.cursor.execute("PRAGMA journal_mode = DELETE").fetchall()
+        self._close()
+        live_connection.close()
+
+        replace(str(self.path), str(self.live_path))
+
+    def _close(self) -> None:
+        """Close shadow database connection.
+
+        The cursor is closed first, as a connection with pending statements
+        is kept open along with its locks until they are finalized.
+        """
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def discard(self) -> None:
+        """Close and remove shadow database."""
+        self._close()
+
+        if self.path.exists():
+            self.path.unlink()
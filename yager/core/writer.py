@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Database writer module."""
+from sqlite3 import Cursor, Error
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from cement.core.log import LogHandler
+
+from .metrics import Metrics
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_TRANSACTION_SIZE = 10000
+
+
+class TableWriter:
+    """Class implementing batched writer of table rows.
+
+    Rows are buffered and inserted with a single ``executemany`` call per
+    batch using bound parameters, and the transaction is committed once
+    per `transaction_size` rows.
+
+    Parameters
+    ----------
+    cursor
+        Database cursor to write rows with.
+    table_name
+        Name of the table to insert rows into.
+    columns
+        Table columns in the order values are provided for each row.
+    batch_size
+        Number of rows inserted with one ``executemany`` call.
+    transaction_size
+        Number of rows inserted within one transaction.
+    log
+        Logger to report progress to.
+    metrics
+        Collector to record time spent in inserts and commits with.
+    """
+
+    def __init__(
+        self,
+        cursor: Cursor,
+        table_name: str,
+        columns: List[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        transaction_size: int = DEFAULT_TRANSACTION_SIZE,
+        log: Optional[LogHandler] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        """Initialize writer with prepared insert statement."""
+        self.cursor: Cursor = cursor
+        self.table_name: str = table_name
+        self.columns: List[str] = columns
+        self.batch_size: int = max(1, batch_size)
+        self.transaction_size: int = max(self.batch_size, transaction_size)
+        self.log: Optional[LogHandler] = log
+        self.metrics: Optional[Metrics] = metrics
+
+        self.row_count: int = 0
+
+        self._sql: str = "INSERT OR IGNORE INTO {} ({}) VALUES ({})".format(
+            table_name, ",".join(columns), ",".join("?" * len(columns))
+        )
+        self._batch: List[Sequence[Any]] = []
+        self._uncommitted: int = 0
+        self._started: float = perf_counter()
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return average number of rows written per second."""
+        elapsed: float = perf_counter() - self._started
+
+        return self.row_count / elapsed if elapsed > 0 else 0.0
+
+    def write(self, row: Sequence[Any]) -> None:
+        """Buffer row for insertion.
+
+        Parameters
+        ----------
+        row
+            Values in the order of :attr:`columns`.
+        """
+        self._batch.append(row)
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows: List[Sequence[Any]]) -> None:
+        """Buffer multiple rows for insertion.
+
+        Parameters
+        ----------
+        rows
+            Rows with values in the order of :attr:`columns`.
+        """
+        self._batch.extend(rows)
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_dict(self, row: Dict[str, Any]) -> None:
+        """Buffer row provided as a mapping between columns and values.
+
+        Parameters
+        ----------
+        row
+            Mapping between table columns and values.
+        """
+        self.write([row.get(column) for column in self.columns])
+
+    def flush(self) -> None:
+        """Insert buffered rows and commit, if transaction size is reached."""
+        if not self._batch:
+            return
+
+        started: float = perf_counter()
+        try:
+            self.cursor.executemany(self._sql, self._batch)
+        except Error as e:
+            if self.log:
+                self.log.error(  # noqa: G001
+                    "Failed to insert {} records into '{}': {}".format(
+                        len(self._batch), self.table_name, str(e)
+                    )
+                )
+        else:
+            self.row_count += len(self._batch)
+            self._uncommitted += len(self._batch)
+
+            if self.metrics is not None:
+                self.metrics.add("insert", perf_counter() - started, len(self._batch))
+
+        self._batch = []
+
+        if self._uncommitted >= self.transaction_size:
+            self.commit()
+
+    def commit(self) -> None:
+        """Commit inserted rows."""
+        self._commit()
+
+        if self.log:
+            self.log.info(  # noqa: G001
+                "Inserted {} records ({:.0f} rows/s)...".format(
+                    self.row_count, self.rows_per_second
+                )
+            )
+
+    def _commit(self) -> None:
+        """Commit transaction and record time spent in it."""
+        started: float = perf_counter()
+        self.cursor.connection.commit()
+        self._uncommitted = 0
+
+        if self.metrics is not None:
+            self.metrics.add("commit", perf_counter() - started)
+
+    def close(self) -> int:
+        """Insert and commit all buffered rows.
+
+        Returns
+        -------
+        int
+            Total number of rows written.
+        """
+        self.flush()
+        self._commit()
+
+        if self.log:
+            self.log.info(  # noqa: G001
+                "Total records inserted into '{}': {} ({:.0f} rows/s)".format(
+                    self.table_name, self.row_count, self.rows_per_second
+                )
+            )
+
+        return self.row_count
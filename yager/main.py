@@ -1,14 +1,25 @@
 """Main app module."""
+from sqlite3 import Cursor
+from typing import Optional
+
 from cement import App, TestApp, init_defaults
 from cement.core.exc import CaughtSignal
 
 from .controllers.base import Base
 from .core.exc import YagerError
-from .core.hooks import load_db, log_app_version
+from .core.hooks import (
+    load_metrics,
+    log_app_version,
+    open_db,
+    report_metrics,
+    start_metrics,
+)
 from .core.log import YagerLogHandler
 
 # configuration defaults
-CONFIG = init_defaults("yager", "yager.data", "yager.reports")
+CONFIG = init_defaults("yager")
+CONFIG["yager"]["data"] = {}
+CONFIG["yager"]["reports"] = []
 
 
 class Yager(App):
@@ -28,13 +39,14 @@ class Yager(App):
         # register functions to hooks
         hooks = [
             ("post_setup", log_app_version),
-            ("post_setup", load_db),
+            ("post_setup", load_metrics),
+            ("post_argument_parsing", start_metrics),
+            ("post_run", report_metrics),
         ]
 
         # load additional framework extensions
         extensions = [
             "colorlog",
-            "jinja2",
             "yaml",
         ]
 
@@ -47,12 +59,39 @@ class Yager(App):
         # set log handler
         log_handler = "colorlog_custom_format"
 
-        # set the output handler
-        output_handler = "jinja2"
-
         # register handlers
         handlers = [Base, YagerLogHandler]
 
+    _db_cursor: Optional[Cursor] = None
+    _db_loaded: bool = False
+
+    @property
+    def db_cursor(self) -> Optional[Cursor]:
+        """Cursor of the app database.
+
+        The database is connected on first use, so invocations not touching
+        it (e.g. ``--help`` or ``--version``) do not pay for opening it.
+
+        Returns
+        -------
+        :obj:`~typing.Optional` [:obj:`~sqlite3.Cursor`]
+            If successful, returns :obj:`~sqlite3.Cursor` of the database.
+            Otherwise returns ``None``.
+        """
+        if not self._db_loaded:
+            self._db_loaded = True
+
+            self.log.debug("Connecting app to database")
+            self._db_cursor = open_db(self)
+
+        return self._db_cursor
+
+    @db_cursor.setter
+    def db_cursor(self, db_cursor: Optional[Cursor]) -> None:
+        """Replace cursor of the app database (e.g. after a shadow refresh)."""
+        self._db_loaded = True
+        self._db_cursor = db_cursor
+
 
 class YagerTest(TestApp, Yager):
     """A sub-class of Yager that is better suited for testing."""